@@ -0,0 +1,107 @@
+import os
+import wave
+
+# Rewrite the WAV header this often so a crashed session still leaves a playable file.
+HEADER_PATCH_INTERVAL_BYTES = 16000 * 2 * 10
+WRITE_BUFFER_SIZE = 1 << 20
+
+
+class StreamingWavWriter:
+    """
+    Appends PCM chunks to a .wav file as they arrive instead of holding the whole
+    recording in memory. The RIFF/data sizes in the header are patched periodically
+    and on close().
+    """
+    def __init__(self, path, channels, sample_width, rate, patch_interval=HEADER_PATCH_INTERVAL_BYTES):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.bytes_written = 0
+        self._patch_interval = patch_interval
+        self._since_patch = 0
+        self._file = open(path, "wb", buffering=WRITE_BUFFER_SIZE)
+        self._wave = wave.open(self._file, "wb")
+        self._wave.setnchannels(channels)
+        self._wave.setsampwidth(sample_width)
+        self._wave.setframerate(rate)
+
+    def write(self, chunk):
+        if self._wave is None:
+            return
+        # writeframesraw skips the per-call header rewrite that writeframes does.
+        self._wave.writeframesraw(chunk)
+        self.bytes_written += len(chunk)
+        self._since_patch += len(chunk)
+        if self._since_patch >= self._patch_interval:
+            self.flush()
+
+    def flush(self):
+        if self._wave is None:
+            return
+        self._wave.writeframes(b"")  # patches the header to the current length
+        self._file.flush()
+        self._since_patch = 0
+
+    def close(self):
+        if self._wave is None:
+            return
+        try:
+            self._wave.close()
+        finally:
+            self._file.close()
+            self._wave = None
+
+    @property
+    def closed(self):
+        return self._wave is None
+
+
+class AudioRingBuffer:
+    """
+    Fixed-size buffer holding the most recent `capacity` bytes of audio.
+    Positions are absolute byte offsets since the session started, so callers can
+    ask for "everything since offset N" as long as it has not been overwritten.
+    """
+    def __init__(self, capacity):
+        self.capacity = int(capacity)
+        self._buffer = bytearray(self.capacity)
+        self.total_written = 0
+
+    def write(self, chunk):
+        size = len(chunk)
+        if size >= self.capacity:
+            # Only the tail survives; lay it out so the oldest byte sits at total_written % capacity.
+            tail = chunk[size - self.capacity:]
+            self.total_written += size
+            start = self.total_written % self.capacity
+            self._buffer[start:] = tail[:self.capacity - start]
+            self._buffer[:start] = tail[self.capacity - start:]
+            return
+        start = self.total_written % self.capacity
+        end = start + size
+        if end <= self.capacity:
+            self._buffer[start:end] = chunk
+        else:
+            split = self.capacity - start
+            self._buffer[start:] = chunk[:split]
+            self._buffer[:size - split] = chunk[split:]
+        self.total_written += size
+
+    @property
+    def oldest_offset(self):
+        return max(0, self.total_written - self.capacity)
+
+    def read_from(self, offset, end=None):
+        """Return the bytes from absolute `offset` to `end` (default: now), clamped to what is still held."""
+        offset = max(offset, self.oldest_offset)
+        end = self.total_written if end is None else min(end, self.total_written)
+        size = end - offset
+        if size <= 0:
+            return b""
+        start = offset % self.capacity
+        stop = start + size
+        if stop <= self.capacity:
+            return bytes(self._buffer[start:stop])
+        return bytes(self._buffer[start:]) + bytes(self._buffer[:stop - self.capacity])
+
+    def latest(self, size):
+        return self.read_from(self.total_written - size)
@@ -0,0 +1,133 @@
+import mmap
+import struct
+
+REALTIME = "realtime"
+FAST = "fast"
+PACING_MODES = (REALTIME, FAST)
+
+WAVE_FORMAT_PCM = 0x0001
+# The real format of an extensible WAV is the first two bytes of its SubFormat GUID.
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+def read_wav_layout(f):
+    """
+    Walk the RIFF chunks of an open WAV file and return
+    (data_offset, data_length, channels, sample_rate, sample_width, format_tag) without
+    reading the samples.
+    """
+    f.seek(0)
+    riff, _, wave_id = struct.unpack("<4sI4s", f.read(12))
+    if riff != b"RIFF" or wave_id != b"WAVE":
+        raise ValueError("Not a RIFF/WAVE file")
+    fmt = None
+    while True:
+        header = f.read(8)
+        if len(header) < 8:
+            raise ValueError("WAV file has no data chunk")
+        chunk_id, chunk_size = struct.unpack("<4sI", header)
+        if chunk_id == b"fmt ":
+            fmt = struct.unpack("<HHIIHH", f.read(16))
+            skip = chunk_size - 16
+            if fmt[0] == WAVE_FORMAT_EXTENSIBLE and chunk_size >= 26:
+                _, _, _, sub_format = struct.unpack("<HHIH", f.read(10))
+                fmt = (sub_format,) + fmt[1:]
+                skip -= 10
+            f.seek(skip + (chunk_size & 1), 1)
+        elif chunk_id == b"data":
+            if fmt is None:
+                raise ValueError("WAV data chunk precedes fmt chunk")
+            format_tag, channels, sample_rate, _, _, bits_per_sample = fmt
+            data_offset = f.tell()
+            # Streaming writers leave a 0/0xFFFFFFFF size behind; trust the file length then.
+            f.seek(0, 2)
+            available = f.tell() - data_offset
+            data_length = chunk_size if 0 < chunk_size <= available else available
+            return data_offset, data_length, channels, sample_rate, bits_per_sample // 8, format_tag
+        else:
+            f.seek(chunk_size + (chunk_size & 1), 1)
+
+
+def is_pcm16_wav(path):
+    """
+    True for WAV files holding 16-bit PCM, the only WAV audio that can be streamed raw
+    as linear16. Other WAVs (8/24/32-bit, float, compressed) go to Deepgram as files.
+    """
+    try:
+        with open(path, "rb") as f:
+            _, _, _, _, sample_width, format_tag = read_wav_layout(f)
+    except (OSError, ValueError, struct.error):
+        return False
+    return format_tag == WAVE_FORMAT_PCM and sample_width == 2
+
+
+class WavSource:
+    """
+    PCM audio exposed as a memoryview, either over a memory-mapped WAV file or over
+    bytes already in memory. chunks() yields zero-copy slices, so streaming a long
+    recording never copies or loads the whole file.
+    """
+    def __init__(self, view, channels, sample_rate, sample_width, name="audio", closer=None):
+        self.view = view
+        self.channels = channels
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self.name = name
+        self._closer = closer
+
+    @classmethod
+    def open(cls, path):
+        f = open(path, "rb")
+        try:
+            offset, length, channels, sample_rate, sample_width, format_tag = read_wav_layout(f)
+            if format_tag != WAVE_FORMAT_PCM:
+                raise ValueError(f"Unsupported WAV format 0x{format_tag:04x}: only PCM can be streamed raw")
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            f.close()
+            raise
+        view = memoryview(mapped)[offset:offset + length]
+
+        def closer():
+            view.release()
+            try:
+                mapped.close()
+            except BufferError:
+                # A chunk slice is still referenced (e.g. by a traceback); the map is freed with it.
+                pass
+            f.close()
+        return cls(view, channels, sample_rate, sample_width, name=path, closer=closer)
+
+    @classmethod
+    def from_bytes(cls, data, channels, sample_rate, sample_width, name="audio"):
+        return cls(memoryview(data), channels, sample_rate, sample_width, name=name)
+
+    @property
+    def byte_rate(self):
+        return self.sample_width * self.sample_rate * self.channels
+
+    @property
+    def duration(self):
+        return len(self.view) / self.byte_rate
+
+    def chunk_size(self, seconds):
+        frame = self.sample_width * self.channels
+        # Whole frames only, so no sample is ever split across two messages.
+        return max(frame, int(self.byte_rate * seconds) // frame * frame)
+
+    def chunks(self, chunk_size, start=0):
+        for offset in range(start, len(self.view), chunk_size):
+            yield self.view[offset:offset + chunk_size]
+
+    def close(self):
+        if self._closer is not None:
+            self._closer()
+            self._closer = None
+        else:
+            self.view.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
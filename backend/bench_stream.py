@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Replay benchmark for the streaming pipeline. Runs K concurrent RealTimeTranscriber
+sessions against the local fake Deepgram server and reports end-to-end latency,
+throughput, CPU and RSS per session.
+
+    python bench_stream.py --sessions 8 --wav meeting.wav
+    python bench_stream.py --sessions 32 --duration 60 --latency 0.2 --json bench.json
+    python bench_stream.py --compare-encodings --wav meeting.wav
+
+--compare-encodings runs the same sessions once per uplink encoding and reports
+bandwidth, CPU, codec SNR and word error rate against the linear16 transcripts.
+WER is only meaningful against real Deepgram (--host wss://api.deepgram.com --key),
+since the fake server answers with scripted lines.
+"""
+import os
+import sys
+import json
+import math
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from array import array
+import numpy as np
+from realtime_stream import RealTimeTranscriber
+from audio_source import WavSource, PACING_MODES, REALTIME
+from codec import ENCODINGS, LINEAR16, MULAW, mulaw_encode, mulaw_decode
+
+RSS_SAMPLE_INTERVAL = 0.5
+
+
+def read_rss_bytes():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def synthesize_audio(seconds, sample_rate=16000):
+    """Low-level noise with periodic louder bursts, as 16-bit mono PCM."""
+    rng = random.Random(0)
+    samples = array("h", (
+        int(rng.gauss(0, 3000 if (i // sample_rate) % 3 else 300))
+        for i in range(int(seconds * sample_rate))
+    ))
+    return {"data": samples.tobytes(), "channels": 1, "sample_rate": sample_rate, "sample_width": 2}
+
+
+async def wait_for_port(host, port, timeout=10):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+
+
+def word_error_rate(reference, hypothesis):
+    """Word-level Levenshtein distance divided by the reference length."""
+    reference, hypothesis = reference.lower().split(), hypothesis.lower().split()
+    if not reference:
+        return 0.0 if not hypothesis else 1.0
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_word in enumerate(reference, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hypothesis, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref_word != hyp_word)))
+        previous = current
+    return previous[-1] / len(reference)
+
+
+def codec_fidelity(source):
+    """Signal-to-noise ratio of a mu-law round trip and the encoder's CPU cost per audio second."""
+    started = time.process_time()
+    encoded = mulaw_encode(source.view)
+    encode_seconds = time.process_time() - started
+    original = np.frombuffer(source.view, dtype="<i2").astype(np.float64)
+    error = original - np.frombuffer(mulaw_decode(encoded), dtype="<i2")
+    snr = 10 * math.log10(np.dot(original, original) / max(np.dot(error, error), 1e-9))
+    return {"mulaw_snr_db": round(snr, 2), "mulaw_encode_us_per_audio_second": round(1e6 * encode_seconds / source.duration, 1)}
+
+
+class SessionResult:
+    def __init__(self, index):
+        self.index = index
+        self.latencies = []
+        self.finals = 0
+        self.transcripts = []
+        self.bytes_sent = 0
+        self.audio_seconds = 0.0
+        self.wall_seconds = 0.0
+
+    @property
+    def transcript(self):
+        return " ".join(self.transcripts)
+
+    def on_result(self, res):
+        if res.get("is_final"):
+            self.finals += 1
+            self.transcripts.append(res["channel"]["alternatives"][0].get("transcript", ""))
+            if "audio_received_at" in res:
+                self.latencies.append(time.time() - res["audio_received_at"])
+            self.audio_seconds = max(self.audio_seconds, res.get("start", 0) + res.get("duration", 0))
+
+
+async def run_session(index, host, audio, output_dir, run_kwargs, key="local", encoding=LINEAR16):
+    result = SessionResult(index)
+    transcriber = RealTimeTranscriber(key, host=host, session_id=f"bench-{index}", output_dir=output_dir, encoding=encoding)
+    transcriber.add_result_listener(result.on_result)
+    started = time.monotonic()
+    await transcriber.run("wav", **audio, **run_kwargs)
+    result.wall_seconds = time.monotonic() - started
+    result.bytes_sent = transcriber.bytes_sent
+    return result
+
+
+async def sample_rss(samples, stop):
+    while not stop.is_set():
+        samples.append(read_rss_bytes())
+        try:
+            await asyncio.wait_for(stop.wait(), RSS_SAMPLE_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def benchmark(args, run_kwargs=None, results_out=None):
+    run_kwargs = dict(run_kwargs or {}, pacing=args.pacing)
+    # WAV files are memory-mapped by each session; synthetic audio is shared bytes.
+    audio = {"filepath": args.wav} if args.wav else synthesize_audio(args.duration)
+    with (WavSource.open(args.wav) if args.wav else WavSource.from_bytes(**audio)) as source:
+        audio_duration = source.duration
+    server = None
+    host = args.host
+    if host is None:
+        server = subprocess.Popen([
+            sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_deepgram.py"),
+            "--port", str(args.port), "--latency", str(args.latency), "--jitter", str(args.jitter),
+        ])
+        host = f"ws://127.0.0.1:{args.port}"
+        await wait_for_port("127.0.0.1", args.port)
+    try:
+        with tempfile.TemporaryDirectory() as output_dir:
+            rss_baseline = read_rss_bytes()
+            rss_samples = []
+            stop = asyncio.Event()
+            sampler = asyncio.create_task(sample_rss(rss_samples, stop))
+            cpu_started = time.process_time()
+            wall_started = time.monotonic()
+            results = await asyncio.gather(*(
+                run_session(i, host, audio, output_dir, run_kwargs, args.key, args.encoding) for i in range(args.sessions)
+            ))
+            wall = time.monotonic() - wall_started
+            cpu = time.process_time() - cpu_started
+            stop.set()
+            await sampler
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    if results_out is not None:
+        results_out.extend(results)
+    latencies = [latency for result in results for latency in result.latencies]
+    audio_seconds = sum(result.audio_seconds for result in results)
+    rss_peak = max(rss_samples + [read_rss_bytes()])
+    return {
+        "sessions": args.sessions,
+        "pacing": args.pacing,
+        "encoding": args.encoding,
+        "audio_seconds_per_session": round(audio_duration, 3),
+        "uplink_kbps_per_session": round(8 * sum(result.bytes_sent for result in results) / args.sessions / audio_duration / 1000, 1),
+        "wall_seconds": round(wall, 3),
+        "finals": sum(result.finals for result in results),
+        "latency_p50": percentile(latencies, 0.5),
+        "latency_p95": percentile(latencies, 0.95),
+        "latency_max": max(latencies) if latencies else None,
+        "throughput_audio_seconds_per_second": round(audio_seconds / wall, 3) if wall else None,
+        "cpu_seconds_per_session": round(cpu / args.sessions, 4),
+        "cpu_percent_of_one_core": round(100 * cpu / wall, 1) if wall else None,
+        "rss_delta_per_session_mb": round((rss_peak - rss_baseline) / args.sessions / 2**20, 3),
+        "rss_peak_mb": round(rss_peak / 2**20, 1),
+    }
+
+
+async def compare_encodings(args):
+    """Run the benchmark once per encoding; accuracy is WER of each session's transcript against linear16."""
+    reports, transcripts = {}, {}
+    for encoding in ENCODINGS:
+        results = []
+        reports[encoding] = await benchmark(argparse.Namespace(**dict(vars(args), encoding=encoding)), results_out=results)
+        transcripts[encoding] = [result.transcript for result in results]
+    for encoding in ENCODINGS:
+        rates = [word_error_rate(ref, hyp) for ref, hyp in zip(transcripts[LINEAR16], transcripts[encoding])]
+        reports[encoding]["wer_vs_linear16"] = round(sum(rates) / len(rates), 4) if rates else None
+    audio = None if args.wav else synthesize_audio(args.duration)
+    with (WavSource.open(args.wav) if args.wav else WavSource.from_bytes(**audio)) as source:
+        if source.sample_width == 2:
+            reports[MULAW].update(codec_fidelity(source))
+    return reports
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Concurrent streaming benchmark against a local fake Deepgram server.")
+    parser.add_argument("-n", "--sessions", type=int, default=4, help="Concurrent sessions (K)")
+    parser.add_argument("--wav", help="WAV file to replay; synthetic audio is used when omitted")
+    parser.add_argument("--duration", type=float, default=20, help="Seconds of synthetic audio per session")
+    parser.add_argument("--host", help="Use an already running server instead of spawning fake_deepgram.py")
+    parser.add_argument("--port", type=int, default=8765, help="Port for the spawned fake server")
+    parser.add_argument("--latency", type=float, default=0.3, help="Fake server response latency")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Fake server latency jitter")
+    parser.add_argument("--pacing", default=REALTIME, choices=PACING_MODES, help="Send audio in real time or as fast as possible")
+    parser.add_argument("--encoding", default=LINEAR16, choices=ENCODINGS, help="Uplink audio encoding")
+    parser.add_argument("--compare-encodings", action="store_true", help="Benchmark every encoding and compare them")
+    parser.add_argument("--key", default="local", help="Deepgram API key when --host points at the real service")
+    parser.add_argument("--json", help="Also write the report to this file")
+    return parser
+
+
+def print_report(report):
+    width = max(len(key) for key in report)
+    for key, value in report.items():
+        if isinstance(value, float) and key.startswith("latency"):
+            value = f"{value * 1000:.1f} ms"
+        print(f"{key.ljust(width)}  {value}", flush=True)
+
+
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    if args.compare_encodings:
+        report = asyncio.run(compare_encodings(args))
+        for encoding, encoding_report in report.items():
+            print(f"--- {encoding}", flush=True)
+            print_report(encoding_report)
+    else:
+        report = asyncio.run(benchmark(args))
+        print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
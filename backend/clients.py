@@ -0,0 +1,89 @@
+import os
+import time
+import asyncio
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+import httpx
+from openai import AsyncOpenAI
+from groundx import AsyncGroundX
+from metrics import REGISTRY
+
+OPENAI = "openai"
+GROUNDX = "groundx"
+
+# Requests allowed in flight per upstream; the rest wait their turn instead of
+# piling onto the provider's rate limits.
+UPSTREAM_CONCURRENCY = {
+    OPENAI: int(os.getenv("OPENAI_MAX_CONCURRENCY", "8")),
+    GROUNDX: int(os.getenv("GROUNDX_MAX_CONCURRENCY", "4")),
+}
+HTTP_MAX_CONNECTIONS = 20
+HTTP_KEEPALIVE_SECONDS = 30
+HTTP_TIMEOUT = httpx.Timeout(120, connect=10)
+# Distinct API keys with a cached client object; they all share the upstream's pool.
+MAX_CLIENTS_PER_UPSTREAM = 64
+
+UPSTREAM_WAIT_SECONDS = REGISTRY.histogram(
+    "meetscript_upstream_wait_seconds",
+    "Time requests waited for a free concurrency slot, per upstream API.",
+    ("upstream",),
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+
+
+class ClientRegistry:
+    """
+    Async API clients shared by every request. Each upstream gets one httpx connection
+    pool with keep-alive, and each API key gets one client object on top of it, so
+    repeated calls skip the TCP and TLS handshakes. limit() bounds concurrent calls per
+    upstream. Must be used from the event loop thread; close with aclose() on shutdown.
+    """
+    def __init__(self, concurrency=None):
+        self.concurrency = dict(UPSTREAM_CONCURRENCY, **(concurrency or {}))
+        self._http = {}
+        self._clients = {upstream: OrderedDict() for upstream in self.concurrency}
+        self._semaphores = {upstream: asyncio.Semaphore(limit) for upstream, limit in self.concurrency.items()}
+
+    def _http_client(self, upstream):
+        client = self._http.get(upstream)
+        if client is None:
+            client = self._http[upstream] = httpx.AsyncClient(
+                timeout=HTTP_TIMEOUT,
+                limits=httpx.Limits(
+                    max_connections=HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=HTTP_MAX_CONNECTIONS,
+                    keepalive_expiry=HTTP_KEEPALIVE_SECONDS,
+                ),
+            )
+        return client
+
+    def _client(self, upstream, api_key, factory):
+        clients = self._clients[upstream]
+        client = clients.get(api_key)
+        if client is None:
+            client = clients[api_key] = factory(self._http_client(upstream))
+            while len(clients) > MAX_CLIENTS_PER_UPSTREAM:
+                # Evicted clients only drop their key; the shared pool stays open.
+                clients.popitem(last=False)
+        clients.move_to_end(api_key)
+        return client
+
+    def openai(self, api_key):
+        return self._client(OPENAI, api_key, lambda http: AsyncOpenAI(api_key=api_key, http_client=http))
+
+    def groundx(self, api_key):
+        return self._client(GROUNDX, api_key, lambda http: AsyncGroundX(api_key=api_key, httpx_client=http))
+
+    @asynccontextmanager
+    async def limit(self, upstream):
+        """Hold one of `upstream`'s concurrency slots for the duration of the block."""
+        started = time.perf_counter()
+        async with self._semaphores[upstream]:
+            UPSTREAM_WAIT_SECONDS.observe(time.perf_counter() - started, upstream=upstream)
+            yield
+
+    async def aclose(self):
+        for clients in self._clients.values():
+            clients.clear()
+        http_clients, self._http = list(self._http.values()), {}
+        await asyncio.gather(*(client.aclose() for client in http_clients), return_exceptions=True)
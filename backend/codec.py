@@ -0,0 +1,45 @@
+import numpy as np
+
+LINEAR16 = "linear16"
+MULAW = "mulaw"
+ENCODINGS = (LINEAR16, MULAW)
+
+MULAW_BIAS = 0x84
+MULAW_CLIP = 8159
+MULAW_SEGMENT_ENDS = np.array([0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF, 0x1FFF])
+
+
+def _build_mulaw_tables():
+    """G.711 mu-law lookup tables: every 16-bit sample pattern to its code byte, and back."""
+    samples = np.arange(-32768, 32768, dtype=np.int32)
+    # The classic 14-bit formulation, so codes match other G.711 implementations bit for bit.
+    pcm = samples >> 2
+    mask = np.where(pcm < 0, 0x7F, 0xFF)
+    pcm = np.minimum(np.abs(pcm), MULAW_CLIP) + (MULAW_BIAS >> 2)
+    segment = np.searchsorted(MULAW_SEGMENT_ENDS, pcm)
+    code = (np.minimum(segment, 7) << 4) | ((pcm >> (segment + 1)) & 0x0F)
+    code = np.where(segment >= 8, 0x7F, code)
+    encode = np.empty(65536, dtype=np.uint8)
+    encode[samples.astype(np.uint16)] = code ^ mask
+
+    codes = ~np.arange(256, dtype=np.int32) & 0xFF
+    exponent = (codes >> 4) & 0x07
+    magnitude = (((codes & 0x0F) << 3) + MULAW_BIAS << exponent) - MULAW_BIAS
+    decode = np.where(codes & 0x80, -magnitude, magnitude).astype("<i2")
+    return encode, decode
+
+
+MULAW_ENCODE_TABLE, MULAW_DECODE_TABLE = _build_mulaw_tables()
+
+
+def mulaw_encode(pcm):
+    """Little-endian 16-bit PCM to 8-bit mu-law, one table lookup per sample."""
+    return MULAW_ENCODE_TABLE[np.frombuffer(pcm, dtype="<u2")].tobytes()
+
+
+def mulaw_decode(data):
+    return MULAW_DECODE_TABLE[np.frombuffer(data, dtype=np.uint8)].tobytes()
+
+
+def bytes_per_sample(encoding):
+    return 1 if encoding == MULAW else 2
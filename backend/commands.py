@@ -0,0 +1,147 @@
+import os
+import re
+import json
+from collections import deque
+
+STOP = "stop"
+BOOKMARK = "bookmark"
+ACTION_ITEM = "action_item"
+INGEST = "ingest"
+ACTIONS = (STOP, BOOKMARK, ACTION_ITEM, INGEST)
+
+# A phrase may continue into the next final only if it starts within this many seconds.
+SPAN_GAP_SECONDS = 2.0
+# Optional JSON list of {"name", "action", "phrases", "cooldown"} replacing the defaults.
+VOICE_COMMANDS_FILE = os.getenv("VOICE_COMMANDS_FILE")
+
+_WORD = re.compile(r"[a-z0-9']+")
+
+
+def tokenize(text):
+    return _WORD.findall(text.lower())
+
+
+class Command:
+    def __init__(self, name, action, phrases, cooldown=0.0):
+        if action not in ACTIONS:
+            raise ValueError(f"Unknown command action: {action}")
+        self.name = name
+        self.action = action
+        self.phrases = list(phrases)
+        self.cooldown = cooldown
+
+
+class CommandMatch:
+    def __init__(self, command, phrase, at):
+        self.command = command
+        self.phrase = phrase
+        self.at = at
+
+    def to_dict(self):
+        return {"command": self.command.name, "action": self.command.action, "phrase": self.phrase, "at": self.at}
+
+
+DEFAULT_COMMANDS = [
+    Command("stop", STOP, ["goodbye everyone", "goodbye everybody", "bye everyone", "stop transcribing",
+                           "stop the transcription", "end the transcription"]),
+    Command("bookmark", BOOKMARK, ["bookmark this", "bookmark that", "add a bookmark"], cooldown=10),
+    Command("action_item", ACTION_ITEM, ["action item", "add an action item"], cooldown=5),
+    Command("ingest", INGEST, ["update the knowledge base", "save the transcript"], cooldown=60),
+]
+
+
+def load_commands(path):
+    commands = []
+    with open(path, encoding="utf-8") as f:
+        items = json.load(f)
+    for item in items:
+        phrases = []
+        for phrase in item["phrases"]:
+            if tokenize(phrase):
+                phrases.append(phrase)
+            else:
+                # A phrase without words would match at the automaton root, i.e. on every word.
+                print(f"🟡 WARNING: Skipping voice command phrase {phrase!r} of '{item['name']}': it has no words.", flush=True)
+        if phrases:
+            commands.append(Command(item["name"], item["action"], phrases, item.get("cooldown", 0.0)))
+    return commands
+
+
+def default_commands():
+    return load_commands(VOICE_COMMANDS_FILE) if VOICE_COMMANDS_FILE else DEFAULT_COMMANDS
+
+
+class PhraseAutomaton:
+    """
+    Word-level Aho-Corasick automaton. Feeding one word costs amortised constant time
+    however many phrases are registered, and matches are whole words only.
+    """
+    def __init__(self, phrases):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        for words, value in phrases:
+            state = 0
+            for word in words:
+                if word not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                    self.goto[state][word] = len(self.goto) - 1
+                state = self.goto[state][word]
+            self.output[state].append(value)
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for word, child in self.goto[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and word not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(word, 0)
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    def step(self, state, word):
+        while state and word not in self.goto[state]:
+            state = self.fail[state]
+        return self.goto[state].get(word, 0)
+
+
+class CommandEngine:
+    """
+    Streams final transcripts through one automaton holding every command phrase.
+    Automaton state carries over between adjacent finals, so a phrase split across
+    two results still matches. Each command fires at most once per cooldown.
+    """
+    def __init__(self, commands=None, span_gap=SPAN_GAP_SECONDS):
+        self.commands = list(default_commands() if commands is None else commands)
+        self.automaton = PhraseAutomaton(
+            (tuple(tokenize(phrase)), (command, phrase))
+            for command in self.commands for phrase in command.phrases if tokenize(phrase)
+        )
+        self.span_gap = span_gap
+        self.state = 0
+        self.last_end = None
+        self.last_fired = {}
+
+    def reset(self):
+        self.state = 0
+        self.last_end = None
+
+    def feed(self, transcript, start=None, end=None):
+        """Match one final's text; `start`/`end` are session seconds. Returns [CommandMatch, ...]."""
+        if start is not None and self.last_end is not None and start - self.last_end > self.span_gap:
+            self.state = 0
+        at = end if end is not None else start
+        matches = []
+        for word in tokenize(transcript):
+            self.state = self.automaton.step(self.state, word)
+            for command, phrase in self.automaton.output[self.state]:
+                last = self.last_fired.get(command.name)
+                if last is not None and at is not None and at - last < command.cooldown:
+                    continue
+                self.last_fired[command.name] = at
+                matches.append(CommandMatch(command, phrase, at))
+        if end is not None:
+            self.last_end = end
+        return matches
@@ -0,0 +1,293 @@
+import os
+import time
+import shutil
+import socket
+import logging
+import itertools
+import threading
+import subprocess
+from selenium import webdriver
+from selenium.webdriver.edge.service import Service as EdgeService
+from selenium.webdriver.edge.options import Options
+
+logger = logging.getLogger(__name__)
+
+EDGE_BINARY = "/usr/bin/microsoft-edge"
+DRIVER_PATH = os.getenv("EDGE_DRIVER_PATH", "/usr/local/bin/msedgedriver")
+PROFILE_ROOT = os.getenv("DRIVER_POOL_PROFILE_ROOT", "/app/selenium_profile")
+DRIVER_POOL_MIN_IDLE = int(os.getenv("DRIVER_POOL_MIN_IDLE", "1"))
+DRIVER_POOL_MAX_IDLE = int(os.getenv("DRIVER_POOL_MAX_IDLE", "2"))
+DRIVER_POOL_MAX_USES = int(os.getenv("DRIVER_POOL_MAX_USES", "10"))
+REFILL_RETRY_DELAY = 30
+# Each pool slot's browser plays into its own PulseAudio null sink, so concurrent meetings
+# are recorded separately. entrypoint.sh creates the sinks, plus an ALSA capture device of
+# the same name on each sink's monitor for the transcriber to open.
+AUDIO_SINK_PREFIX = os.getenv("AUDIO_SINK_PREFIX", "meetscript_slot_")
+# Origins whose storage holds a Google sign-in; wiped on release so the next job
+# cannot inherit the previous job's account.
+SIGN_IN_ORIGINS = ("https://accounts.google.com", "https://meet.google.com", "https://www.google.com")
+
+_environment_logged = False
+
+
+def log_edge_environment(driver_path=DRIVER_PATH):
+    """Log driver/browser presence and version once per process rather than per launch."""
+    global _environment_logged
+    if _environment_logged:
+        return
+    _environment_logged = True
+    if os.path.exists(driver_path):
+        logger.info(f"msedgedriver found at {driver_path}")
+    else:
+        logger.error(f"msedgedriver NOT found at {driver_path}")
+    if os.path.exists(EDGE_BINARY):
+        logger.info(f"Microsoft Edge binary found at {EDGE_BINARY}")
+    else:
+        logger.error(f"Microsoft Edge binary NOT found at {EDGE_BINARY}")
+    try:
+        edge_version = subprocess.check_output([EDGE_BINARY, "--version"], text=True).strip()
+        logger.info(f"Microsoft Edge version: {edge_version}")
+    except Exception as ex:
+        logger.error(f"Failed to retrieve Microsoft Edge version: {ex}")
+
+
+def slot_audio_sink(slot):
+    return f"{AUDIO_SINK_PREFIX}{slot}"
+
+
+def free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def launch_edge_driver(driver_path=DRIVER_PATH, profile_dir=None, debug_port=None, audio_sink=None):
+    """
+    Start an Edge WebDriver with the MeetScript browser options.
+    Each browser gets its own debugging port (and optionally profile directory and
+    PulseAudio output sink) so several can run side by side.
+    """
+    debug_port = debug_port or free_port()
+    options = Options()
+    options.use_chromium = True
+    # Set binary_location to the Microsoft Edge browser binary, not the driver
+    options.binary_location = EDGE_BINARY
+
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument(f"--remote-debugging-port={debug_port}")
+    options.add_argument('--force-dark-mode')
+    options.add_argument("--disable-extensions")
+    options.add_argument("--window-size=1920,1080")
+    if profile_dir:
+        os.makedirs(profile_dir, exist_ok=True)
+        # A crashed browser leaves this behind and blocks the next launch on the profile.
+        lock_file = os.path.join(profile_dir, "SingletonLock")
+        if os.path.lexists(lock_file):
+            logger.info(f"Lock file found in profile directory: {lock_file}. Removing it.")
+            os.remove(lock_file)
+        options.add_argument(f"--user-data-dir={profile_dir}")
+
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    options.add_experimental_option("useAutomationExtension", False)
+    # Added option to disable notifications that might include microphone and camera prompts
+    options.add_argument("--disable-notifications")
+    # Automatically block microphone and camera permission pop-ups
+    options.add_experimental_option("prefs", {
+        "profile.managed_default_content_settings.media_stream_mic": 2,
+        "profile.managed_default_content_settings.media_stream_camera": 2,
+        "profile.default_content_setting_values.media_stream_mic": 2,
+        "profile.default_content_setting_values.media_stream_camera": 2,
+        "profile.default_content_setting_values.notifications": 2
+    })
+    logger.debug(f"Selenium Options arguments: {options.arguments}")
+
+    # The browser inherits the driver's environment; PULSE_SINK routes its audio output.
+    env = dict(os.environ, PULSE_SINK=audio_sink) if audio_sink else None
+    service = EdgeService(executable_path=driver_path, timeout=300, env=env)
+    logger.info(f"Creating Edge WebDriver instance on debugging port {debug_port}")
+    return webdriver.Edge(service=service, options=options)
+
+
+def wipe_profile(profile_dir):
+    """Delete a browser profile directory, and with it any signed-in Google account. Returns success."""
+    try:
+        shutil.rmtree(profile_dir)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning(f"Failed to delete browser profile {profile_dir}: {e}")
+        return False
+    return True
+
+
+class PooledDriver:
+    def __init__(self, driver, slot, profile_dir, debug_port, audio_sink=None):
+        self.driver = driver
+        self.slot = slot
+        self.profile_dir = profile_dir
+        self.debug_port = debug_port
+        self.audio_sink = audio_sink
+        self.uses = 0
+        self.created_at = time.time()
+
+    def is_healthy(self):
+        try:
+            return bool(self.driver.window_handles)
+        except Exception:
+            return False
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except Exception as e:
+            logger.warning(f"Error quitting pooled driver {self.slot}: {e}")
+
+
+class DriverPool:
+    """
+    Keeps `min_idle` Edge browsers launched and ready so joining a meeting does not
+    pay for a cold browser start. Drivers are health-checked on checkout, signed out
+    and reset on release, and retired after `max_uses` meetings.
+    All methods block and are meant to be called from a browser thread.
+    """
+    def __init__(self, driver_path=DRIVER_PATH, profile_root=PROFILE_ROOT, min_idle=DRIVER_POOL_MIN_IDLE,
+                 max_idle=DRIVER_POOL_MAX_IDLE, max_uses=DRIVER_POOL_MAX_USES):
+        self.driver_path = driver_path
+        self.profile_root = profile_root
+        self.min_idle = max(0, min_idle)
+        self.max_idle = max(self.min_idle, max_idle)
+        self.max_uses = max(1, max_uses)
+        self._idle = []
+        self._checked_out = set()
+        self._free_slots = []
+        self._slot_counter = itertools.count()
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._refill_thread = None
+
+    def start(self):
+        """Start the background thread that keeps `min_idle` browsers warm."""
+        if self.min_idle and self._refill_thread is None:
+            self._refill_thread = threading.Thread(target=self._refill_loop, name="driver-pool-refill", daemon=True)
+            self._refill_thread.start()
+
+    def stats(self):
+        with self._condition:
+            return {"idle": len(self._idle), "checked_out": len(self._checked_out), "min_idle": self.min_idle}
+
+    def checkout(self):
+        """Return a healthy PooledDriver, launching one if none is idle."""
+        while True:
+            with self._condition:
+                if self._stopped:
+                    raise RuntimeError("Driver pool has been shut down")
+                pooled = self._idle.pop() if self._idle else None
+                self._condition.notify_all()
+            if pooled is None:
+                pooled = self._launch()
+                break
+            if pooled.is_healthy():
+                break
+            logger.warning(f"Discarding unhealthy pooled driver {pooled.slot}.")
+            self._retire(pooled)
+        with self._condition:
+            self._checked_out.add(pooled)
+        logger.info(f"Checked out driver {pooled.slot} (use {pooled.uses + 1}/{self.max_uses}).")
+        return pooled
+
+    def release(self, pooled):
+        """Give a driver back after a meeting; it is reset, or retired if worn out or broken."""
+        with self._condition:
+            self._checked_out.discard(pooled)
+        pooled.uses += 1
+        if pooled.uses >= self.max_uses or self._stopped or not self._reset(pooled):
+            self._retire(pooled)
+            return
+        with self._condition:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(pooled)
+                logger.info(f"Returned driver {pooled.slot} to the pool.")
+                return
+        self._retire(pooled)
+
+    def shutdown(self):
+        with self._condition:
+            self._stopped = True
+            idle, self._idle = self._idle, []
+            self._condition.notify_all()
+        for pooled in idle:
+            pooled.quit()
+            wipe_profile(pooled.profile_dir)
+
+    def _launch(self):
+        log_edge_environment(self.driver_path)
+        with self._condition:
+            slot = self._free_slots.pop() if self._free_slots else next(self._slot_counter)
+        profile_dir = os.path.join(self.profile_root, f"slot-{slot}")
+        port = free_port()
+        try:
+            # Every launch starts from an empty profile, even one left over from before a restart.
+            if not wipe_profile(profile_dir):
+                raise RuntimeError(f"Cannot start browser slot {slot} with a stale profile")
+            driver = launch_edge_driver(self.driver_path, profile_dir, port, slot_audio_sink(slot))
+        except Exception:
+            with self._condition:
+                self._free_slots.append(slot)
+            raise
+        logger.info(f"Launched pooled driver {slot} (profile {profile_dir}, port {port}, sink {slot_audio_sink(slot)}).")
+        return PooledDriver(driver, slot, profile_dir, port, slot_audio_sink(slot))
+
+    def _retire(self, pooled):
+        pooled.quit()
+        wipe_profile(pooled.profile_dir)
+        with self._condition:
+            self._free_slots.append(pooled.slot)
+            self._condition.notify_all()
+        logger.info(f"Retired pooled driver {pooled.slot} after {pooled.uses} meetings.")
+
+    def _reset(self, pooled):
+        """
+        Close extra tabs, sign out by clearing cookies and site storage, and park the
+        browser on a blank page. Any job may check the driver out next, so nothing of
+        the previous account may survive.
+        """
+        try:
+            driver = pooled.driver
+            handles = driver.window_handles
+            for handle in handles[1:]:
+                driver.switch_to.window(handle)
+                driver.close()
+            driver.switch_to.window(handles[0])
+            driver.get("about:blank")
+            driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+            for origin in SIGN_IN_ORIGINS:
+                driver.execute_cdp_cmd("Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"})
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to reset pooled driver {pooled.slot}: {e}")
+            return False
+
+    def _refill_loop(self):
+        while True:
+            with self._condition:
+                while not self._stopped and len(self._idle) >= self.min_idle:
+                    self._condition.wait()
+                if self._stopped:
+                    return
+            try:
+                pooled = self._launch()
+            except Exception as e:
+                logger.error(f"Failed to pre-launch pooled driver: {e}")
+                time.sleep(REFILL_RETRY_DELAY)
+                continue
+            with self._condition:
+                if self._stopped:
+                    stale = pooled
+                else:
+                    self._idle.append(pooled)
+                    stale = None
+            if stale is not None:
+                stale.quit()
+                wipe_profile(stale.profile_dir)
@@ -9,6 +9,25 @@ if ! pgrep -x pulseaudio > /dev/null; then
   pactl load-module module-null-sink sink_name=VirtualSink
 fi
 
+# One null sink per browser slot so concurrent meetings never share audio. Each sink's
+# monitor is exposed to PyAudio as an ALSA capture device with the sink's name.
+AUDIO_SINK_PREFIX=${AUDIO_SINK_PREFIX:-meetscript_slot_}
+AUDIO_SLOTS=${AUDIO_SLOTS:-$(( ${MAX_CONCURRENT_MEETINGS:-4} + ${DRIVER_POOL_MAX_IDLE:-2} ))}
+: > ${HOME}/.asoundrc
+for slot in $(seq 0 $(( AUDIO_SLOTS - 1 ))); do
+  sink="${AUDIO_SINK_PREFIX}${slot}"
+  if ! pactl list short sinks | cut -f2 | grep -qx "${sink}"; then
+    pactl load-module module-null-sink sink_name="${sink}"
+  fi
+  cat >> ${HOME}/.asoundrc <<EOF
+pcm.${sink} {
+  type pulse
+  device "${sink}.monitor"
+  hint { show on description "Meeting audio of browser slot ${slot}" }
+}
+EOF
+done
+
 # Remove any existing Xvfb lock file for display :99 if it exists.
 if [ -f /tmp/.X99-lock ]; then
     echo "Removing existing Xvfb lock file..."
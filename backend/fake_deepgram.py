@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Deepgram streaming listen endpoint, for load tests and
+offline development. It accepts audio on /v1/listen, answers with scripted
+transcript lines and never calls Deepgram.
+
+    python fake_deepgram.py --port 8765 --script transcript.txt --latency 0.3
+    python realtime_stream.py -k local --host ws://127.0.0.1:8765
+
+Only the parts of the protocol RealTimeTranscriber consumes are implemented:
+Results messages (is_final, start, duration, channel.alternatives), a final
+Metadata message carrying created/duration, and CloseStream/Finalize/KeepAlive
+control messages. Every result also carries "audio_received_at", the wall-clock time the
+server received the end of that segment's audio, for end-to-end latency checks.
+With --drop-after, each connection is closed abnormally (1011) after that many
+seconds of audio, once its pending results are sent, to exercise reconnects.
+"""
+import os
+import json
+import time
+import uuid
+import random
+import asyncio
+import argparse
+from datetime import datetime, timezone
+from urllib.parse import urlparse, parse_qs
+import websockets
+
+DEFAULT_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "transcript.txt")
+BYTES_PER_SAMPLE = {"linear16": 2, "mulaw": 1, "alaw": 1}
+
+
+def load_script(path):
+    with open(path, encoding="utf-8") as f:
+        lines = [line.strip() for line in f if line.strip()]
+    return lines or ["hello world"]
+
+
+def build_result(request_id, transcript, start, duration, is_final, audio_received_at):
+    tokens = transcript.split()
+    step = duration / max(1, len(tokens))
+    words = [
+        {
+            "word": token.strip(".,?!").lower(),
+            "punctuated_word": token,
+            "start": round(start + i * step, 3),
+            "end": round(start + (i + 1) * step, 3),
+            "confidence": 0.99,
+        }
+        for i, token in enumerate(tokens)
+    ]
+    return {
+        "type": "Results",
+        "channel_index": [0, 1],
+        "start": round(start, 3),
+        "duration": round(duration, 3),
+        "is_final": is_final,
+        "speech_final": is_final,
+        "channel": {"alternatives": [{"transcript": transcript, "confidence": 0.99, "words": words}]},
+        "metadata": {"request_id": request_id},
+        "audio_received_at": audio_received_at,
+    }
+
+
+class FakeDeepgramSession:
+    """State for one websocket connection: audio position and the next scripted line."""
+    def __init__(self, ws, lines, segment_seconds, latency, jitter, interim):
+        self.ws = ws
+        self.lines = lines
+        self.segment_seconds = segment_seconds
+        self.latency = latency
+        self.jitter = jitter
+        self.interim = interim
+        self.request_id = str(uuid.uuid4())
+        query = parse_qs(urlparse(ws.path).query)
+        encoding = query.get("encoding", ["linear16"])[0]
+        sample_rate = int(query.get("sample_rate", ["16000"])[0])
+        channels = int(query.get("channels", ["1"])[0])
+        self.byte_rate = BYTES_PER_SAMPLE.get(encoding, 2) * sample_rate * channels
+        self.bytes_received = 0
+        self.next_segment = 0
+        self.segment_start = 0.0
+        self.interim_sent = False
+        self.pending = set()
+
+    @property
+    def audio_seconds(self):
+        return self.bytes_received / self.byte_rate
+
+    def line(self, index):
+        return self.lines[index % len(self.lines)]
+
+    def schedule(self, message):
+        delay = max(0.0, self.latency + random.uniform(-self.jitter, self.jitter))
+        task = asyncio.create_task(self._send_later(message, delay))
+        self.pending.add(task)
+        task.add_done_callback(self.pending.discard)
+
+    async def _send_later(self, message, delay):
+        if delay:
+            await asyncio.sleep(delay)
+        try:
+            await self.ws.send(json.dumps(message))
+        except websockets.exceptions.ConnectionClosed:
+            pass
+
+    def finalize_segment(self, duration, received_at):
+        self.schedule(build_result(self.request_id, self.line(self.next_segment), self.segment_start, duration, True, received_at))
+        self.next_segment += 1
+        self.segment_start += duration
+        self.interim_sent = False
+
+    def on_audio(self, chunk):
+        self.bytes_received += len(chunk)
+        now = time.time()
+        while self.audio_seconds >= self.segment_start + self.segment_seconds:
+            self.finalize_segment(self.segment_seconds, now)
+        elapsed = self.audio_seconds - self.segment_start
+        if self.interim and not self.interim_sent and elapsed >= self.segment_seconds / 2:
+            words = self.line(self.next_segment).split()
+            partial = " ".join(words[:max(1, len(words) // 2)])
+            self.schedule(build_result(self.request_id, partial, self.segment_start, elapsed, False, now))
+            self.interim_sent = True
+
+    def flush(self):
+        """Finalize the partially covered segment, as Deepgram does on Finalize and CloseStream."""
+        remainder = self.audio_seconds - self.segment_start
+        if remainder > 0.05:
+            self.finalize_segment(remainder, time.time())
+
+    async def finish(self):
+        """Flush the partially covered segment, wait for scheduled results, then send Metadata."""
+        self.flush()
+        if self.pending:
+            await asyncio.gather(*self.pending, return_exceptions=True)
+        await self.ws.send(json.dumps({
+            "type": "Metadata",
+            "request_id": self.request_id,
+            "created": datetime.now(timezone.utc).isoformat(),
+            "duration": round(self.audio_seconds, 3),
+            "channels": 1,
+        }))
+
+
+def make_handler(lines, segment_seconds, latency, jitter, interim, drop_after=None):
+    async def handler(ws):
+        session = FakeDeepgramSession(ws, lines, segment_seconds, latency, jitter, interim)
+        try:
+            async for message in ws:
+                if isinstance(message, bytes):
+                    if message:
+                        session.on_audio(message)
+                    if drop_after and session.audio_seconds >= drop_after:
+                        if session.pending:
+                            await asyncio.gather(*session.pending, return_exceptions=True)
+                        await ws.close(code=1011, reason="simulated drop")
+                        break
+                    continue
+                control = json.loads(message)
+                if control.get("type") == "CloseStream":
+                    await session.finish()
+                    break
+                if control.get("type") == "Finalize":
+                    session.flush()
+                # KeepAlive and anything else are accepted and ignored.
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        finally:
+            for task in list(session.pending):
+                task.cancel()
+    return handler
+
+
+async def serve(host="127.0.0.1", port=8765, script=DEFAULT_SCRIPT, segment_seconds=2.0, latency=0.3, jitter=0.0, interim=True,
+                drop_after=None):
+    """Start the server and return the websockets server object (close() it to stop)."""
+    handler = make_handler(load_script(script), segment_seconds, latency, jitter, interim, drop_after)
+    return await websockets.serve(
+        handler,
+        host,
+        port,
+        extra_headers=lambda path, headers: {"dg-request-id": str(uuid.uuid4())},
+        max_size=None,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local Deepgram listen-protocol stand-in.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--script", default=DEFAULT_SCRIPT, help="Text file with one transcript line per segment")
+    parser.add_argument("--segment-seconds", type=float, default=2.0, help="Seconds of audio per scripted line")
+    parser.add_argument("--latency", type=float, default=0.3, help="Seconds between receiving audio and answering")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random +/- seconds added to the latency")
+    parser.add_argument("--no-interim", action="store_true", help="Only send final results")
+    parser.add_argument("--drop-after", type=float, help="Drop each connection after this many seconds of audio")
+    args = parser.parse_args()
+
+    async def main():
+        server = await serve(args.host, args.port, args.script, args.segment_seconds, args.latency, args.jitter, not args.no_interim,
+                             args.drop_after)
+        print(f"🟢 Fake Deepgram listening on ws://{args.host}:{args.port}/v1/listen", flush=True)
+        await server.wait_closed()
+
+    asyncio.run(main())
@@ -0,0 +1,246 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+from collections import deque
+from metrics import REGISTRY
+
+# A chunk is uploaded once it holds this many words, or once its first line is this
+# many seconds old, whichever comes first.
+INGEST_CHUNK_WORDS = int(os.getenv("INGEST_CHUNK_WORDS", "150"))
+INGEST_MAX_DELAY_SECONDS = float(os.getenv("INGEST_MAX_DELAY_SECONDS", "15"))
+# Chunks sent per ingest call.
+INGEST_BATCH_SIZE = 20
+INGEST_ATTEMPTS = 5
+INGEST_RETRY_BASE_DELAY = 1.0
+
+INGEST_CHUNKS = REGISTRY.counter(
+    "meetscript_ingest_chunks_total",
+    "Transcript chunks handled by the ingestion pipeline (uploaded, duplicate or failed).",
+    ("result",),
+)
+
+
+def chunk_digest(text):
+    return hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+
+class Chunk:
+    """Consecutive transcript lines [line_start, line_end) of one session."""
+    def __init__(self, session_id, line_start, lines, start=None, end=None):
+        self.session_id = session_id
+        self.line_start = line_start
+        self.line_end = line_start + len(lines)
+        self.text = "\n".join(lines)
+        self.start = start
+        self.end = end
+        self.digest = chunk_digest(self.text)
+        self.status = None
+        self.done = asyncio.get_running_loop().create_future()
+
+    def finish(self, status):
+        self.status = status
+        INGEST_CHUNKS.inc(result=status)
+        if not self.done.done():
+            self.done.set_result(status)
+
+
+class IngestLedger:
+    """
+    What is already in the knowledge base: the digest of every uploaded chunk and, per
+    session, how many transcript lines are covered. Saved as one JSON file, replaced
+    atomically.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.digests = set()
+        self.lines = {}
+
+    def load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return self
+        self.digests = set(data.get("chunks", []))
+        self.lines = dict(data.get("lines", {}))
+        return self
+
+    def snapshot(self):
+        return {"chunks": sorted(self.digests), "lines": dict(self.lines)}
+
+    def save(self, data):
+        """Write a snapshot() taken on the event loop; safe to call from a worker thread."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(temp_path, self.path)
+
+    def record(self, chunk):
+        self.digests.add(chunk.digest)
+        # Only contiguous coverage counts, so a chunk that failed is re-read from the file later.
+        if self.lines.get(chunk.session_id, 0) == chunk.line_start:
+            self.lines[chunk.session_id] = chunk.line_end
+
+
+class _PendingChunk:
+    def __init__(self, line_start):
+        self.line_start = line_start
+        self.lines = []
+        self.words = 0
+        self.start = None
+        self.end = None
+        self.opened = time.monotonic()
+
+
+class IngestPipeline:
+    """
+    Streams transcript lines into the knowledge base while a meeting is running.
+    Lines are grouped per session into chunks. A background worker uploads closed
+    chunks in batches through `upload(chunks)`, skipping any chunk whose digest is
+    already in the ledger, so re-ingesting an unchanged transcript uploads nothing.
+    """
+    def __init__(self, upload, ledger, chunk_words=INGEST_CHUNK_WORDS, max_delay=INGEST_MAX_DELAY_SECONDS,
+                 batch_size=INGEST_BATCH_SIZE):
+        self.upload = upload
+        self.ledger = ledger
+        self.chunk_words = chunk_words
+        self.max_delay = max_delay
+        self.batch_size = batch_size
+        self.queue = deque()
+        self._pending = {}
+        self._consumed = {}
+        self._wakeup = asyncio.Event()
+        self._worker = None
+
+    def open(self):
+        self._worker = asyncio.create_task(self._run())
+        return self
+
+    def add(self, session_id, text, start=None, end=None):
+        """Append one transcript line (a final result) of `session_id`."""
+        pending = self._pending.get(session_id)
+        if pending is None:
+            line_start = self._consumed.get(session_id, self.ledger.lines.get(session_id, 0))
+            pending = self._pending[session_id] = _PendingChunk(line_start)
+        pending.lines.append(text)
+        pending.words += len(text.split())
+        if pending.start is None:
+            pending.start = start
+        pending.end = end
+        self._consumed[session_id] = pending.line_start + len(pending.lines)
+        if pending.words >= self.chunk_words:
+            self._close(session_id)
+
+    def add_result(self, session_id, res):
+        if not res.get("is_final"):
+            return
+        text = res.get("channel", {}).get("alternatives", [{}])[0].get("transcript", "")
+        if not text:
+            # Empty finals are not written to the transcript file either.
+            return
+        start = res.get("start")
+        self.add(session_id, text, start, start + res.get("duration", 0) if start is not None else None)
+
+    def result_listener(self, session_id):
+        """A RealTimeTranscriber result listener that ingests session `session_id`'s finals."""
+        return lambda res: self.add_result(session_id, res)
+
+    def _close(self, session_id):
+        pending = self._pending.pop(session_id, None)
+        if pending is None:
+            return None
+        chunk = Chunk(session_id, pending.line_start, pending.lines, pending.start, pending.end)
+        self.queue.append(chunk)
+        self._wakeup.set()
+        return chunk
+
+    def flush(self, session_id=None):
+        """Close the open chunk of `session_id` (or of every session) so it is uploaded now."""
+        for name in [session_id] if session_id is not None else list(self._pending):
+            self._close(name)
+
+    def forget(self, session_id):
+        """Drop the read position of a session that will not send more lines."""
+        if session_id not in self._pending:
+            self._consumed.pop(session_id, None)
+
+    async def ingest_file(self, path, session_id):
+        """
+        Ingest the lines of a transcript file that are not covered yet and wait for the
+        upload. Returns the chunks that were queued, each with its final status.
+        """
+        def _read():
+            with open(path, encoding="utf-8") as f:
+                return [line.rstrip("\n") for line in f]
+        lines = await asyncio.to_thread(_read)
+        consumed = self._consumed.get(session_id, self.ledger.lines.get(session_id, 0))
+        queued_before = len(self.queue)
+        for line in lines[consumed:]:
+            self.add(session_id, line)
+        self.flush(session_id)
+        chunks = [chunk for chunk in list(self.queue)[queued_before:] if chunk.session_id == session_id]
+        if chunks:
+            await asyncio.gather(*(asyncio.shield(chunk.done) for chunk in chunks))
+        return chunks
+
+    async def _run(self):
+        attempt = 0
+        while True:
+            if not self.queue:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=min(1.0, self.max_delay))
+                except asyncio.TimeoutError:
+                    pass
+                now = time.monotonic()
+                for session_id, pending in list(self._pending.items()):
+                    if now - pending.opened >= self.max_delay:
+                        self._close(session_id)
+                continue
+            batch = [self.queue[i] for i in range(min(self.batch_size, len(self.queue)))]
+            fresh, seen = [], set()
+            for chunk in batch:
+                if chunk.digest in self.ledger.digests or chunk.digest in seen:
+                    continue
+                seen.add(chunk.digest)
+                fresh.append(chunk)
+            try:
+                if fresh:
+                    await self.upload(fresh)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                attempt += 1
+                if attempt < INGEST_ATTEMPTS:
+                    delay = INGEST_RETRY_BASE_DELAY * 2 ** (attempt - 1)
+                    print(f"🔴 ERROR: Ingesting {len(fresh)} chunks failed ({e}); retrying in {delay:.0f}s.", flush=True)
+                    await asyncio.sleep(delay)
+                    continue
+                print(f"🔴 ERROR: Giving up on {len(fresh)} chunks after {attempt} attempts: {e}", flush=True)
+                for chunk in batch:
+                    self.queue.popleft()
+                    chunk.finish("failed")
+                    if chunk.session_id not in self._pending:
+                        # The next ingest_file() re-reads from the ledger's covered line count.
+                        self._consumed.pop(chunk.session_id, None)
+                attempt = 0
+                continue
+            attempt = 0
+            for chunk in batch:
+                self.queue.popleft()
+                self.ledger.record(chunk)
+                chunk.finish("uploaded" if chunk in fresh else "duplicate")
+            await asyncio.to_thread(self.ledger.save, self.ledger.snapshot())
+
+    async def close(self, timeout=30):
+        """Upload what is left (waiting at most `timeout` seconds), then stop the worker."""
+        self.flush()
+        pending = [asyncio.shield(chunk.done) for chunk in self.queue]
+        if pending and self._worker is not None:
+            await asyncio.wait(pending, timeout=timeout)
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
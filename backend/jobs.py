@@ -0,0 +1,198 @@
+import os
+import time
+import uuid
+import asyncio
+import logging
+from collections import deque
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+MAX_CONCURRENT_MEETINGS = int(os.getenv("MAX_CONCURRENT_MEETINGS", "4"))
+# Finished jobs kept for the status endpoints; older ones are forgotten, oldest first.
+MAX_FINISHED_JOBS = int(os.getenv("MAX_FINISHED_JOBS", "500"))
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED_STATES = (COMPLETED, FAILED, CANCELLED)
+
+JOBS_FINISHED = REGISTRY.counter("meetscript_jobs_finished_total", "Transcription jobs by final status.", ("status",))
+
+
+class TranscriptionJob:
+    """
+    A single background transcription request and its lifecycle state.
+    Only non-secret request fields should be passed as `params`, since they are
+    returned verbatim by the status endpoints.
+    """
+    def __init__(self, runner, params=None):
+        self.job_id = uuid.uuid4().hex
+        self.runner = runner
+        self.params = params or {}
+        self.status = QUEUED
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self.task = None
+        # Per-phase timing breakdown, filled in by the runner's PhaseTimer.
+        self.timings = {}
+
+    def to_dict(self, queue_position=None):
+        data = {
+            "job_id": self.job_id,
+            "status": self.status,
+            "params": self.params,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result": self.result,
+            "error": self.error,
+            "timings": self.timings,
+        }
+        if queue_position is not None:
+            data["queue_position"] = queue_position
+        return data
+
+
+class JobManager:
+    """
+    Runs transcription jobs in the background with a cap on how many run at once.
+    Jobs submitted beyond the cap wait in a FIFO queue and are started as running
+    jobs finish, so request handlers only ever pay for `submit()`. Only the last
+    `max_finished` finished jobs are kept.
+    """
+    def __init__(self, max_concurrent=MAX_CONCURRENT_MEETINGS, max_finished=MAX_FINISHED_JOBS):
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_finished = max(0, max_finished)
+        self.jobs = {}
+        self._queue = deque()
+        self._running = set()
+        self._finished = deque()
+        self._finish_listeners = []
+        self._evict_listeners = []
+
+    def submit(self, runner, params=None):
+        """
+        Register a job. `runner` is an async callable taking the job and returning
+        a JSON-serialisable result; it is not awaited until a slot is free.
+        """
+        job = TranscriptionJob(runner, params)
+        self.jobs[job.job_id] = job
+        self._queue.append(job)
+        logger.info(f"Job {job.job_id} queued ({len(self._queue)} waiting, {len(self._running)} running).")
+        self._dispatch()
+        return job
+
+    def add_finish_listener(self, callback):
+        """Register callback(job), called once when a job reaches a finished state."""
+        self._finish_listeners.append(callback)
+
+    def add_evict_listener(self, callback):
+        """Register callback(job), called when a finished job is forgotten to make room."""
+        self._evict_listeners.append(callback)
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def queue_position(self, job):
+        try:
+            return self._queue.index(job) + 1
+        except ValueError:
+            return None
+
+    def describe(self, job):
+        return job.to_dict(queue_position=self.queue_position(job))
+
+    def list(self, status=None):
+        return [
+            self.describe(job)
+            for job in self.jobs.values()
+            if status is None or job.status == status
+        ]
+
+    def cancel(self, job_id):
+        """Cancel a queued or running job. Returns the job, or None if unknown."""
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        if job.status == QUEUED:
+            self._queue.remove(job)
+            self._finish(job, CANCELLED)
+            logger.info(f"Job {job_id} cancelled before start.")
+        elif job.status == RUNNING and job.task is not None:
+            job.task.cancel()
+            logger.info(f"Cancellation requested for running job {job_id}.")
+        return job
+
+    async def shutdown(self):
+        """Cancel everything and wait for running jobs to unwind."""
+        while self._queue:
+            self._finish(self._queue.popleft(), CANCELLED)
+        tasks = [job.task for job in self._running if job.task is not None]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    @property
+    def running_count(self):
+        return len(self._running)
+
+    @property
+    def queued_count(self):
+        return len(self._queue)
+
+    def _dispatch(self):
+        while self._queue and len(self._running) < self.max_concurrent:
+            job = self._queue.popleft()
+            job.status = RUNNING
+            job.started_at = time.time()
+            self._running.add(job)
+            job.task = asyncio.create_task(job.runner(job))
+            job.task.add_done_callback(lambda task, job=job: self._on_done(job, task))
+            logger.info(f"Job {job.job_id} started.")
+
+    def _on_done(self, job, task):
+        # A done callback also fires for tasks cancelled before their first step,
+        # which a try/except inside the coroutine would never see.
+        if task.cancelled():
+            self._finish(job, CANCELLED)
+            logger.info(f"Job {job.job_id} cancelled.")
+        elif task.exception() is not None:
+            e = task.exception()
+            job.error = str(e)
+            self._finish(job, FAILED)
+            logger.error(f"Job {job.job_id} failed: {e}", exc_info=e)
+        else:
+            job.result = task.result()
+            self._finish(job, COMPLETED)
+            logger.info(f"Job {job.job_id} completed.")
+        self._running.discard(job)
+        self._dispatch()
+
+    def _finish(self, job, status):
+        job.status = status
+        job.finished_at = time.time()
+        JOBS_FINISHED.inc(status=status)
+        for callback in self._finish_listeners:
+            try:
+                callback(job)
+            except Exception as e:
+                logger.error(f"Finish listener failed for job {job.job_id}: {e}", exc_info=True)
+        self._finished.append(job)
+        while len(self._finished) > self.max_finished:
+            self._evict(self._finished.popleft())
+
+    def _evict(self, job):
+        self.jobs.pop(job.job_id, None)
+        for callback in self._evict_listeners:
+            try:
+                callback(job)
+            except Exception as e:
+                logger.error(f"Evict listener failed for job {job.job_id}: {e}", exc_info=True)
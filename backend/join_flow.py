@@ -0,0 +1,112 @@
+import time
+
+POLL_INTERVAL = 0.2
+
+# Page states, in the priority order used when several probes match at once.
+DENIED = "denied"
+IN_CALL = "in_call"
+LOBBY = "lobby"
+MEDIA_PROMPT = "media_prompt"
+PASSWORD_INPUT = "password_input"
+EMAIL_INPUT = "email_input"
+SIGN_IN = "sign_in"
+ASK_TO_JOIN = "ask_to_join"
+JOIN_NOW = "join_now"
+LOADING = "loading"
+
+PROBES = {
+    DENIED: "//*[contains(text(), \"You can't join this call\")]",
+    IN_CALL: "//button[contains(@aria-label, 'Leave call')]",
+    LOBBY: "//*[contains(text(), 'Asking to be let in') or contains(text(), 'someone lets you in')]",
+    MEDIA_PROMPT: "//*[contains(text(), 'Continue without') or contains(text(), \"Don't allow\") or contains(text(), 'Cancel')]",
+    PASSWORD_INPUT: "//input[@type='password']",
+    EMAIL_INPUT: "//input[@id='identifierId']",
+    SIGN_IN: "//span[contains(text(), 'Sign in')] | //div[contains(@aria-label, 'Sign in')] | //div[contains(@class, 'sign-in')]//button",
+    ASK_TO_JOIN: "//span[contains(text(), 'Ask to join')]",
+    JOIN_NOW: "//span[contains(text(), 'Join now')]",
+}
+
+# Evaluates every probe in the page and returns the first visible match for each,
+# so classifying the page costs one WebDriver round trip.
+PROBE_SCRIPT = """
+const probes = arguments[0];
+const isVisible = (el) => {
+  const rect = el.getBoundingClientRect();
+  const style = window.getComputedStyle(el);
+  return rect.width > 0 && rect.height > 0 && style.visibility !== 'hidden' && style.display !== 'none';
+};
+const found = {};
+for (const [name, xpath] of Object.entries(probes)) {
+  found[name] = null;
+  const snapshot = document.evaluate(xpath, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+  for (let i = 0; i < snapshot.snapshotLength; i++) {
+    const el = snapshot.snapshotItem(i);
+    if (el.nodeType === 1 && isVisible(el)) {
+      found[name] = el;
+      break;
+    }
+  }
+}
+return found;
+"""
+
+JOINED_STATES = (IN_CALL, LOBBY)
+
+
+class MeetPage:
+    """
+    Classifies the current Meet / Google sign-in page and waits for state changes
+    by polling a single probe script, instead of sleeping for fixed delays.
+    """
+    def __init__(self, driver, logger, poll_interval=POLL_INTERVAL):
+        self.driver = driver
+        self.logger = logger
+        self.poll_interval = poll_interval
+
+    def probe(self):
+        """Return (state, elements) for the page as it is right now."""
+        try:
+            elements = self.driver.execute_script(PROBE_SCRIPT, PROBES) or {}
+        except Exception as e:
+            self.logger.debug(f"Page probe failed: {e}")
+            return LOADING, {}
+        for state in PROBES:
+            if elements.get(state) is not None:
+                return state, elements
+        return LOADING, elements
+
+    def dismiss_media_prompt(self, elements=None):
+        """Click the media permissions dismiss button if it is currently shown."""
+        if elements is None:
+            _, elements = self.probe()
+        button = elements.get(MEDIA_PROMPT)
+        if button is None:
+            return False
+        try:
+            button.click()
+            self.logger.info("Dismissed media permissions prompt.")
+            return True
+        except Exception as e:
+            self.logger.info(f"Failed to dismiss media permissions prompt: {e}")
+            return False
+
+    def wait_for(self, states, timeout):
+        """
+        Poll until the page reaches one of `states`, dismissing media prompts on the way
+        unless they are waited for explicitly. Returns (state, elements), or
+        (None, elements) on timeout.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            state, elements = self.probe()
+            # A visible target wins over higher-priority states, so we never click a stray
+            # 'Cancel' while the button we want is already on screen.
+            for wanted in PROBES:
+                if wanted in states and elements.get(wanted) is not None:
+                    return wanted, elements
+            if state == DENIED or time.monotonic() >= deadline:
+                return None, elements
+            if state == MEDIA_PROMPT and self.dismiss_media_prompt(elements):
+                # Re-classify straight away; the prompt may have been hiding the target.
+                continue
+            time.sleep(self.poll_interval)
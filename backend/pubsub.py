@@ -0,0 +1,165 @@
+import json
+import asyncio
+from collections import deque, OrderedDict
+from metrics import REGISTRY
+
+# Events retained per session for late joiners, and queued per subscriber before the
+# oldest are dropped.
+HUB_HISTORY_SIZE = 2000
+HUB_QUEUE_SIZE = 256
+# Finished sessions kept around so their transcript can still be replayed.
+HUB_RETAIN_CLOSED = 32
+
+EVENTS_PUBLISHED = REGISTRY.counter("meetscript_hub_events_published_total", "Transcript events published to the live hub.")
+EVENTS_DROPPED = REGISTRY.counter(
+    "meetscript_hub_events_dropped_total",
+    "Transcript events dropped from slow subscribers' queues.",
+)
+
+
+class Subscription:
+    """
+    One subscriber's view of a session: replayed history first, then live events from a
+    bounded queue. When the queue is full the oldest event is dropped, so a slow
+    consumer only ever loses its own backlog and never blocks the publisher.
+    """
+    def __init__(self, topic, replay, maxsize):
+        self.topic = topic
+        self.replay = deque(replay)
+        self.events = deque()
+        self.maxsize = maxsize
+        self.dropped = 0
+        self.closed = False
+        self._ready = asyncio.Event()
+
+    def push(self, event):
+        if len(self.events) >= self.maxsize:
+            self.events.popleft()
+            self.dropped += 1
+            EVENTS_DROPPED.inc()
+        self.events.append(event)
+        self._ready.set()
+
+    def close(self):
+        self.closed = True
+        self._ready.set()
+
+    async def get(self, timeout=None):
+        """
+        Return the next (offset, data) event, or None when `timeout` passes or the
+        session has ended and everything has been delivered.
+        """
+        while True:
+            if self.replay:
+                return self.replay.popleft()
+            if self.events:
+                return self.events.popleft()
+            if self.closed:
+                return None
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+
+
+class Topic:
+    def __init__(self, name, history_size):
+        self.name = name
+        self.history = deque(maxlen=history_size)
+        self.subscribers = set()
+        self.next_offset = 0
+        self.closed = False
+
+
+class TranscriptHub:
+    """
+    Fans a session's transcript events out to any number of live subscribers.
+    publish() serialises each event once and appends it to every subscriber's queue,
+    so its cost does not depend on how fast viewers read. Must be used from the event
+    loop thread.
+    """
+    def __init__(self, history_size=HUB_HISTORY_SIZE, queue_size=HUB_QUEUE_SIZE, retain_closed=HUB_RETAIN_CLOSED):
+        self.history_size = history_size
+        self.queue_size = queue_size
+        self.retain_closed = retain_closed
+        self._topics = {}
+        self._closed = OrderedDict()
+
+    def topic(self, name):
+        topic = self._topics.get(name)
+        if topic is None:
+            topic = self._topics[name] = Topic(name, self.history_size)
+        return topic
+
+    @property
+    def subscriber_count(self):
+        return sum(len(topic.subscribers) for topic in self._topics.values())
+
+    def publish(self, name, payload):
+        """Publish a JSON-serialisable event; returns its offset within the session."""
+        topic = self.topic(name)
+        if topic.closed:
+            return None
+        offset = topic.next_offset
+        topic.next_offset += 1
+        event = (offset, json.dumps(dict(payload, offset=offset)))
+        topic.history.append(event)
+        for subscription in topic.subscribers:
+            subscription.push(event)
+        EVENTS_PUBLISHED.inc()
+        return offset
+
+    def publish_result(self, name, res):
+        alternative = res.get("channel", {}).get("alternatives", [{}])[0]
+        return self.publish(name, {
+            "type": "final" if res.get("is_final") else "interim",
+            "start": res.get("start"),
+            "duration": res.get("duration"),
+            "transcript": alternative.get("transcript", ""),
+            "speech_final": res.get("speech_final", False),
+        })
+
+    def result_listener(self, name):
+        """A RealTimeTranscriber result listener that publishes to session `name`."""
+        return lambda res: self.publish_result(name, res)
+
+    def subscribe(self, name, from_offset=None):
+        """
+        Subscribe to session `name`. With `from_offset`, retained events from that
+        offset on are replayed before live ones; otherwise only new events arrive.
+        """
+        topic = self.topic(name)
+        replay = [event for event in topic.history if event[0] >= from_offset] if from_offset is not None else []
+        subscription = Subscription(topic, replay, self.queue_size)
+        if topic.closed:
+            subscription.close()
+        else:
+            topic.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        subscription.topic.subscribers.discard(subscription)
+
+    def discard(self, name):
+        """Forget a session's retained events."""
+        topic = self._topics.pop(name, None)
+        self._closed.pop(name, None)
+        if topic is not None:
+            for subscription in topic.subscribers:
+                subscription.close()
+
+    def close(self, name, status="completed"):
+        """Publish the end-of-session event and release the session's subscribers."""
+        topic = self.topic(name)
+        if topic.closed:
+            return
+        self.publish(name, {"type": "end", "status": status})
+        topic.closed = True
+        for subscription in topic.subscribers:
+            subscription.close()
+        topic.subscribers.clear()
+        self._closed[name] = topic
+        while len(self._closed) > self.retain_closed:
+            evicted, _ = self._closed.popitem(last=False)
+            self._topics.pop(evicted, None)
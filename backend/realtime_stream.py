@@ -33,24 +33,59 @@ import argparse
 import aiohttp
 import json
 import os
-import wave
+import time
+import random
+import uuid
 import websockets
 from datetime import datetime
+from audio_capture import AudioRingBuffer, StreamingWavWriter
+from transcript_sink import TranscriptSink
+from subtitles import SUBTITLE_FORMATS, SubtitleWriter, subtitle_time_formatter
+from word_timeline import WordTimeline
+from audio_source import WavSource, PACING_MODES, REALTIME
+from metrics import REGISTRY, PhaseTimer
+from vad import VoiceActivityGate, SentAudioMap
+from codec import ENCODINGS, LINEAR16, MULAW, mulaw_encode
+from commands import CommandEngine, STOP, BOOKMARK, ACTION_ITEM, INGEST
 
-# Global configuration and state.
-startTime = datetime.now()
-all_mic_data = []
-all_transcripts = []
-
-transcript_file_name = os.path.join(os.path.curdir, "transcript.txt")
-
+# Global configuration. All per-session state lives on RealTimeTranscriber.
 FORMAT = pyaudio.paInt16
 CHANNELS = 1
 RATE = 16000
 CHUNK = 8000
-audio_queue = asyncio.Queue()
 REALTIME_RESOLUTION = 0.1
-subtitle_line_counter = 0
+FAST_CHUNK_SECONDS = 1.0
+STREAM_CHUNK_BYTES = 64 * 1024
+SAMPLE_SIZE = pyaudio.get_sample_size(FORMAT)
+# Seconds of recent mic audio kept in memory; everything else is streamed to disk.
+AUDIO_RING_SECONDS = 30
+# Seconds without audio before a KeepAlive is sent on the open connection.
+KEEPALIVE_INTERVAL = 5
+RECONNECT_ATTEMPTS = 8
+RECONNECT_BASE_DELAY = 0.5
+RECONNECT_MAX_DELAY = 15
+RESUMABLE_METHODS = ("mic", "wav")
+
+STREAM_RECONNECTS = REGISTRY.counter("meetscript_stream_reconnects_total", "Deepgram connections re-established mid-session.")
+STREAM_RECOVERY_SECONDS = REGISTRY.histogram(
+    "meetscript_stream_recovery_seconds",
+    "Time from losing the Deepgram connection until streaming resumed.",
+)
+STREAM_LOST_AUDIO_SECONDS = REGISTRY.counter(
+    "meetscript_stream_lost_audio_seconds_total",
+    "Seconds of mic audio dropped because they left the ring buffer before a reconnect.",
+)
+AUDIO_SENT_BYTES = REGISTRY.counter(
+    "meetscript_audio_sent_bytes_total",
+    "Audio payload bytes sent to Deepgram, by uplink encoding.",
+    ("encoding",),
+)
+VAD_SKIPPED_SECONDS = REGISTRY.counter(
+    "meetscript_vad_skipped_audio_seconds_total",
+    "Seconds of silent mic audio the voice activity gate kept from Deepgram.",
+)
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.curdir, "data"))
 
 def log_audio_devices():
     pa = pyaudio.PyAudio()
@@ -66,224 +101,46 @@ def log_audio_devices():
         print("WARNING: No audio devices available!",flush=True)
     pa.terminate()
 
-# Log available audio devices.
-log_audio_devices()
-
-# Initialize PyAudio and open the input stream.
-audio = pyaudio.PyAudio()
-try:
-    stream = audio.open(
-        format=FORMAT,
-        channels=CHANNELS,
-        rate=RATE,
-        input=True,
-        frames_per_buffer=CHUNK,
-        stream_callback=lambda in_data, frame_count, time_info, status: (in_data, pyaudio.paContinue)
-    )
-    stream.start_stream()
-    print("Audio stream initialized successfully.",flush=True)
-except Exception as e:
-    print(f"ERROR initializing audio stream: {e}",flush=True)
-
-def close_audio_stream():
-    global stream, audio
-    try:
-        if stream is not None:
-            stream.stop_stream()
-            stream.close()
-        if audio is not None:
-            audio.terminate()
-        print("Audio stream closed and PyAudio terminated.", flush=True)
-    except Exception as e:
-        print(f"Error closing audio stream: {e}", flush=True)
-
-def subtitle_time_formatter(seconds, separator):
-    hours = int(seconds // 3600)
-    minutes = int((seconds % 3600) // 60)
-    secs = int(seconds % 60)
-    millis = int((seconds - int(seconds)) * 1000)
-    return f"{hours:02}:{minutes:02}:{secs:02}{separator}{millis:03}"
-
-def subtitle_formatter(response, output_format):
-    global subtitle_line_counter
-    subtitle_line_counter += 1
-    start = response["start"]
-    end = start + response["duration"]
-    transcript = response.get("channel", {}).get("alternatives", [{}])[0].get("transcript", "")
-    separator = "," if output_format == "srt" else '.'
-    prefix = "- " if output_format == "vtt" else ""
-    subtitle_string = (
-        f"{subtitle_line_counter}\n"
-        f"{subtitle_time_formatter(start, separator)} --> {subtitle_time_formatter(end, separator)}\n"
-        f"{prefix}{transcript}\n\n"
-    )
-    return subtitle_string
+def remap_result(response, to_session):
+    """Return a copy of a Results message with its start, duration and word times passed through `to_session`."""
+    remapped = dict(response)
+    start = response.get("start", 0)
+    remapped["start"] = to_session(start)
+    if "duration" in response:
+        remapped["duration"] = to_session(start + response["duration"]) - remapped["start"]
+    channel = response.get("channel")
+    if channel:
+        alternatives = []
+        for alternative in channel.get("alternatives", []):
+            alternative = dict(alternative)
+            if alternative.get("words"):
+                alternative["words"] = [
+                    dict(word, start=to_session(word["start"]), end=to_session(word["end"])) for word in alternative["words"]
+                ]
+            alternatives.append(alternative)
+        remapped["channel"] = dict(channel, alternatives=alternatives)
+    return remapped
 
-def mic_callback(input_data, frame_count, time_info, status_flag):
-    audio_queue.put_nowait(input_data)
-    return (input_data, pyaudio.paContinue)
+def find_input_device(audio, name):
+    """Index of the PyAudio input device called `name`, or None."""
+    for index in range(audio.get_device_count()):
+        info = audio.get_device_info_by_index(index)
+        if info.get("name") == name and info.get("maxInputChannels", 0) > 0:
+            return index
+    return None
 
-async def run(key, method, output_format, **kwargs):
-    deepgram_url = f'{kwargs["host"]}/v1/listen?punctuate=true'
-    if kwargs.get("model"):
-        deepgram_url += f"&model={kwargs['model']}"
-    if kwargs.get("tier"):
-        deepgram_url += f"&tier={kwargs['tier']}"
-    if method == "mic":
-        deepgram_url += "&encoding=linear16&sample_rate=16000"
-    elif method == "wav":
-        data = kwargs["data"]
-        deepgram_url += f'&channels={kwargs["channels"]}&sample_rate={kwargs["sample_rate"]}&encoding=linear16'
-    try:
-        async with websockets.connect(deepgram_url, extra_headers={"Authorization": f"Token {key}"}) as ws:
-            print(f'ℹ️  Request ID: {ws.response_headers.get("dg-request-id")}')
-            if kwargs.get("model"):
-                print(f'ℹ️  Model: {kwargs["model"]}')
-            if kwargs.get("tier"):
-                print(f'ℹ️  Tier: {kwargs["tier"]}')
-            print("🟢 (1/5) Successfully opened Deepgram streaming connection",flush=True)
-    
-            async def sender(ws):
-                print(
-                    f'🟢 (2/5) Ready to stream {"mic" if method=="mic" else kwargs.get("filepath", "audio")} audio to Deepgram' +
-                    (". Speak into your microphone to transcribe." if method=="mic" else ""),flush=True
-                )
-                if method == "mic":
-                    try:
-                        while True:
-                            mic_data = await audio_queue.get()
-                            all_mic_data.append(mic_data)
-                            await ws.send(mic_data)
-                    except websockets.exceptions.ConnectionClosedOK:
-                        await ws.send(json.dumps({"type": "CloseStream"}))
-                        ("🟢 (5/5) Successfully closed Deepgram connection, waiting for final transcripts if necessary")
-                    except Exception as e:
-                        print(f"Error while sending: {str(e)}",flush=True)
-                        raise
-                elif method == "url":
-                    async with aiohttp.ClientSession() as session:
-                        async with session.get(kwargs["url"]) as audio:
-                            while True:
-                                remote_url_data = await audio.content.readany()
-                                await ws.send(remote_url_data)
-                                if not remote_url_data:
-                                    break
-                elif method == "wav":
-                    nonlocal data
-                    byte_rate = (kwargs["sample_width"] * kwargs["sample_rate"] * kwargs["channels"])
-                    chunk_size = int(byte_rate * REALTIME_RESOLUTION)
-                    try:
-                        while len(data):
-                            chunk, data = data[:chunk_size], data[chunk_size:]
-                            await asyncio.sleep(REALTIME_RESOLUTION)
-                            await ws.send(chunk)
-                        await ws.send(json.dumps({"type": "CloseStream"}))
-                        print("🟢 (5/5) Successfully closed Deepgram connection, waiting for final transcripts if necessary",flush=True)
-                    except Exception as e:
-                        print(f"🔴 ERROR: Something happened while sending, {e}",flush=True)
-                        raise e
-                return
-
-            async def receiver(ws):
-                first_message = True
-                first_transcript = True
-                transcript = ""
-                termination_event = kwargs.get("termination_event")
-                async for msg in ws:
-                    res = json.loads(msg)
-                    if first_message:
-                        print("🟢 (3/5) Successfully receiving Deepgram messages, waiting for finalized transcription...",flush=True)
-                        first_message = False
-                    try:
-                        if res.get("msg"):
-                            print(res["msg"],flush=True)
-                        if res.get("is_final"):
-                            transcript = res.get("channel", {}).get("alternatives", [{}])[0].get("transcript", "")
-                            #if kwargs.get("timestamps"):
-                                #words = res.get("channel", {}).get("alternatives", [{}])[0].get("words", [])
-                                #start = words[0]["start"] if words else None
-                                #end = words[-1]["end"] if words else None
-                                #transcript += f" [{start} - {end}]" if (start and end) else ""
-                            if transcript != "":
-                                if first_transcript:
-                                    print("🟢 (4/5) Began receiving transcription",flush=True)
-                                    if output_format == "vtt":
-                                        print("WEBVTT\n",flush=True)
-                                    with open(transcript_file_name, "w") as transcript_file:
-                                        transcript_file.write(transcript + "\n")    
-                                        first_transcript = False
-                                else:
-
-                                    if output_format in ("vtt", "srt"):
-                                        transcript = subtitle_formatter(res, output_format)
-                                    print(transcript,flush=True)
-                                    all_transcripts.append(transcript)
-                                    with open(transcript_file_name,"a") as transcript_file:
-                                        transcript_file.write(transcript + "\n")
-
-                            if method == "mic" and "goodbye" in transcript.lower():
-                                await ws.send(json.dumps({"type": "CloseStream"}))
-                                if termination_event:
-                                    termination_event.set()   # <-- Set the termination signal
-                                print("🟢 (5/5) Successfully closed Deepgram connection, waiting for final transcripts if necessary", flush=True)
-                                await ws.close()  # Explicitly close the websocket.
-                                break
-                        if res.get("created"):
-                            if output_format in ("vtt", "srt"):
-                                data_dir = os.path.abspath(os.path.join(os.path.curdir, "data"))
-                                if not os.path.exists(data_dir):
-                                    os.makedirs(data_dir)
-                                transcript_file_path = os.path.join(data_dir, f"{startTime.strftime('%Y%m%d%H%M')}.{output_format}")
-                                with open(transcript_file_path, "w") as f:
-                                    f.write("".join(all_transcripts))
-                                print(f"🟢 Subtitles saved to {transcript_file_path}")
-                                if method == "mic":
-                                    wave_file_path = os.path.join(data_dir, f"{startTime.strftime('%Y%m%d%H%M')}.wav")
-                                    wave_file = wave.open(wave_file_path, "wb")
-                                    wave_file.setnchannels(CHANNELS)
-                                    wave_file.setsampwidth(SAMPLE_SIZE)
-                                    wave_file.setframerate(RATE)
-                                    wave_file.writeframes(b"".join(all_mic_data))
-                                    wave_file.close()
-                                    print(f"🟢 Mic audio saved to {wave_file_path}",flush=True)
-                            print(f'🟢 Request finished with a duration of {res["duration"]} seconds. Exiting!',flush=True)
-                    except KeyError:
-                        print(f"🔴 ERROR: Received unexpected API response! {msg}")
-    
-            async def microphone():
-                audio = pyaudio.PyAudio()
-                stream = audio.open(
-                    format=FORMAT,
-                    channels=CHANNELS,
-                    rate=RATE,
-                    input=True,
-                    frames_per_buffer=CHUNK,
-                    stream_callback=mic_callback,
-                )
-                stream.start_stream()
-                global SAMPLE_SIZE
-                SAMPLE_SIZE = audio.get_sample_size(FORMAT)
-                while stream.is_active():
-                    await asyncio.sleep(0.1)
-                stream.stop_stream()
-                stream.close()
-    
-            functions = [
-                asyncio.ensure_future(sender(ws)),
-                asyncio.ensure_future(receiver(ws)),
-            ]
-            if method == "mic":
-                functions.append(asyncio.ensure_future(microphone()))
-            await asyncio.gather(*functions)
-    except websockets.exceptions.InvalidStatusCode as e:
-         print(f'🔴 ERROR: Could not connect to Deepgram! {e}')
-         return
-    except Exception as e:
-         print(f'🔴 ERROR: {e}')
-         return
+def rebase_result(response, offset):
+    """Return a copy of a Results message with its start and word times shifted by `offset` seconds."""
+    return remap_result(response, lambda seconds: seconds + offset)
 
 class RealTimeTranscriber:
-    def __init__(self, api_key, host="wss://api.deepgram.com", output_format="text", model=None, tier=None, timestamps=False):
+    """
+    One transcription session. Each instance owns its audio queue, buffers, subtitle
+    counter, output paths and PyAudio handle, so several can run in one process.
+    """
+    def __init__(self, api_key, host="wss://api.deepgram.com", output_format="text", model=None, tier=None, timestamps=False,
+                 session_id=None, output_dir=DATA_DIR, transcript_path=None, record_audio=None, phase_timer=None, vad=True,
+                 encoding=LINEAR16, commands=None, word_timeline=None, audio_device=None):
         self.api_key = api_key
         self.host = host
         self.output_format = output_format
@@ -293,21 +150,490 @@ class RealTimeTranscriber:
         self.task = None
         self.running = False
         self.termination_event = asyncio.Event()
+        self.phase_timer = phase_timer or PhaseTimer()
+        self.result_listeners = []
+        self.error = None
+
+        # Per-session state.
+        self.session_id = session_id or uuid.uuid4().hex
+        self.start_time = datetime.now()
+        self.output_dir = output_dir
+        self.transcript_path = transcript_path or os.path.join(output_dir, f"{self.session_id}.txt")
+        self.audio_queue = asyncio.Queue()
+        self.audio_ring = AudioRingBuffer(AUDIO_RING_SECONDS * RATE * CHANNELS * SAMPLE_SIZE)
+        # Mic audio is recorded alongside subtitle output unless asked for explicitly.
+        self.record_audio = output_format in ("vtt", "srt") if record_audio is None else record_audio
+        self.recorder = None
+        self.transcript_sink = None
+        # Subtitle cues are streamed to <session>.srt/.vtt as finals arrive.
+        self.subtitle_writer = None
+        self.word_timeline = word_timeline if word_timeline is not None else WordTimeline()
+        # Name of the PyAudio input device to record mic sessions from; None means the default input.
+        self.audio_device = audio_device
+        self.audio = None
+        self.stream = None
+        # Absolute audio byte offsets: where the current connection's audio starts, and
+        # how far final results have covered. A reconnect resumes from the latter.
+        self.connection_offset = 0
+        self.finalized_offset = 0
+        self.audio_available = asyncio.Event()
+        self.last_send = 0.0
+        self.reconnects = 0
+        self.lost_audio_seconds = 0.0
+        # Mic audio passes through the voice activity gate; silence is skipped and the
+        # sent-audio map puts Deepgram's timestamps back on the session clock.
+        self.vad_gate = VoiceActivityGate(RATE, CHANNELS) if vad else None
+        self.sent_map = SentAudioMap()
+        self.skipped_audio_seconds = 0.0
+        # Highest session byte offset sent on any connection. Replays after a reconnect
+        # cross silence that was already counted as skipped.
+        self.sent_high_water = 0
+        # PCM uplink encoding. mu-law halves the bytes sent for mic and WAV sessions.
+        if encoding not in ENCODINGS:
+            raise ValueError(f"Unknown encoding: {encoding}")
+        self.encoding = encoding
+        self.bytes_sent = 0
+        # Voice commands spoken in the meeting; None loads the configured defaults.
+        self.command_engine = CommandEngine(commands)
+        self.command_listeners = []
+        self.command_log = []
+        self.command_sink = None
+
+    def output_path(self, extension):
+        return os.path.join(self.output_dir, f"{self.session_id}.{extension}")
+
+    def open_audio_stream(self):
+        """Open this session's PyAudio input stream, feeding self.audio_queue."""
+        loop = asyncio.get_running_loop()
+
+        def mic_callback(input_data, frame_count, time_info, status_flag):
+            # PortAudio calls this from its own thread; asyncio.Queue is not thread-safe.
+            loop.call_soon_threadsafe(self.audio_queue.put_nowait, input_data)
+            return (input_data, pyaudio.paContinue)
+
+        self.audio = pyaudio.PyAudio()
+        device_index = None
+        if self.audio_device is not None:
+            device_index = find_input_device(self.audio, self.audio_device)
+            if device_index is None:
+                # Falling back to the default input would record every meeting's mixed audio.
+                raise RuntimeError(f"Audio input device {self.audio_device!r} not found")
+        self.stream = self.audio.open(
+            format=FORMAT,
+            channels=CHANNELS,
+            rate=RATE,
+            input=True,
+            input_device_index=device_index,
+            frames_per_buffer=CHUNK,
+            stream_callback=mic_callback,
+        )
+        self.stream.start_stream()
+        print(f"Audio stream initialized successfully for session {self.session_id} "
+              f"(input: {self.audio_device or 'default'}).",flush=True)
+
+    def close_audio_stream(self):
+        try:
+            if self.stream is not None:
+                self.stream.stop_stream()
+                self.stream.close()
+                self.stream = None
+            if self.audio is not None:
+                self.audio.terminate()
+                self.audio = None
+                print("Audio stream closed and PyAudio terminated.", flush=True)
+        except Exception as e:
+            print(f"Error closing audio stream: {e}", flush=True)
+
+    def open_recorder(self):
+        if self.recorder is None:
+            self.recorder = StreamingWavWriter(self.output_path("wav"), CHANNELS, SAMPLE_SIZE, RATE)
+
+    def close_recorder(self):
+        if self.recorder is not None and not self.recorder.closed:
+            self.recorder.close()
+            print(f"🟢 Mic audio saved to {self.recorder.path}",flush=True)
+
+    def record_lost_audio(self, seconds):
+        self.lost_audio_seconds += seconds
+        STREAM_LOST_AUDIO_SECONDS.inc(seconds)
+        print(f"🔴 ERROR: {seconds:.1f}s of audio was lost before the connection recovered.",flush=True)
+
+    def add_result_listener(self, callback):
+        """Register callback(response) for every interim and final transcript result."""
+        self.result_listeners.append(callback)
+
+    def notify_result_listeners(self, res):
+        for callback in self.result_listeners:
+            try:
+                callback(res)
+            except Exception as e:
+                print(f"🔴 ERROR: Result listener failed: {e}",flush=True)
+
+    def add_command_listener(self, callback):
+        """Register callback(event) for every voice command matched in a final result."""
+        self.command_listeners.append(callback)
+
+    async def handle_command(self, match, transcript):
+        """Record a matched voice command and pass it to the command listeners."""
+        event = dict(match.to_dict(), transcript=transcript, session_id=self.session_id)
+        print(f"🟢 Voice command '{match.command.name}' (\"{match.phrase}\") at {subtitle_time_formatter(match.at or 0, '.')}",flush=True)
+        if match.command.action in (BOOKMARK, ACTION_ITEM):
+            if self.command_sink is None:
+                self.command_sink = await TranscriptSink(self.output_path("commands.jsonl")).open()
+            self.command_sink.write(json.dumps(event) + "\n")
+        elif match.command.action == INGEST:
+            # Listeners upload the transcript file, so get everything so far onto disk first.
+            await self.transcript_sink.flush()
+        self.command_log.append(event)
+        for callback in self.command_listeners:
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"🔴 ERROR: Command listener failed: {e}",flush=True)
+
+    async def run(self, method, **kwargs):
+        key = self.api_key
+        output_format = self.output_format
+        deepgram_url = f'{self.host}/v1/listen?punctuate=true'
+        if self.model:
+            deepgram_url += f"&model={self.model}"
+        if self.tier:
+            deepgram_url += f"&tier={self.tier}"
+        if method == "mic":
+            deepgram_url += f"&encoding={self.encoding}&sample_rate=16000"
+        elif method == "wav":
+            # Either a WAV path (memory-mapped) or raw PCM bytes with explicit parameters.
+            if kwargs.get("data") is not None:
+                source = WavSource.from_bytes(kwargs["data"], kwargs["channels"], kwargs["sample_rate"], kwargs["sample_width"],
+                                              name=kwargs.get("filepath", "audio"))
+            else:
+                source = WavSource.open(kwargs["filepath"])
+            pacing = kwargs.get("pacing", REALTIME)
+            if pacing not in PACING_MODES:
+                raise ValueError(f"Unknown pacing mode: {pacing}")
+            if source.sample_width != 2:
+                source.close()
+                raise ValueError("WAV streaming needs 16-bit PCM input; transcribe other WAVs with the 'file' method")
+            deepgram_url += f'&channels={source.channels}&sample_rate={source.sample_rate}&encoding={self.encoding}'
+        self.transcript_sink = await TranscriptSink(self.transcript_path).open()
+        if output_format in SUBTITLE_FORMATS:
+            self.subtitle_writer = await SubtitleWriter(self.output_path(output_format), output_format).open()
+        if method == "mic" and self.record_audio:
+            self.open_recorder()
+        loop = asyncio.get_running_loop()
+        if method == "wav":
+            byte_rate, frame_size = source.byte_rate, source.sample_width * source.channels
+        else:
+            byte_rate, frame_size = RATE * CHANNELS * SAMPLE_SIZE, CHANNELS * SAMPLE_SIZE
+        # Only raw PCM can be resumed on a new connection: mic audio from the ring buffer,
+        # WAV audio from the source itself. File and URL sessions still fail on a drop.
+        resumable = method in RESUMABLE_METHODS
+        encode = mulaw_encode if self.encoding == MULAW and method in ("mic", "wav") else None
+        sent_label = self.encoding if method in ("mic", "wav") else "passthrough"
+        session_finished = False
+        first_message = True
+        first_transcript = True
+        pump = None
+
+        async def send_audio(ws, data, session_offset=None):
+            if session_offset is not None:
+                skipped = self.sent_map.record(session_offset, len(data))
+                gap_start = max(session_offset - skipped, self.sent_high_water)
+                if session_offset > gap_start:
+                    self.skipped_audio_seconds += (session_offset - gap_start) / byte_rate
+                    VAD_SKIPPED_SECONDS.inc((session_offset - gap_start) / byte_rate)
+                self.sent_high_water = max(self.sent_high_water, session_offset + len(data))
+            if encode is not None:
+                data = encode(data)
+            self.bytes_sent += len(data)
+            AUDIO_SENT_BYTES.inc(len(data), encoding=sent_label)
+            for offset in range(0, len(data), STREAM_CHUNK_BYTES):
+                await ws.send(data[offset:offset + STREAM_CHUNK_BYTES])
+            self.last_send = loop.time()
+
+        async def pump_microphone():
+            # Runs for the whole session, so audio keeps landing in the ring (and the
+            # recording) while the connection is down.
+            while True:
+                mic_data = await self.audio_queue.get()
+                self.audio_ring.write(mic_data)
+                if self.recorder is not None:
+                    self.recorder.write(mic_data)
+                self.audio_available.set()
+
+        async def sender(ws):
+            if not self.reconnects:
+                print(
+                    f'🟢 (2/5) Ready to stream {"mic" if method=="mic" else kwargs.get("filepath", "audio")} audio to Deepgram' +
+                    (". Speak into your microphone to transcribe." if method=="mic" else ""),flush=True
+                )
+            if method == "mic":
+                # Everything from connection_offset on is sent, which replays the audio
+                # that was not finalized before a reconnect.
+                position = self.connection_offset
+                while True:
+                    self.audio_available.clear()
+                    if position < self.audio_ring.oldest_offset:
+                        self.record_lost_audio((self.audio_ring.oldest_offset - position) / byte_rate)
+                        position = self.audio_ring.oldest_offset
+                    mic_data = self.audio_ring.read_from(position)
+                    if self.vad_gate is None:
+                        if not mic_data:
+                            await self.audio_available.wait()
+                            continue
+                        await send_audio(ws, mic_data, position)
+                        position += len(mic_data)
+                        continue
+                    was_active = self.vad_gate.active
+                    ranges, consumed = self.vad_gate.process(mic_data, position)
+                    if not consumed:
+                        await self.audio_available.wait()
+                        continue
+                    position += consumed
+                    for start, end in ranges:
+                        # Pre-roll can reach back into audio already examined; the ring still has it.
+                        start = max(start, self.audio_ring.oldest_offset)
+                        await send_audio(ws, self.audio_ring.read_from(start, end), start)
+                    if was_active and not self.vad_gate.active:
+                        # Speech ended: have Deepgram finalize it now rather than at the next utterance.
+                        await ws.send(json.dumps({"type": "Finalize"}))
+            elif method == "url":
+                # Each read waits for the previous send to drain, so a fast download never
+                # buffers more than one chunk ahead of the websocket.
+                async with aiohttp.ClientSession() as session:
+                    async with session.get(kwargs["url"]) as audio:
+                        audio.raise_for_status()
+                        async for remote_url_data in audio.content.iter_chunked(STREAM_CHUNK_BYTES):
+                            await send_audio(ws, remote_url_data)
+                await ws.send(json.dumps({"type": "CloseStream"}))
+                print("🟢 (5/5) Successfully closed Deepgram connection, waiting for final transcripts if necessary",flush=True)
+            elif method == "file":
+                # Containerised audio (mp3, m4a, webm, ...) is sent as-is; Deepgram detects the format.
+                with open(kwargs["filepath"], "rb") as audio_file:
+                    while True:
+                        file_data = await asyncio.to_thread(audio_file.read, STREAM_CHUNK_BYTES)
+                        if not file_data:
+                            break
+                        await send_audio(ws, file_data)
+                await ws.send(json.dumps({"type": "CloseStream"}))
+                print("🟢 (5/5) Successfully closed Deepgram connection, waiting for final transcripts if necessary",flush=True)
+            elif method == "wav":
+                # Real-time pacing sends one REALTIME_RESOLUTION chunk per tick against a fixed
+                # schedule; fast pacing sends larger chunks as quickly as the socket drains.
+                chunk_seconds = REALTIME_RESOLUTION if pacing == REALTIME else FAST_CHUNK_SECONDS
+                chunk_size = source.chunk_size(chunk_seconds)
+                started = loop.time()
+                for index, chunk in enumerate(source.chunks(chunk_size, start=self.connection_offset)):
+                    if pacing == REALTIME:
+                        delay = started + (index + 1) * REALTIME_RESOLUTION - loop.time()
+                        if delay > 0:
+                            await asyncio.sleep(delay)
+                    await send_audio(ws, chunk)
+                await ws.send(json.dumps({"type": "CloseStream"}))
+                print("🟢 (5/5) Successfully closed Deepgram connection, waiting for final transcripts if necessary",flush=True)
+
+        async def keepalive(ws):
+            # Deepgram closes a stream that has carried no data for about 10 seconds.
+            while True:
+                idle = loop.time() - self.last_send
+                if idle >= KEEPALIVE_INTERVAL:
+                    await ws.send(json.dumps({"type": "KeepAlive"}))
+                    self.last_send = loop.time()
+                    idle = 0
+                await asyncio.sleep(KEEPALIVE_INTERVAL - idle)
+
+        async def receiver(ws):
+            nonlocal first_message, first_transcript, session_finished
+            transcript = ""
+            # Deepgram times each connection from zero over only the audio it was sent; map
+            # those times back onto the session clock.
+            sent_map = self.sent_map
+
+            def to_session(seconds):
+                return sent_map.to_session(seconds * byte_rate) / byte_rate
+            termination_event = self.termination_event
+            async for msg in ws:
+                res = json.loads(msg)
+                if first_message:
+                    print("🟢 (3/5) Successfully receiving Deepgram messages, waiting for finalized transcription...",flush=True)
+                    first_message = False
+                try:
+                    if res.get("msg"):
+                        print(res["msg"],flush=True)
+                    if "is_final" in res and not res["is_final"]:
+                        self.phase_timer.mark("first_interim")
+                    if "channel" in res:
+                        if res.get("is_final"):
+                            end = int(sent_map.to_session((res["start"] + res["duration"]) * byte_rate)) // frame_size * frame_size
+                            self.finalized_offset = max(self.finalized_offset, end)
+                        if not sent_map.is_identity:
+                            res = remap_result(res, to_session)
+                        self.notify_result_listeners(res)
+                    if res.get("is_final"):
+                        transcript = spoken = res.get("channel", {}).get("alternatives", [{}])[0].get("transcript", "")
+                        self.word_timeline.extend_from_result(res)
+                        if transcript != "":
+                            if first_transcript:
+                                self.phase_timer.mark("first_final")
+                                print("🟢 (4/5) Began receiving transcription",flush=True)
+                                if output_format == "vtt":
+                                    print("WEBVTT\n",flush=True)
+                                first_transcript = False
+
+                            if self.subtitle_writer is not None:
+                                transcript = self.subtitle_writer.write(res)
+                            print(transcript,flush=True)
+                            self.transcript_sink.write(spoken + "\n")
+
+                        stop_requested = False
+                        if spoken:
+                            for match in self.command_engine.feed(spoken, res.get("start"), res.get("start", 0) + res.get("duration", 0)):
+                                await self.handle_command(match, spoken)
+                                stop_requested = stop_requested or match.command.action == STOP
+                        if method == "mic" and stop_requested:
+                            await ws.send(json.dumps({"type": "CloseStream"}))
+                            session_finished = True
+                            termination_event.set()   # <-- Set the termination signal
+                            print("🟢 (5/5) Successfully closed Deepgram connection, waiting for final transcripts if necessary", flush=True)
+                            await ws.close()  # Explicitly close the websocket.
+                            break
+                    if res.get("created"):
+                        session_finished = True
+                        if self.subtitle_writer is not None:
+                            print(f"🟢 Subtitles saved to {self.subtitle_writer.path}")
+                            if method == "mic":
+                                self.close_recorder()
+                        print(f'🟢 Request finished with a duration of {res["duration"]} seconds. Exiting!',flush=True)
+                except KeyError:
+                    print(f"🔴 ERROR: Received unexpected API response! {msg}")
+
+        async def exchange(ws):
+            """Stream over one connection. Returns True if it dropped before the session finished."""
+            sending = asyncio.ensure_future(sender(ws))
+            receiving = asyncio.ensure_future(receiver(ws))
+            keeping_alive = asyncio.ensure_future(keepalive(ws))
+            try:
+                await asyncio.wait([sending, receiving], return_when=asyncio.FIRST_COMPLETED)
+                if sending.done() and not receiving.done() and sending.exception() is None:
+                    # All audio is sent; the receiver ends once the final results are in.
+                    keeping_alive.cancel()
+                    await asyncio.wait([receiving])
+                for task in (sending, receiving):
+                    if task.done() and task.exception() is not None:
+                        if not isinstance(task.exception(), websockets.exceptions.ConnectionClosed):
+                            raise task.exception()
+                return not session_finished
+            finally:
+                for task in (sending, receiving, keeping_alive):
+                    task.cancel()
 
-    async def _stream(self):
         try:
-            await run(self.api_key, "mic", self.output_format, host=self.host, model=self.model, tier=self.tier, timestamps=self.timestamps,termination_event=self.termination_event)
+            if method == "mic":
+                pump = asyncio.ensure_future(pump_microphone())
+                self.open_audio_stream()
+            attempt = 0
+            dropped_at = None
+            while True:
+                if dropped_at is not None:
+                    attempt += 1
+                    if attempt > RECONNECT_ATTEMPTS:
+                        raise ConnectionError(f"Lost the Deepgram connection and {RECONNECT_ATTEMPTS} reconnect attempts failed")
+                    delay = min(RECONNECT_MAX_DELAY, RECONNECT_BASE_DELAY * 2 ** (attempt - 1)) * random.uniform(0.5, 1.0)
+                    print(f"🟡 Deepgram connection lost; reconnecting in {delay:.1f}s (attempt {attempt}/{RECONNECT_ATTEMPTS})",flush=True)
+                    await asyncio.sleep(delay)
+                connect_started = time.monotonic()
+                try:
+                    ws = await websockets.connect(deepgram_url, extra_headers={"Authorization": f"Token {key}"})
+                except (OSError, asyncio.TimeoutError, websockets.exceptions.InvalidHandshake) as e:
+                    if dropped_at is None:
+                        raise
+                    print(f"🔴 ERROR: Reconnect attempt {attempt} failed: {e}",flush=True)
+                    continue
+                try:
+                    if dropped_at is None:
+                        self.phase_timer.record("websocket_connect", time.monotonic() - connect_started)
+                        print(f'ℹ️  Request ID: {ws.response_headers.get("dg-request-id")}')
+                        if self.model:
+                            print(f'ℹ️  Model: {self.model}')
+                        if self.tier:
+                            print(f'ℹ️  Tier: {self.tier}')
+                        print("🟢 (1/5) Successfully opened Deepgram streaming connection",flush=True)
+                    else:
+                        recovery = time.monotonic() - dropped_at
+                        self.reconnects += 1
+                        STREAM_RECONNECTS.inc()
+                        STREAM_RECOVERY_SECONDS.observe(recovery)
+                        print(f'🟢 Reconnected to Deepgram after {recovery:.1f}s (request ID {ws.response_headers.get("dg-request-id")}), '
+                              f'resuming from {self.connection_offset / byte_rate:.1f}s',flush=True)
+                        attempt = 0
+                        dropped_at = None
+                    self.last_send = loop.time()
+                    self.sent_map = SentAudioMap(self.connection_offset)
+                    if self.vad_gate is not None:
+                        self.vad_gate.reset(self.connection_offset)
+                    dropped = await exchange(ws)
+                finally:
+                    await ws.close()
+                if not dropped:
+                    break
+                if not resumable:
+                    raise ConnectionError("Deepgram connection closed before the transcription finished")
+                dropped_at = time.monotonic()
+                # Resume from the end of the last final result; anything the ring no longer
+                # holds is reported as lost.
+                self.connection_offset = self.finalized_offset
+                if method == "mic" and self.connection_offset < self.audio_ring.oldest_offset:
+                    self.record_lost_audio((self.audio_ring.oldest_offset - self.connection_offset) / byte_rate)
+                    self.connection_offset = self.audio_ring.oldest_offset
+        except websockets.exceptions.InvalidStatusCode as e:
+             print(f'🔴 ERROR: Could not connect to Deepgram! {e}')
+             self.error = f"Could not connect to Deepgram: {e}"
+             return
+        except Exception as e:
+             print(f'🔴 ERROR: {e}')
+             self.error = str(e)
+             return
+        finally:
+            if pump is not None:
+                pump.cancel()
+                self.close_audio_stream()
+            self.close_recorder()
+            if method == "wav":
+                source.close()
+            # Guaranteed final flush, including when the session task is cancelled.
+            await self.transcript_sink.close()
+            if self.command_sink is not None:
+                await self.command_sink.close()
+            if self.subtitle_writer is not None:
+                await self.subtitle_writer.close()
+            if len(self.word_timeline):
+                await asyncio.to_thread(self.word_timeline.save, self.output_path("words.bin"))
+
+    async def _stream(self, method="mic", **kwargs):
+        try:
+            await self.run(method, **kwargs)
         except asyncio.CancelledError:
             pass
         except Exception as e:
             print(f"🔴 ERROR during streaming: {e}")
-    
-    def start(self):
+
+    async def transcribe(self, method, **kwargs):
+        """
+        Run a finite session ("wav", "file" or "url") to completion in the caller's task.
+        Returns the transcript path, or raises if the session failed.
+        """
+        self.error = None
+        await self.run(method, **kwargs)
+        if self.error:
+            raise RuntimeError(self.error)
+        return self.transcript_path
+
+    def start(self, method="mic", **kwargs):
         if not self.running:
             self.running = True
-            self.task = asyncio.create_task(self._stream())
-            print("Real-time transcription started.",flush=True)
-    
+            self.task = asyncio.create_task(self._stream(method, **kwargs))
+            print(f"Real-time transcription started (session {self.session_id}).",flush=True)
+
     async def stop(self):
         if self.task and not self.task.done():
             self.task.cancel()
@@ -318,18 +644,46 @@ class RealTimeTranscriber:
                 print("Real-time transcription task cancellation timed out or cancelled.", flush=True)
             self.running = False
             print("Real-time transcription stopped.", flush=True)
-        # Ensure that the PyAudio stream is closed.
-        close_audio_stream()
+        # Ensure that this session's PyAudio stream is closed.
+        self.close_audio_stream()
+
+async def run(key, method, output_format, **kwargs):
+    """Run a single standalone session; kwargs as accepted by RealTimeTranscriber.run."""
+    transcriber = RealTimeTranscriber(
+        key,
+        host=kwargs.pop("host", "wss://api.deepgram.com"),
+        output_format=output_format,
+        model=kwargs.pop("model", None),
+        tier=kwargs.pop("tier", None),
+        timestamps=kwargs.pop("timestamps", False),
+        transcript_path=kwargs.pop("transcript_path", os.path.join(os.path.curdir, "transcript.txt")),
+        encoding=kwargs.pop("encoding", LINEAR16),
+    )
+    await transcriber.run(method, **kwargs)
+    return transcriber
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Real-time transcription using Deepgram (mic mode).")
     parser.add_argument("-k", "--key", required=True, help="Your Deepgram API Key")
     parser.add_argument("--host", default="wss://api.deepgram.com", help="Deepgram WebSocket host")
     parser.add_argument("-f", "--format", default="text", choices=["text", "vtt", "srt"], help="Output format")
+    parser.add_argument("-i", "--input", help="Transcribe this WAV file instead of the microphone")
+    parser.add_argument("--pacing", default=REALTIME, choices=PACING_MODES, help="WAV input pacing: real-time or as fast as the socket accepts")
+    parser.add_argument("--no-vad", action="store_true", help="Send all mic audio, including silence")
+    parser.add_argument("--encoding", default=LINEAR16, choices=ENCODINGS, help="Uplink audio encoding")
     args = parser.parse_args()
+
+    if args.input:
+        asyncio.run(run(args.key, "wav", args.format, host=args.host, filepath=args.input, pacing=args.pacing,
+                        encoding=args.encoding))
+        sys.exit(0)
     
+    log_audio_devices()
+
     async def main():
-        transcriber = RealTimeTranscriber(api_key=args.key, host=args.host, output_format=args.format)
+        transcriber = RealTimeTranscriber(api_key=args.key, host=args.host, output_format=args.format,
+                                          transcript_path=os.path.join(os.path.curdir, "transcript.txt"), vad=not args.no_vad,
+                                          encoding=args.encoding)
         transcriber.start()
         try:
             # Run transcription for 60 seconds in test mode.
@@ -0,0 +1,117 @@
+import os
+import re
+import json
+import time
+import asyncio
+import hashlib
+from collections import OrderedDict
+from metrics import REGISTRY
+
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "256"))
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "3600"))
+# Optional directory for a second, on-disk cache tier that survives restarts.
+SEARCH_CACHE_DIR = os.getenv("SEARCH_CACHE_DIR")
+
+CACHE_LOOKUPS = REGISTRY.counter(
+    "meetscript_search_cache_lookups_total",
+    "Search result cache lookups by outcome (memory_hit, disk_hit or miss).",
+    ("result",),
+)
+
+_PUNCTUATION = re.compile(r"[^\w\s']+")
+
+
+def normalize_query(query):
+    """Case, punctuation and spacing differences map to the same cache entry."""
+    return " ".join(_PUNCTUATION.sub(" ", query.lower()).split())
+
+
+def cache_key(*parts):
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    Two-tier cache for search answers: an in-process LRU with a TTL, backed by one
+    JSON file per key in `directory` when one is configured. Callers put everything
+    the answer depends on into the key, so entries never need updating in place.
+    """
+    def __init__(self, maxsize=SEARCH_CACHE_SIZE, ttl=SEARCH_CACHE_TTL, directory=SEARCH_CACHE_DIR):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.directory = directory
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    async def get(self, key):
+        """The cached value for `key`, or None."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            if time.time() - entry[0] < self.ttl:
+                self._entries.move_to_end(key)
+                CACHE_LOOKUPS.inc(result="memory_hit")
+                return entry[1]
+            del self._entries[key]
+        if self.directory:
+            entry = await asyncio.to_thread(self._read, key)
+            if entry is not None:
+                self._remember(key, entry[0], entry[1])
+                CACHE_LOOKUPS.inc(result="disk_hit")
+                return entry[1]
+        CACHE_LOOKUPS.inc(result="miss")
+        return None
+
+    async def put(self, key, value):
+        created = time.time()
+        self._remember(key, created, value)
+        if self.directory:
+            await asyncio.to_thread(self._write, key, created, value)
+
+    async def invalidate(self):
+        """Drop every entry from both tiers."""
+        self._entries.clear()
+        if self.directory:
+            await asyncio.to_thread(self._clear_directory)
+
+    def _remember(self, key, created, value):
+        self._entries[key] = (created, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def _read(self, key):
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                item = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        if time.time() - item["created"] >= self.ttl:
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+            return None
+        return item["created"], item["value"]
+
+    def _write(self, key, created, value):
+        os.makedirs(self.directory, exist_ok=True)
+        # Write then rename, so a concurrent reader never sees half a file.
+        temp_path = f"{self._path(key)}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"created": created, "value": value}, f)
+        os.replace(temp_path, self._path(key))
+
+    def _clear_directory(self):
+        if not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    pass
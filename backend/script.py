@@ -3,14 +3,38 @@ import sys
 import time
 import logging
 import asyncio
-from selenium import webdriver
-from selenium.webdriver.edge.service import Service as EdgeService
-from selenium.webdriver.edge.options import Options
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 import pyautogui  
 from realtime_stream import RealTimeTranscriber
+from driver_pool import launch_edge_driver, log_edge_environment
+from metrics import PhaseTimer
+from template_matcher import TemplateMatcher
+from join_flow import MeetPage, SIGN_IN, ASK_TO_JOIN, JOIN_NOW, IN_CALL, LOBBY, DENIED, JOINED_STATES
+
+# Upper bounds only; each wait returns as soon as the page reaches the expected state.
+PAGE_SETTLE_TIMEOUT = 15
+JOIN_TIMEOUT = 30
+# Uplink encoding for meeting audio: "linear16", or "mulaw" to halve the bandwidth.
+DEEPGRAM_ENCODING = os.getenv("DEEPGRAM_ENCODING", "linear16")
+
+# pyautogui drives the single shared X display, so fallback clicks from concurrent
+# browser sessions must not interleave.
+pyautogui_lock = threading.Lock()
+# Shared so template pyramids and last-found regions are reused across meetings.
+template_matcher = TemplateMatcher()
+# Screenshots of the join-flow buttons, matched on screen when Selenium cannot find the
+# button (for example after Meet changes its markup). Missing images are skipped.
+BUTTON_TEMPLATE_DIR = os.getenv("BUTTON_TEMPLATE_DIR", "/app/button_templates")
+BUTTON_TEMPLATES = {
+    SIGN_IN: ("sign_in.png",),
+    ASK_TO_JOIN: ("ask_to_join.png",),
+    JOIN_NOW: ("join_now.png",),
+}
 
 # Global variable for the persistent automator instance
 persistent_automator = None
@@ -29,9 +53,15 @@ def clear_automator_session():
     persistent_automator = None
 
 class GoogleMeetAutomator:
-    def __init__(self, driver_path=r'/usr/local/bin/msedgedriver'):
+    def __init__(self, driver_path=r'/usr/local/bin/msedgedriver', driver_pool=None):
         self.driver_path = driver_path
         self.driver = None
+        self.driver_pool = driver_pool
+        self.pooled_driver = None
+        self.page = None
+        # Every WebDriver/pyautogui call for this session runs on this one thread,
+        # keeping the event loop free and the driver single-threaded.
+        self.browser_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="meet-browser")
         self.setup_logging()
         # Define a persistent profile folder
         self.profile_path = "/app/selenium_profile"
@@ -39,6 +69,11 @@ class GoogleMeetAutomator:
             os.makedirs(self.profile_path)
             self.logger.info(f"Created persistent profile directory at {self.profile_path}")
 
+    async def in_browser(self, func, *args, **kwargs):
+        """Run a blocking browser call on this session's browser thread and await its result."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.browser_executor, functools.partial(func, *args, **kwargs))
+
     def setup_logging(self):
         self.logger = logging.getLogger(self.__class__.__name__)
         handler = logging.StreamHandler(sys.stdout)
@@ -49,69 +84,17 @@ class GoogleMeetAutomator:
 
     def setup_driver(self):
         try:
-            # Define the lock file (could be "SingletonLock" or similar)
-            lock_file = os.path.join(self.profile_path, "SingletonLock")
-            if os.path.exists(lock_file):
-                self.logger.info(f"Lock file found in profile directory: {lock_file}. Removing it.")
-                os.remove(lock_file)
-
-            # Debug: Check if msedgedriver exists at the expected driver path
-            self.logger.debug(f"Type of self.driver_path: {type(self.driver_path)}; value: {self.driver_path}")
-            if os.path.exists(self.driver_path):
-                self.logger.info(f"msedgedriver found at {self.driver_path}")
-            else:
-                self.logger.error(f"msedgedriver NOT found at {self.driver_path}")
-
-            # Debug: Check for the Microsoft Edge browser binary
-            edge_binary = "/usr/bin/microsoft-edge"
-            if os.path.exists(edge_binary):
-                self.logger.info(f"Microsoft Edge binary found at {edge_binary}")
-            else:
-                self.logger.error(f"Microsoft Edge binary NOT found at {edge_binary}")
-
-            # Debug: Retrieve and log Microsoft Edge version
-            try:
-                import subprocess
-                edge_version = subprocess.check_output([edge_binary, "--version"], text=True).strip()
-                self.logger.info(f"Microsoft Edge version: {edge_version}")
-            except Exception as ex:
-                self.logger.error(f"Failed to retrieve Microsoft Edge version: {ex}")
-
-            self.logger.info("Initializing Selenium Options for Edge WebDriver")
-            options = Options()
-            options.use_chromium = True
-            #Set binary_location to the Microsoft Edge browser binary, not the driver
-            options.binary_location = edge_binary
-            self.logger.debug(f"Selenium Options binary_location set to: {options.binary_location}")
-
-            options.add_argument('--no-sandbox')
-            options.add_argument('--disable-dev-shm-usage')
-            options.add_argument("--remote-debugging-port=9222")
-            options.add_argument('--force-dark-mode')
-            options.add_argument("--disable-extensions")
-            options.add_argument("--window-size=1920,1080")
-            
-            # options.add_argument(f"--user-data-dir={self.profile_path}")
-            
-            options.add_argument("--disable-blink-features=AutomationControlled")
-            options.add_experimental_option("excludeSwitches", ["enable-automation"])
-            options.add_experimental_option("useAutomationExtension", False)
-            # Added option to disable notifications that might include microphone and camera prompts
-            options.add_argument("--disable-notifications")
-            # Automatically block microphone and camera permission pop-ups
-            options.add_experimental_option("prefs", {
-                "profile.managed_default_content_settings.media_stream_mic": 2,
-                "profile.managed_default_content_settings.media_stream_camera": 2,
-                "profile.default_content_setting_values.media_stream_mic": 2,
-                "profile.default_content_setting_values.media_stream_camera": 2,
-                "profile.default_content_setting_values.notifications": 2
-            })
-            self.logger.debug(f"Selenium Options arguments: {options.arguments}")
+            if self.driver_pool is not None:
+                self.pooled_driver = self.driver_pool.checkout()
+                self.driver = self.pooled_driver.driver
+                self.page = MeetPage(self.driver, self.logger)
+                self.logger.info(f"Using pooled WebDriver {self.pooled_driver.slot}")
+                return True
 
-            self.logger.info(f"Initializing EdgeService with executable_path: {self.driver_path}")
-            service = EdgeService(executable_path=self.driver_path,timeout=300)
-            self.logger.info("Creating Edge WebDriver instance now")
-            self.driver = webdriver.Edge(service=service, options=options)
+            log_edge_environment(self.driver_path)
+            self.logger.info(f"Initializing Edge WebDriver with executable_path: {self.driver_path}")
+            self.driver = launch_edge_driver(self.driver_path)
+            self.page = MeetPage(self.driver, self.logger)
             self.logger.info("WebDriver initialized successfully")
             return True
         except Exception as e:
@@ -120,51 +103,45 @@ class GoogleMeetAutomator:
         
     def is_user_signed_in(self):
         """
-        Quickly determines if an account is already signed in by checking for the presence of 
-        the 'Sign in' button without waiting. If the 'Sign in' button is found, the user is not signed in.
+        Waits only until the page has rendered either a 'Sign in' button or a join button.
+        If the 'Sign in' button is found, the user is not signed in.
         """
-        try:
-            sign_in_elements = self.driver.find_elements(By.XPATH, "//span[contains(text(), 'Sign in')]")
-            if sign_in_elements and sign_in_elements[0].is_displayed():
-                self.logger.info("Sign in button found; user is not signed in.")
-                return False
-            else:
-                self.logger.info("Sign in button not found; assuming user is already signed in.")
-                return True
-        except Exception as e:
-            self.logger.info(f"Error detecting sign in button: {e}. Assuming user is already signed in.")
-            return True
+        state, _ = self.page.wait_for((SIGN_IN, ASK_TO_JOIN, JOIN_NOW, IN_CALL, LOBBY), timeout=PAGE_SETTLE_TIMEOUT)
+        if state == SIGN_IN:
+            self.logger.info("Sign in button found; user is not signed in.")
+            return False
+        self.logger.info(f"Page state '{state}'; assuming user is already signed in.")
+        return True
+
     def handle_media_permissions(self):
         """
-        Dismiss the media permissions prompt using Selenium explicit wait.
+        Dismiss the media permissions prompt if it is showing right now.
         This looks for buttons that suggest 'Continue without', "Don't allow", or 'Cancel'.
         """
-        try:
-            wait = WebDriverWait(self.driver, 10)
-            dismiss_xpath = "//*[contains(text(), 'Continue without') or contains(text(), \"Don't allow\") or contains(text(), 'Cancel')]"
-            dismiss_button = wait.until(EC.element_to_be_clickable((By.XPATH, dismiss_xpath)))
-            dismiss_button.click()
-            self.logger.info("Dismissed media permissions prompt using Selenium explicit wait.")
+        if self.page.dismiss_media_prompt():
             return True
-        except Exception as e:
-            self.logger.info("No media permissions prompt detected via Selenium explicit wait.")
-            return False
+        self.logger.info("No media permissions prompt detected.")
+        return False
 
     def go_to_meet(self, meet_url):
         try:
             self.driver.get(meet_url)
             self.logger.info(f"Navigated to Google Meet URL: {meet_url}")
-            time.sleep(2)
             self.handle_media_permissions()
             return True
         except Exception as e:
             self.logger.error(f"Failed to navigate to Meet URL: {e}")
             return False
 
-    def click_element(self, by, locator, fallback_image=None, initial_delay=5):
+    def click_element(self, by, locator, fallback_image=None, initial_delay=0):
+        """
+        Click via Selenium, falling back to an on-screen image match. `fallback_image`
+        may be one template path or a list of alternatives.
+        """
         wait = WebDriverWait(self.driver, 15)
         try:
-            time.sleep(initial_delay)
+            if initial_delay:
+                time.sleep(initial_delay)
             element = wait.until(EC.element_to_be_clickable((by, locator)))
             element.click()
             self.logger.info(f"Clicked element with locator: {locator} using Selenium.")
@@ -172,29 +149,49 @@ class GoogleMeetAutomator:
         except Exception as e:
             self.logger.warning(f"Selenium click failed for {locator}: {e}")
             if fallback_image:
-                time.sleep(2)
-                location = pyautogui.locateOnScreen(fallback_image, confidence=0.8)
-                if location:
-                    x, y = pyautogui.center(location)
-                    pyautogui.moveTo(x, y, duration=0.5)
-                    pyautogui.click()
-                    self.logger.info(f"Clicked element using fallback image: {fallback_image}")
-                    return True
+                with pyautogui_lock:
+                    match = template_matcher.locate(fallback_image)
+                    if match:
+                        x, y = match.center
+                        pyautogui.click(x, y)
+                        self.logger.info(f"Clicked element using fallback image: {match.template} (score {match.score:.2f})")
+                        return True
             self.logger.error(f"Failed to click element with locator: {locator}")
             return False
 
+    def click_button_template(self, states):
+        """
+        Click the on-screen image of the first button of `states` that can be found.
+        Returns the state whose button was clicked, or None.
+        """
+        templates = {}
+        for state in states:
+            for name in BUTTON_TEMPLATES.get(state, ()):
+                path = os.path.join(BUTTON_TEMPLATE_DIR, name)
+                if os.path.exists(path):
+                    templates[path] = state
+        if not templates:
+            return None
+        with pyautogui_lock:
+            match = template_matcher.locate(list(templates))
+            if match is None:
+                return None
+            x, y = match.center
+            pyautogui.click(x, y)
+        self.logger.info(f"Clicked '{templates[match.template]}' button using fallback image: {match.template} (score {match.score:.2f})")
+        return templates[match.template]
+
     def click_sign_in(self):
-        SIGN_IN_SELECTORS = [
-            "//span[contains(text(), 'Sign in')]",
-            "//div[contains(@aria-label, 'Sign in')]",
-            "//div[contains(@class, 'sign-in')]//button"
-        ]
-        
-        for selector in SIGN_IN_SELECTORS:
+        state, elements = self.page.wait_for((SIGN_IN,), timeout=PAGE_SETTLE_TIMEOUT)
+        if state == SIGN_IN:
             try:
-                return self.click_element(By.XPATH, selector, initial_delay=2)
+                elements[SIGN_IN].click()
+                self.logger.info("Clicked 'Sign in' button.")
+                return True
             except Exception as e:
-                self.logger.warning(f"Failed with selector {selector}: {e}")
+                self.logger.warning(f"Failed to click 'Sign in' button: {e}")
+        if self.click_button_template((SIGN_IN,)):
+            return True
         self.driver.save_screenshot("sign_in_failure.png")
         self.logger.error("All sign-in button selectors failed")
         return False
@@ -225,99 +222,121 @@ class GoogleMeetAutomator:
             return False
 
     def join_meet(self):
+        """
+        Click 'Ask to join' or, with a persisted session, 'Join now' as soon as either
+        appears, dismissing media permission prompts along the way.
+        Returns the state reached: IN_CALL or LOBBY once joined, DENIED if Meet refused
+        entry, or None if neither happened within JOIN_TIMEOUT.
+        """
         try:
-            # Dismiss any possible media permission prompt.
-            self.handle_media_permissions()
-            wait = WebDriverWait(self.driver, 15)
-            try:
-                # Preferred: Click the 'Ask to join' button.
-                ask_to_join_xpath = "//span[contains(text(), 'Ask to join')]"
-                ask_to_join_button = wait.until(EC.element_to_be_clickable((By.XPATH, ask_to_join_xpath)))
-                ask_to_join_button.click()
-                self.logger.info("Clicked 'Ask to join' button.")
-            except Exception:
-                # Fallback: With a persisted session, the button may be 'Join now' (i.e., allow to join).
-                join_now_xpath = "//span[contains(text(), 'Join now')]"
-                join_now_button = wait.until(EC.element_to_be_clickable((By.XPATH, join_now_xpath)))
-                join_now_button.click()
-                self.logger.info("Clicked 'Join now' button.")
+            state, elements = self.page.wait_for((ASK_TO_JOIN, JOIN_NOW, IN_CALL, LOBBY), timeout=JOIN_TIMEOUT)
+            if state in (ASK_TO_JOIN, JOIN_NOW):
+                elements[state].click()
+                self.logger.info(f"Clicked '{'Ask to join' if state == ASK_TO_JOIN else 'Join now'}' button.")
+            elif state is None and elements.get(DENIED) is None:
+                state = self.click_button_template((ASK_TO_JOIN, JOIN_NOW))
+            if state in (ASK_TO_JOIN, JOIN_NOW):
+                # The click only counts once Meet shows the call or its waiting room.
+                state, elements = self.page.wait_for(JOINED_STATES, timeout=JOIN_TIMEOUT)
+            if state in JOINED_STATES:
+                self.logger.info(f"Past the join screen (state '{state}').")
+                return state
+            if elements.get(DENIED) is not None:
+                self.logger.error("Failed to join meet: Meet says this call cannot be joined.")
+                return DENIED
+            self.logger.error(f"Failed to join meet: not in the call or waiting room within {JOIN_TIMEOUT}s.")
         except Exception as e:
             self.logger.error(f"Failed to join meet: {e}")
+        return None
 
-    async def automate_and_transcribe(self, meet_url, username, password, deepgram_api_key, meeting_duration=3600):
+    async def automate_and_transcribe(self, meet_url, username, password, deepgram_api_key, meeting_duration=3600, session_id=None, phase_timer=None,
+                                      result_listener=None, command_listener=None, word_timeline=None):
         """
         Integrated method to automate meeting and transcribe.
         Now includes detection of a persisted session to skip the login process when already signed in.
+        Returns the path of the session's transcript file.
         """
-        if not self.setup_driver():
-            raise Exception("Driver setup failed")
-
-        if not self.go_to_meet(meet_url):
-            raise Exception("Failed to go to Meet URL")
-
-        if not self.is_user_signed_in():
-            if not self.click_sign_in():
-                raise Exception("Failed to click Sign In")
-            if not self.login(username, password):
-                raise Exception("Login failed")
-        else:
-            self.logger.info("User is already signed in; skipping login.")
-
-        self.join_meet()
-        self.logger.info("Meeting joined successfully.")
-
-        # Start the real-time transcription.
-        transcriber = RealTimeTranscriber(deepgram_api_key, output_format="text", timestamps=True)
-        transcriber.start()
-
-        start_time = time.time()
+        timer = phase_timer or PhaseTimer()
+        transcriber = None
         try:
+            with timer.phase("driver_setup"):
+                if not await self.in_browser(self.setup_driver):
+                    raise Exception("Driver setup failed")
+
+            with timer.phase("go_to_meet"):
+                if not await self.in_browser(self.go_to_meet, meet_url):
+                    raise Exception("Failed to go to Meet URL")
+
+            with timer.phase("is_user_signed_in"):
+                signed_in = await self.in_browser(self.is_user_signed_in)
+            if not signed_in:
+                with timer.phase("click_sign_in"):
+                    if not await self.in_browser(self.click_sign_in):
+                        raise Exception("Failed to click Sign In")
+                with timer.phase("login"):
+                    if not await self.in_browser(self.login, username, password):
+                        raise Exception("Login failed")
+            else:
+                self.logger.info("User is already signed in; skipping login.")
+
+            with timer.phase("join_meet"):
+                state = await self.in_browser(self.join_meet)
+            if state == DENIED:
+                raise Exception("Meet refused to let us join the call")
+            if state not in JOINED_STATES:
+                raise Exception(f"Failed to join the meeting within {JOIN_TIMEOUT}s")
+            timer.mark("meeting_joined")
+            self.logger.info("Meeting joined successfully.")
+
+            # Start the real-time transcription.
+            transcriber = RealTimeTranscriber(deepgram_api_key, output_format="text", timestamps=True, session_id=session_id,
+                                              phase_timer=timer, encoding=DEEPGRAM_ENCODING, word_timeline=word_timeline,
+                                              audio_device=self.pooled_driver.audio_sink if self.pooled_driver is not None else None)
+            if result_listener is not None:
+                transcriber.add_result_listener(result_listener)
+            if command_listener is not None:
+                transcriber.add_command_listener(command_listener)
+            transcriber.start()
+
+            start_time = time.time()
             while time.time() - start_time < meeting_duration:
                 try:
-                    if not self.driver.window_handles:
+                    if not await self.in_browser(lambda: self.driver.window_handles):
                         self.logger.info("Browser window closed. Ending automation loop.")
                         break
                 except Exception as e:
                     self.logger.error(f"Browser error: {e}. Ending automation loop.")
                     break
-                # Check if the termination event was set (trigger word "goodbye" detected).
+                if transcriber.error:
+                    raise Exception(f"Transcription failed: {transcriber.error}")
+                # Check if the termination event was set (a stop voice command was heard).
                 if transcriber.termination_event.is_set():
-                    self.logger.info("Termination event triggered by 'goodbye' command.")
+                    self.logger.info("Termination event triggered by a stop voice command.")
                     break
                 await asyncio.sleep(1)
         finally:
-            try:
-                await asyncio.wait_for(transcriber.stop(), timeout=5)
-            except asyncio.TimeoutError:
-                self.logger.error("Timed out waiting for transcriber.stop()")
-            except Exception as err:
-                self.logger.error(f"Error calling transcriber.stop: {err}")
-            self.cleanup()
+            if transcriber is not None:
+                try:
+                    await asyncio.wait_for(transcriber.stop(), timeout=5)
+                except asyncio.TimeoutError:
+                    self.logger.error("Timed out waiting for transcriber.stop()")
+                except Exception as err:
+                    self.logger.error(f"Error calling transcriber.stop: {err}")
+            # Queued behind any browser call still in flight, so the driver is never used concurrently.
+            await self.in_browser(self.cleanup)
+            self.browser_executor.shutdown(wait=False)
             clear_automator_session()
 
-
-        # Now, start the real-time transcription
-        transcriber = RealTimeTranscriber(deepgram_api_key, output_format="text",timestamps=True)
-        transcriber.start()
-
-        start_time = time.time()
-        while time.time() - start_time < meeting_duration:
-            try:
-                if not self.driver.window_handles:
-                    self.logger.info("Browser window closed. Ending automation loop.")
-                    break
-            except Exception as e:
-                self.logger.error(f"Browser error: {e}. Ending automation loop.")
-                break
-            await asyncio.sleep(1)
-
-        # Stop transcription when done.
-        await transcriber.stop()
-        self.cleanup()
+        return transcriber.transcript_path
 
     def cleanup(self):
         try:
-            if self.driver:
+            if self.pooled_driver is not None:
+                self.driver_pool.release(self.pooled_driver)
+                self.pooled_driver = None
+                self.driver = None
+                self.logger.info("Browser returned to the pool.")
+            elif self.driver:
                 self.driver.quit()
                 self.logger.info("Browser closed successfully.")
         except Exception as e:
@@ -0,0 +1,173 @@
+import re
+import json
+import math
+import time
+import heapq
+import hashlib
+import asyncio
+from transcript_sink import TranscriptSink
+from metrics import REGISTRY
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+DEFAULT_TOP_K = 5
+
+SEARCH_SECONDS = REGISTRY.histogram(
+    "meetscript_local_search_seconds",
+    "Time to rank transcript segments in the local BM25 index.",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25),
+)
+
+_WORD = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have he her his i if in into is it its me my of on or our "
+    "she so that the their them there they this to was we were what when which who will with you your".split()
+)
+
+
+def tokenize(text):
+    """Lowercased word tokens without stopwords; possessive "'s" is folded into the word."""
+    tokens = []
+    for token in _WORD.findall(text.lower()):
+        if token.endswith("'s"):
+            token = token[:-2]
+        if token not in STOPWORDS:
+            tokens.append(token)
+    return tokens
+
+
+class Segment:
+    def __init__(self, segment_id, session_id, start, end, text):
+        self.segment_id = segment_id
+        self.session_id = session_id
+        self.start = start
+        self.end = end
+        self.text = text
+
+    def to_dict(self):
+        return {"id": self.segment_id, "session_id": self.session_id, "start": self.start, "end": self.end, "text": self.text}
+
+
+class SearchIndex:
+    """
+    In-process BM25 inverted index over final transcript segments.
+    Segment IDs are assigned in arrival order, so every posting list is sorted by time.
+    With a `path`, segments are appended to a JSON-lines log through a TranscriptSink
+    and replayed by open(), so the index survives restarts without re-transcribing.
+    """
+    def __init__(self, path=None, k1=BM25_K1, b=BM25_B):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self.segments = []
+        self.lengths = []
+        self.postings = {}
+        self.total_length = 0
+        self.sink = None
+        # Running digests of the indexed text, overall and per session, as cheap content versions.
+        self._digest = hashlib.blake2b(digest_size=16)
+        self._session_digests = {}
+
+    def __len__(self):
+        return len(self.segments)
+
+    async def open(self):
+        if self.path:
+            await asyncio.to_thread(self._replay)
+            self.sink = await TranscriptSink(self.path).open()
+        return self
+
+    def _replay(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        item = json.loads(line)
+                        self._add(item["session_id"], item["text"], item["start"], item["end"])
+        except FileNotFoundError:
+            pass
+
+    async def close(self):
+        if self.sink is not None:
+            await self.sink.close()
+            self.sink = None
+
+    def add(self, session_id, text, start=None, end=None):
+        """Index one final transcript segment; returns it, or None if it has no searchable words."""
+        segment = self._add(session_id, text, start, end)
+        if segment is not None and self.sink is not None:
+            self.sink.write(json.dumps({"session_id": session_id, "start": start, "end": end, "text": text}) + "\n")
+        return segment
+
+    def _add(self, session_id, text, start, end):
+        tokens = tokenize(text)
+        if not tokens:
+            return None
+        segment = Segment(len(self.segments), session_id, start, end, text)
+        self.segments.append(segment)
+        self.lengths.append(len(tokens))
+        self.total_length += len(tokens)
+        counts = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+        for token, count in counts.items():
+            self.postings.setdefault(token, []).append((segment.segment_id, count))
+        record = json.dumps([session_id, start, end, text]).encode("utf-8")
+        self._digest.update(record)
+        self._session_digests.setdefault(session_id, hashlib.blake2b(digest_size=16)).update(record)
+        return segment
+
+    def version(self, session_id=None):
+        """A hash of everything indexed (for one session, if given); changes with every new segment."""
+        digest = self._digest if session_id is None else self._session_digests.get(session_id)
+        return digest.hexdigest() if digest is not None else None
+
+    def add_result(self, session_id, res):
+        if not res.get("is_final"):
+            return None
+        text = res.get("channel", {}).get("alternatives", [{}])[0].get("transcript", "")
+        start = res.get("start")
+        end = start + res.get("duration", 0) if start is not None else None
+        return self.add(session_id, text, start, end)
+
+    def result_listener(self, session_id):
+        """A RealTimeTranscriber result listener that indexes session `session_id`'s finals."""
+        return lambda res: self.add_result(session_id, res)
+
+    def session_segments(self, session_id):
+        """Every segment of one session, in arrival order."""
+        return [segment for segment in self.segments if segment.session_id == session_id]
+
+    def search(self, query, k=DEFAULT_TOP_K, session_id=None):
+        """Top `k` segments for `query` as [(score, Segment), ...], best first."""
+        started = time.perf_counter()
+        count = len(self.segments)
+        if not count:
+            return []
+        base = self.k1 * (1 - self.b)
+        per_token = self.k1 * self.b * count / self.total_length
+        lengths = self.lengths
+        scores = {}
+        for token in set(tokenize(query)):
+            postings = self.postings.get(token)
+            if not postings:
+                continue
+            weight = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5)) * (self.k1 + 1)
+            for segment_id, tf in postings:
+                score = weight * tf / (tf + base + per_token * lengths[segment_id])
+                scores[segment_id] = scores.get(segment_id, 0.0) + score
+        if session_id is not None:
+            scores = {segment_id: score for segment_id, score in scores.items() if self.segments[segment_id].session_id == session_id}
+        # Ties go to the more recent segment.
+        best = heapq.nlargest(k, scores.items(), key=lambda item: (item[1], item[0]))
+        SEARCH_SECONDS.observe(time.perf_counter() - started)
+        return [(score, self.segments[segment_id]) for segment_id, score in best]
+
+
+def format_segments(segments):
+    """Segments in session and time order, one "[HH:MM:SS] text" line each, as LLM context."""
+    lines = []
+    for segment in sorted(segments, key=lambda segment: (segment.session_id, segment.start or 0)):
+        seconds = int(segment.start or 0)
+        lines.append(f"[{seconds // 3600:02}:{seconds % 3600 // 60:02}:{seconds % 60:02}] {segment.text}")
+    return "\n".join(lines)
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Parallel transcription of long recordings. A WAV file is cut at quiet points near
+fixed intervals, the segments are streamed over a bounded pool of concurrent
+Deepgram connections, and the final results are rebased by each segment's offset
+and stitched back together in order.
+
+    python segmented.py -k $DEEPGRAM_API_KEY -i meeting.wav --connections 8 -f srt
+"""
+import os
+import asyncio
+import argparse
+import tempfile
+import numpy as np
+from audio_source import WavSource, FAST
+from realtime_stream import RealTimeTranscriber, DATA_DIR, rebase_result
+from subtitles import subtitle_formatter
+from word_timeline import WordTimeline
+
+SEGMENT_SECONDS = 300
+# How far either side of each nominal cut to look for the quietest frame.
+SPLIT_SEARCH_SECONDS = 20
+SPLIT_FRAME_SECONDS = 0.03
+MAX_CONNECTIONS = int(os.getenv("SEGMENTED_MAX_CONNECTIONS", "4"))
+SEGMENT_ATTEMPTS = 2
+
+
+def quietest_offset(source, start, end):
+    """Byte offset of the start of the lowest-energy frame in [start, end)."""
+    frame_bytes = source.chunk_size(SPLIT_FRAME_SECONDS)
+    window = source.view[start:end]
+    frames = len(window) // frame_bytes
+    if frames == 0 or source.sample_width != 2:
+        return start
+    samples = np.frombuffer(window[:frames * frame_bytes], dtype="<i2").reshape(frames, -1).astype(np.float32)
+    energy = np.einsum("ij,ij->i", samples, samples)
+    return start + int(np.argmin(energy)) * frame_bytes
+
+
+def split_points(source, segment_seconds=SEGMENT_SECONDS, search_seconds=SPLIT_SEARCH_SECONDS):
+    """
+    Return [(start_byte, end_byte), ...] covering the recording. Only the audio around
+    each nominal cut is examined, so this stays cheap on multi-hour files.
+    """
+    total = len(source.view)
+    segment_bytes = source.chunk_size(segment_seconds)
+    search_bytes = source.chunk_size(search_seconds)
+    cuts = [0]
+    target = segment_bytes
+    while target < total - search_bytes:
+        cut = quietest_offset(source, max(cuts[-1] + search_bytes, target - search_bytes), min(total, target + search_bytes))
+        cuts.append(cut)
+        target = cut + segment_bytes
+    cuts.append(total)
+    return list(zip(cuts[:-1], cuts[1:]))
+
+
+async def transcribe_segment(api_key, host, source, start, end, index, work_dir):
+    finals = []
+    offset = start / source.byte_rate
+    for attempt in range(1, SEGMENT_ATTEMPTS + 1):
+        finals.clear()
+        transcriber = RealTimeTranscriber(api_key, host=host, session_id=f"segment-{index}", output_dir=work_dir)
+        transcriber.add_result_listener(
+            lambda res: finals.append(rebase_result(res, offset)) if res.get("is_final") else None
+        )
+        try:
+            await transcriber.transcribe(
+                "wav",
+                data=source.view[start:end],
+                channels=source.channels,
+                sample_rate=source.sample_rate,
+                sample_width=source.sample_width,
+                filepath=f"{source.name} [segment {index}]",
+                pacing=FAST,
+            )
+            return finals
+        except Exception as e:
+            if attempt == SEGMENT_ATTEMPTS:
+                raise RuntimeError(f"Segment {index} failed after {attempt} attempts: {e}")
+            print(f"🔴 ERROR: Segment {index} failed ({e}); retrying.", flush=True)
+
+
+async def transcribe_segmented(api_key, filepath, host="wss://api.deepgram.com", session_id=None, output_dir=DATA_DIR,
+                               output_format="text", max_connections=MAX_CONNECTIONS, segment_seconds=SEGMENT_SECONDS,
+                               phase_timer=None, result_listener=None, word_timeline=None):
+    """
+    Transcribe a WAV file over up to `max_connections` parallel connections.
+    Writes <session_id>.txt and <session_id>.words.bin (and .srt/.vtt when requested)
+    and returns the transcript path. `result_listener` is called with each stitched
+    final result, in order, and the words are added to `word_timeline` if given.
+    """
+    word_timeline = word_timeline if word_timeline is not None else WordTimeline()
+    session_id = session_id or os.path.splitext(os.path.basename(filepath))[0]
+    semaphore = asyncio.Semaphore(max(1, max_connections))
+    with WavSource.open(filepath) as source, tempfile.TemporaryDirectory() as work_dir:
+        segments = split_points(source, segment_seconds)
+        print(f"🟢 Split {source.duration:.0f}s of audio into {len(segments)} segments "
+              f"across {min(len(segments), max_connections)} connections", flush=True)
+
+        async def bounded(index, start, end):
+            async with semaphore:
+                return await transcribe_segment(api_key, host, source, start, end, index, work_dir)
+
+        if phase_timer is not None:
+            with phase_timer.phase("segmented_transcription"):
+                per_segment = await asyncio.gather(*(bounded(i, start, end) for i, (start, end) in enumerate(segments)))
+        else:
+            per_segment = await asyncio.gather(*(bounded(i, start, end) for i, (start, end) in enumerate(segments)))
+
+    os.makedirs(output_dir, exist_ok=True)
+    finals = [res for segment in per_segment for res in sorted(segment, key=lambda res: res["start"])]
+    texts = [res["channel"]["alternatives"][0].get("transcript", "") for res in finals]
+    for res in finals:
+        word_timeline.extend_from_result(res)
+        if result_listener is not None:
+            result_listener(res)
+    if len(word_timeline):
+        await asyncio.to_thread(word_timeline.save, os.path.join(output_dir, f"{session_id}.words.bin"))
+    transcript_path = os.path.join(output_dir, f"{session_id}.txt")
+    with open(transcript_path, "w", encoding="utf-8") as f:
+        f.writelines(text + "\n" for text in texts if text)
+    if output_format in ("srt", "vtt"):
+        subtitle_path = os.path.join(output_dir, f"{session_id}.{output_format}")
+        spoken = [res for res, text in zip(finals, texts) if text]
+        with open(subtitle_path, "w", encoding="utf-8") as f:
+            if output_format == "vtt":
+                f.write("WEBVTT\n\n")
+            f.writelines(subtitle_formatter(res, output_format, number) for number, res in enumerate(spoken, 1))
+        print(f"🟢 Subtitles saved to {subtitle_path}", flush=True)
+    print(f"🟢 Stitched {len(finals)} results into {transcript_path}", flush=True)
+    return transcript_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parallel segmented transcription of a long WAV recording.")
+    parser.add_argument("-k", "--key", required=True, help="Your Deepgram API Key")
+    parser.add_argument("-i", "--input", required=True, help="WAV file to transcribe")
+    parser.add_argument("--host", default="wss://api.deepgram.com", help="Deepgram WebSocket host")
+    parser.add_argument("-f", "--format", default="text", choices=["text", "vtt", "srt"], help="Output format")
+    parser.add_argument("-c", "--connections", type=int, default=MAX_CONNECTIONS, help="Concurrent websocket connections")
+    parser.add_argument("--segment-seconds", type=float, default=SEGMENT_SECONDS, help="Nominal segment length")
+    args = parser.parse_args()
+    asyncio.run(transcribe_segmented(args.key, args.input, host=args.host, output_format=args.format,
+                                     max_connections=args.connections, segment_seconds=args.segment_seconds))
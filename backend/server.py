@@ -1,15 +1,31 @@
+import asyncio
 import logging
 import os
 import uvicorn
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import JSONResponse
+import uuid
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Header, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List
-from groundx import AsyncGroundX, Document
+from groundx import Document
 from mcp.server.fastmcp import FastMCP
 from script import GoogleMeetAutomator
-from openai import OpenAI
+from clients import ClientRegistry, OPENAI, GROUNDX
+from jobs import JobManager, FINISHED_STATES
+from pubsub import TranscriptHub
+from search_index import DEFAULT_TOP_K, SearchIndex, format_segments
+from vector_index import VectorIndex, make_embedder
+from result_cache import ResultCache, cache_key, normalize_query
+from ingest_pipeline import IngestLedger, IngestPipeline
+from summarizer import MapReduceSummarizer, OpenAIMeetingLLM
+from driver_pool import DriverPool
+from metrics import REGISTRY, PhaseTimer
+from realtime_stream import DATA_DIR, RealTimeTranscriber
+from subtitles import parse_timestamp
+from word_timeline import WordTimeline
+from audio_source import is_pcm16_wav, WavSource, FAST
+from segmented import transcribe_segmented
 
 
 
@@ -23,6 +39,132 @@ SERVER_PORT = int(os.getenv("MCP_SERVER_PORT", "8000"))
 mcp_logic_controller = FastMCP(name="SeleniumGoogleMeetControl")
 logger.info("FastMCP instance for 'SeleniumGoogleMeetControl' created.")
 
+UPLOAD_DIR = os.path.join(DATA_DIR, "uploads")
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+# WAV recordings at least this long are split and transcribed over parallel connections.
+SEGMENTED_MIN_SECONDS = int(os.getenv("SEGMENTED_MIN_SECONDS", "600"))
+
+job_manager = JobManager()
+driver_pool = DriverPool()
+# Live transcript events per job, for /api/sessions/{id}/stream viewers.
+transcript_hub = TranscriptHub()
+job_manager.add_finish_listener(lambda job: transcript_hub.close(job.job_id, job.status))
+# BM25 index over every session's final results, for search without a GroundX round-trip.
+search_index = SearchIndex(os.path.join(DATA_DIR, "search_index.jsonl"))
+# Embedded transcript chunks of finished sessions, memory-mapped from DATA_DIR.
+vector_index = VectorIndex(DATA_DIR, make_embedder())
+# Serialises appends to the vector index files.
+_embed_lock = asyncio.Lock()
+# Transcript segments handed to the LLM from the local index, and semantic chunks added to them.
+LOCAL_SEARCH_TOP_K = int(os.getenv("LOCAL_SEARCH_TOP_K", "8"))
+SEMANTIC_SEARCH_TOP_K = int(os.getenv("SEMANTIC_SEARCH_TOP_K", "3"))
+# Word timings of running jobs; finished sessions are read back from <session>.words.bin.
+word_timelines = {}
+job_manager.add_finish_listener(lambda job: word_timelines.pop(job.job_id, None))
+# Default span of transcript returned around a /words?at= lookup, in seconds.
+WORDS_WINDOW_SECONDS = 10
+# Comment lines sent to idle SSE streams so proxies keep the connection open.
+STREAM_HEARTBEAT_SECONDS = 15
+# Pooled OpenAI and GroundX clients, one per API key, closed on shutdown.
+api_clients = ClientRegistry()
+# Answers from search_doc_for_rag_context, keyed by query and the content they were built from.
+search_cache = ResultCache()
+GROUNDX_BUCKET_ID = int(os.getenv("GROUNDX_BUCKET_ID", "19356"))
+# Enables live ingestion of running sessions into the GroundX bucket.
+GROUNDX_API_KEY = os.getenv("GROUNDX_API_KEY")
+# Chunks already in the knowledge base, shared by the per-API-key ingestion pipelines.
+ingest_ledger = IngestLedger(os.path.join(DATA_DIR, "ingest_ledger.json"))
+ingest_pipelines = {}
+INGEST_STAGING_DIR = os.path.join(DATA_DIR, "ingest")
+# Fire-and-forget tasks are referenced here until done so they are not garbage collected.
+_background_tasks = set()
+
+def _run_in_background(coro):
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+async def _embed_session(session_id):
+    """Chunk and embed a finished session's segments into the vector index, once."""
+    async with _embed_lock:
+        if session_id in vector_index.sessions:
+            return
+        segments = search_index.session_segments(session_id)
+        if not segments:
+            return
+        try:
+            added = await asyncio.to_thread(vector_index.add_segments, segments)
+            logger.info(f"Embedded {added} transcript chunks of session {session_id}.")
+        except Exception as e:
+            logger.error(f"Failed to embed session {session_id}: {e}", exc_info=True)
+
+job_manager.add_finish_listener(lambda job: _run_in_background(_embed_session(job.job_id)))
+
+def _stage_chunks(chunks):
+    os.makedirs(INGEST_STAGING_DIR, exist_ok=True)
+    paths = []
+    for chunk in chunks:
+        path = os.path.join(INGEST_STAGING_DIR, f"{chunk.session_id}-{chunk.line_start:06}-{chunk.digest[:12]}.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(chunk.text)
+        paths.append(path)
+    return paths
+
+def _remove_files(paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+async def _upload_chunks(groundx_api_key, chunks):
+    """Upload transcript chunks to the GroundX bucket in one ingest call."""
+    # GroundX ingests local files, so each chunk is staged as a small text file.
+    paths = await asyncio.to_thread(_stage_chunks, chunks)
+    try:
+        async with api_clients.limit(GROUNDX):
+            await api_clients.groundx(groundx_api_key).ingest(
+                documents=[
+                    Document(
+                        bucket_id=GROUNDX_BUCKET_ID,
+                        file_name=os.path.basename(path),
+                        file_path=path,
+                        file_type="txt",
+                        search_data={"session_id": chunk.session_id, "start": chunk.start, "end": chunk.end,
+                                     "lines": [chunk.line_start, chunk.line_end]},
+                    )
+                    for chunk, path in zip(chunks, paths)
+                ]
+            )
+    finally:
+        await asyncio.to_thread(_remove_files, paths)
+    logger.info(f"Ingested {len(chunks)} transcript chunks into the knowledge base.")
+    # GroundX answers may change with the new documents.
+    await search_cache.invalidate()
+
+def _ingest_pipeline(groundx_api_key):
+    pipeline = ingest_pipelines.get(groundx_api_key)
+    if pipeline is None:
+        upload = lambda chunks: _upload_chunks(groundx_api_key, chunks)
+        pipeline = ingest_pipelines[groundx_api_key] = IngestPipeline(upload, ingest_ledger).open()
+    return pipeline
+
+# A finished session's last, partly filled chunk is uploaded right away.
+job_manager.add_finish_listener(lambda job: _ingest_pipeline(GROUNDX_API_KEY).flush(job.job_id) if GROUNDX_API_KEY else None)
+
+def _forget_job(job):
+    """Drop what is still held for a job that the job manager no longer keeps."""
+    transcript_hub.discard(job.job_id)
+    for pipeline in ingest_pipelines.values():
+        pipeline.forget(job.job_id)
+
+job_manager.add_evict_listener(_forget_job)
+
+REGISTRY.gauge("meetscript_jobs_running", "Transcription jobs currently running.", lambda: job_manager.running_count)
+REGISTRY.gauge("meetscript_jobs_queued", "Transcription jobs waiting for a free slot.", lambda: job_manager.queued_count)
+REGISTRY.gauge("meetscript_hub_subscribers", "Live transcript stream subscribers.", lambda: transcript_hub.subscriber_count)
+
 
 class EchoRequest(BaseModel):
     message: str
@@ -37,7 +179,11 @@ class TranscribeRequest(BaseModel):
 class SearchRequest(BaseModel):
     query: str
     openai_api_key: str 
-    groundx_api_key: str
+    groundx_api_key: str = None
+    session_id: str = None
+
+class SummaryRequest(BaseModel):
+    openai_api_key: str
 
 class IngestRequest(BaseModel):
     file_path: str
@@ -63,6 +209,48 @@ async def echo_tool(message: str) -> str:
     logger.info(f"echo_tool received: '{message}'")
     return f"Echo from SeleniumGoogleMeetControl server (HTTP): {message}"
 
+def _voice_command_listener(job):
+    def on_command(event):
+        transcript_hub.publish(job.job_id, dict(event, type="command"))
+        if event["action"] == "ingest":
+            if GROUNDX_API_KEY:
+                logger.info(f"Job {job.job_id}: ingest voice command, uploading the open transcript chunk now.")
+                _ingest_pipeline(GROUNDX_API_KEY).flush(job.job_id)
+            else:
+                logger.warning(f"Job {job.job_id}: ingest voice command ignored; GROUNDX_API_KEY is not set.")
+    return on_command
+
+def _result_listener(job):
+    """
+    Publishes a job's results to live viewers, indexes its finals for local search and,
+    with GROUNDX_API_KEY set, ingests them into the knowledge base as they arrive.
+    """
+    listeners = [transcript_hub.result_listener(job.job_id), search_index.result_listener(job.job_id)]
+    if GROUNDX_API_KEY:
+        listeners.append(_ingest_pipeline(GROUNDX_API_KEY).result_listener(job.job_id))
+    def on_result(res):
+        for listener in listeners:
+            listener(res)
+    return on_result
+
+async def _run_meeting_transcription(job, meeting_url, google_username, google_password, deepgram_api_key, meeting_duration):
+    logger.info(f"Job {job.job_id}: joining {meeting_url}")
+    automator = GoogleMeetAutomator(driver_pool=driver_pool)
+    transcript_path = await automator.automate_and_transcribe(
+        meeting_url,
+        google_username,
+        google_password,
+        deepgram_api_key,
+        meeting_duration,
+        session_id=job.job_id,
+        phase_timer=PhaseTimer(job.timings),
+        result_listener=_result_listener(job),
+        command_listener=_voice_command_listener(job),
+        word_timeline=word_timelines.setdefault(job.job_id, WordTimeline())
+    )
+    logger.info(f"Job {job.job_id}: transcription completed successfully.")
+    return {"message": "Transcription completed successfully.", "transcript_file": os.path.basename(transcript_path)}
+
 @mcp_logic_controller.tool()
 async def transcribe_google_meet_tool(
     meeting_url: str,
@@ -71,89 +259,260 @@ async def transcribe_google_meet_tool(
     deepgram_api_key: str,
     meeting_duration: int = 3600
 ) -> dict:
+    """
+    Schedule a meeting transcription in the background and return its job ID immediately.
+    Poll get_transcription_job_tool for progress.
+    """
     logger.info("transcribe_google_meet_tool invoked")
     try:
-        automator = GoogleMeetAutomator()
-        await automator.automate_and_transcribe(
-            meeting_url,
-            google_username,
-            google_password,
-            deepgram_api_key,
-            meeting_duration
-        )
-        logger.info("Transcription completed successfully.")
-        return {"success": True, "message": "Transcription completed successfully."}
+        async def runner(job):
+            return await _run_meeting_transcription(
+                job,
+                meeting_url,
+                google_username,
+                google_password,
+                deepgram_api_key,
+                meeting_duration
+            )
+        job = job_manager.submit(runner, params={"meeting_url": meeting_url, "meeting_duration": meeting_duration})
+        return {"success": True, "job_id": job.job_id, "status": job.status, "queue_position": job_manager.queue_position(job)}
     except Exception as e:
-        logger.error(f"Error while transcribing: {e}", exc_info=True)
+        logger.error(f"Error while scheduling transcription: {e}", exc_info=True)
+        return {"success": False, "error": str(e)}
+
+def _wav_duration(file_path):
+    with WavSource.open(file_path) as source:
+        return source.duration
+
+async def _run_file_transcription(job, deepgram_api_key, file_path=None, url=None, parallel=True):
+    if not url and parallel and is_pcm16_wav(file_path) and await asyncio.to_thread(_wav_duration, file_path) >= SEGMENTED_MIN_SECONDS:
+        logger.info(f"Job {job.job_id}: segmented transcription of {file_path}")
+        transcript_path = await transcribe_segmented(
+            deepgram_api_key, file_path, session_id=job.job_id, phase_timer=PhaseTimer(job.timings),
+            result_listener=_result_listener(job), word_timeline=word_timelines.setdefault(job.job_id, WordTimeline())
+        )
+    else:
+        transcriber = RealTimeTranscriber(deepgram_api_key, session_id=job.job_id, phase_timer=PhaseTimer(job.timings),
+                                          word_timeline=word_timelines.setdefault(job.job_id, WordTimeline()))
+        transcriber.add_result_listener(_result_listener(job))
+        if url:
+            logger.info(f"Job {job.job_id}: streaming {url}")
+            transcript_path = await transcriber.transcribe("url", url=url)
+        elif is_pcm16_wav(file_path):
+            logger.info(f"Job {job.job_id}: streaming WAV file {file_path}")
+            transcript_path = await transcriber.transcribe("wav", filepath=file_path, pacing=FAST)
+        else:
+            logger.info(f"Job {job.job_id}: streaming audio file {file_path}")
+            transcript_path = await transcriber.transcribe("file", filepath=file_path)
+    logger.info(f"Job {job.job_id}: file transcription completed successfully.")
+    return {"message": "Transcription completed successfully.", "transcript_file": os.path.basename(transcript_path)}
+
+# Uploaded recordings by job ID, deleted once the job finishes, however it finishes
+# (including cancelled while queued and dropped at shutdown).
+_job_uploads = {}
+
+def _remove_job_upload(job):
+    path = _job_uploads.pop(job.job_id, None)
+    if path is not None:
+        _run_in_background(asyncio.to_thread(_remove_files, [path]))
+
+job_manager.add_finish_listener(_remove_job_upload)
+
+def submit_file_transcription(deepgram_api_key, file_path=None, url=None, remove_after=False, source_name=None, parallel=True):
+    async def runner(job):
+        return await _run_file_transcription(job, deepgram_api_key, file_path, url, parallel)
+    job = job_manager.submit(runner, params={"source": url or source_name or os.path.basename(file_path)})
+    if remove_after and file_path:
+        _job_uploads[job.job_id] = file_path
+    return job
+
+@mcp_logic_controller.tool()
+async def transcribe_file_tool(deepgram_api_key: str, url: str = None, file_name: str = None, parallel: bool = True) -> dict:
+    """
+    Transcribe a recording without joining a meeting. Pass either a public audio `url`
+    or the `file_name` of a recording in the server's data directory. Long WAV recordings
+    are transcribed in parallel segments unless `parallel` is False. Returns a job ID.
+    """
+    logger.info("transcribe_file_tool invoked")
+    if not url:
+        file_path = resolve_data_file(file_name)
+        if file_path is None:
+            return {"success": False, "error": f"Recording not found: {file_name}"}
+    else:
+        file_path = None
+    job = submit_file_transcription(deepgram_api_key, file_path=file_path, url=url, parallel=parallel)
+    return {"success": True, "job_id": job.job_id, "status": job.status, "queue_position": job_manager.queue_position(job)}
+
+@mcp_logic_controller.tool()
+async def get_transcription_job_tool(job_id: str) -> dict:
+    job = job_manager.get(job_id)
+    if job is None:
+        return {"success": False, "error": f"Unknown job: {job_id}"}
+    return {"success": True, "job": job_manager.describe(job)}
+
+@mcp_logic_controller.tool()
+async def cancel_transcription_job_tool(job_id: str) -> dict:
+    job = job_manager.cancel(job_id)
+    if job is None:
+        return {"success": False, "error": f"Unknown job: {job_id}"}
+    return {"success": True, "job": job_manager.describe(job)}
+
+@mcp_logic_controller.tool()
+async def list_transcription_jobs_tool(status: str = None) -> dict:
+    return {"success": True, "jobs": job_manager.list(status)}
+
+async def _local_hits(query, k, session_id=None, mode="bm25"):
+    """[(score, Segment), ...] from the BM25 index ("bm25") or the vector index ("semantic")."""
+    if mode == "semantic":
+        return await asyncio.to_thread(vector_index.search, query, k, session_id)
+    if mode == "bm25":
+        return search_index.search(query, k=k, session_id=session_id)
+    raise ValueError(f"Unknown search mode: {mode}")
+
+async def _retrieve_context(query, session_id=None):
+    """
+    Local transcript context for `query`: the best semantic chunks plus the best BM25
+    segments not already inside one of them, so paraphrases and exact terms both count.
+    """
+    chunks = [segment for _, segment in await _local_hits(query, SEMANTIC_SEARCH_TOP_K, session_id, "semantic")]
+    def covered(segment):
+        return any(
+            chunk.session_id == segment.session_id and chunk.start is not None and segment.start is not None
+            and chunk.start <= segment.start < chunk.end
+            for chunk in chunks
+        )
+    segments = [segment for _, segment in await _local_hits(query, LOCAL_SEARCH_TOP_K, session_id) if not covered(segment)]
+    return chunks + segments
+
+@mcp_logic_controller.tool()
+async def search_transcript_segments_tool(query: str, k: int = DEFAULT_TOP_K, session_id: str = None, mode: str = "bm25") -> dict:
+    try:
+        hits = await _local_hits(query, k, session_id, mode)
+    except ValueError as e:
         return {"success": False, "error": str(e)}
+    return {"success": True, "segments": [dict(segment.to_dict(), score=round(score, 4)) for score, segment in hits]}
 
 @mcp_logic_controller.tool()
-async def search_doc_for_rag_context(query: str, openai_api_key: str, groundx_api_key: str) -> dict:
-    client = AsyncGroundX(api_key=groundx_api_key)
+async def search_doc_for_rag_context(query: str, openai_api_key: str, groundx_api_key: str = None, session_id: str = None) -> dict:
+    """
+    Summarise what the transcripts say about `query`. Context comes from the local vector
+    and BM25 indexes; the GroundX bucket is only searched when nothing local matches.
+    """
     logger.info(f"search_doc_for_rag_context invoked with query: '{query}'")
+    key = cache_key(normalize_query(query), session_id, GROUNDX_BUCKET_ID,
+                    search_index.version(session_id), len(vector_index))
+    cached = await search_cache.get(key)
+    if cached is not None:
+        logger.info("Returning cached search result.")
+        return cached
+    result = await _answer_query(query, openai_api_key, groundx_api_key, session_id)
+    # Only structured answers are cached; errors and unparsed fallbacks are retried.
+    if "error" not in result and "raw" not in result:
+        await search_cache.put(key, result)
+    return result
+
+async def _summarize(text, openai_api_key):
+    """
+    Summary and actionable items for `text`. Long transcripts are split into windows that
+    are summarised concurrently and then merged, so they never overflow the context.
+    """
+    llm = OpenAIMeetingLLM(api_clients.openai(openai_api_key), MeetingTranscriptResponse, limit=lambda: api_clients.limit(OPENAI))
+    return await MapReduceSummarizer(llm).summarize(text)
+
+async def _answer_query(query, openai_api_key, groundx_api_key, session_id):
     try:
-        response = await client.search.content(
-            id=19356,
-            query=query,
-            n=1,
-        )
-        logger.info(f"Raw transcript from search: {response.search.text}")
-
-        # Use OpenAI's structured output parsing to extract a meeting summary and actionable items.
-        openai_client = OpenAI(api_key=openai_api_key)
-        structured_completion = openai_client.beta.chat.completions.parse(
-            model="gpt-4o-2024-08-06",
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "You are a meeting summarizer. Given a google meet transcript, extract a concise summary "
-                        "of the meeting and identify all actionable items. For each actionable item, provide a description "
-                        "of the task, the names of the persons assigned (if any), and any dates or deadlines mentioned. "
-                        "Return the result as structured JSON following this schema: "
-                        "{\"summary\": <summary text>, \"actionable_items\": "
-                        "[{\"description\": <description>, \"assignees\": [<list of names>], \"dates\": [<list of dates>]}]}."
-                    )
-                },
-                {
-                    "role": "user",
-                    "content": f"Transcript: {response.search.text}"
-                }
-            ],
-            response_format=MeetingTranscriptResponse,
-        )
-        message = structured_completion.choices[0].message
-        if message.parsed:
+        hits = await _retrieve_context(query, session_id)
+        if hits:
+            context = format_segments(hits)
+            logger.info(f"Local indexes returned {len(hits)} transcript passages.")
+        elif groundx_api_key:
+            async with api_clients.limit(GROUNDX):
+                response = await api_clients.groundx(groundx_api_key).search.content(
+                    id=GROUNDX_BUCKET_ID,
+                    query=query,
+                    n=1,
+                )
+            context = response.search.text
+            logger.info(f"Raw transcript from search: {context}")
+        else:
+            return {"error": "No transcript segments match the query."}
+
+        result = await _summarize(context, openai_api_key)
+        if result is not None:
             logger.info("Structured transcript parsing successful.")
-            return message.parsed.model_dump()
+            return result
         else:
             logger.warning("Structured transcript parsing failed, returning raw transcript.")
-            return {"raw": response.search.text}
+            return {"raw": context}
     except Exception as e:
         logger.error(f"Error during structured transcript parsing: {e}", exc_info=True)
         return {"error": str(e)}
 
+async def _session_transcript(session_id):
+    """A session's full transcript, timestamped from the search index when it has the session."""
+    segments = search_index.session_segments(session_id)
+    if segments:
+        return format_segments(segments)
+    path = resolve_data_file(f"{session_id}.txt")
+    if path is None:
+        return None
+    def _read():
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+    return await asyncio.to_thread(_read)
+
+@mcp_logic_controller.tool()
+async def summarize_session_tool(session_id: str, openai_api_key: str) -> dict:
+    """Summary and actionable items of a whole session, however long it ran."""
+    transcript = await _session_transcript(session_id)
+    if not transcript:
+        return {"error": f"No transcript for session: {session_id}"}
+    key = cache_key("summary", session_id, search_index.version(session_id) or transcript)
+    cached = await search_cache.get(key)
+    if cached is not None:
+        return cached
+    try:
+        result = await _summarize(transcript, openai_api_key)
+    except Exception as e:
+        logger.error(f"Error summarising session {session_id}: {e}", exc_info=True)
+        return {"error": str(e)}
+    if result is None:
+        return {"error": "Structured transcript parsing failed."}
+    await search_cache.put(key, result)
+    return result
+
+def resolve_data_file(file_name):
+    """Return the path of `file_name` inside DATA_DIR (matched by file name only), or None."""
+    if file_name:
+        path = os.path.join(DATA_DIR, os.path.basename(file_name))
+        if os.path.isfile(path):
+            return path
+    return None
+
+def resolve_transcript_path(file_path):
+    """
+    Map a requested transcript to a file we are allowed to upload: a session transcript
+    in DATA_DIR, otherwise the legacy r'transcript.txt'.
+    """
+    return resolve_data_file(file_path) or r'transcript.txt'
+
 @mcp_logic_controller.tool()
 async def ingest_documents(file_path: str, groundx_api_key: str) -> dict:
-    client = AsyncGroundX(api_key=groundx_api_key)
-    # Override the file_path to always use r'transcript.txt'
-    file_path = r'transcript.txt'
+    """
+    Ingest a transcript into the knowledge base. Only lines not already covered are
+    chunked, and chunks already uploaded are skipped, so repeating this is free.
+    """
+    file_path = resolve_transcript_path(file_path)
     logger.info(f"ingest_documents invoked with file_path: '{file_path}'")
     try:
         file_name = os.path.basename(file_path)
-        await client.ingest(
-            documents=[
-                Document(
-                    bucket_id=19356,
-                    file_name=file_name,
-                    file_path=file_path,
-                    file_type="txt",
-                    search_data={"key": "value"},
-                )
-            ]
-        )
-        logger.info(f"Ingested {file_name} into the knowledge base.")
-        return {"success": True, "message": f"Ingested {file_name} into the knowledge base. It should be available in a few minutes"}
+        session_id = os.path.splitext(file_name)[0]
+        chunks = await _ingest_pipeline(groundx_api_key).ingest_file(file_path, session_id)
+        counts = {status: sum(chunk.status == status for chunk in chunks) for status in ("uploaded", "duplicate", "failed")}
+        if counts["failed"]:
+            return {"success": False, "error": f"{counts['failed']} of {len(chunks)} chunks of {file_name} failed to upload.", **counts}
+        logger.info(f"Ingested {file_name}: {counts['uploaded']} new chunks, {counts['duplicate']} already present.")
+        return {"success": True, "message": f"Ingested {counts['uploaded']} new chunks of {file_name} into the knowledge base.", **counts}
     except Exception as e:
         logger.error(f"Error during ingestion: {e}", exc_info=True)
         return {"success": False, "error": str(e)}
@@ -170,12 +529,29 @@ app.add_middleware(
 @app.on_event("startup")
 async def startup_event():
     logger.info("Selenium automation startup.")
+    driver_pool.start()
+    await asyncio.to_thread(ingest_ledger.load)
+    await search_index.open()
+    await asyncio.to_thread(vector_index.open)
+    logger.info(f"Local search index loaded with {len(search_index)} segments and {len(vector_index)} embedded chunks.")
+    # Sessions indexed before the vector index existed, or before an embedder change.
+    for session_id in {segment.session_id for segment in search_index.segments} - vector_index.sessions:
+        _run_in_background(_embed_session(session_id))
 
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("Selenium automation shutdown.")
+    await job_manager.shutdown()
+    await asyncio.to_thread(driver_pool.shutdown)
+    await search_index.close()
+    await asyncio.gather(*(pipeline.close() for pipeline in ingest_pipelines.values()))
+    await api_clients.aclose()
+
 
 
+@app.get("/metrics")
+async def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
 
 @app.post("/api/echo")
 async def api_echo(req: EchoRequest):
@@ -195,14 +571,179 @@ async def api_transcribe(req: TranscribeRequest):
     )
     return JSONResponse(content=result)
 
+@app.post("/api/transcribe_file")
+async def api_transcribe_file(
+    deepgram_api_key: str = Form(...),
+    url: str = Form(None),
+    file: UploadFile = File(None),
+    parallel: bool = Form(True)
+):
+    logger.info(f"API call to /api/transcribe_file with {'url: ' + url if url else 'upload: ' + str(file and file.filename)}")
+    if not deepgram_api_key:
+        raise HTTPException(status_code=400, detail="Deepgram API key is required")
+    if bool(url) == bool(file):
+        raise HTTPException(status_code=400, detail="Provide exactly one of 'url' or 'file'")
+    if url:
+        job = submit_file_transcription(deepgram_api_key, url=url)
+    else:
+        os.makedirs(UPLOAD_DIR, exist_ok=True)
+        upload_path = os.path.join(UPLOAD_DIR, uuid.uuid4().hex + os.path.splitext(file.filename or "")[1])
+        upload = await asyncio.to_thread(open, upload_path, "wb")
+        try:
+            while True:
+                chunk = await file.read(UPLOAD_CHUNK_BYTES)
+                if not chunk:
+                    break
+                await asyncio.to_thread(upload.write, chunk)
+        except BaseException:
+            # A failed or aborted upload never becomes a job, so nothing else would delete it.
+            await asyncio.to_thread(_remove_files, [upload_path])
+            raise
+        finally:
+            await asyncio.to_thread(upload.close)
+        job = submit_file_transcription(deepgram_api_key, file_path=upload_path, remove_after=True, source_name=file.filename,
+                                        parallel=parallel)
+    return JSONResponse(content={"success": True, "job_id": job.job_id, "status": job.status, "queue_position": job_manager.queue_position(job)})
+
+@app.get("/api/jobs")
+async def api_list_jobs(status: str = None):
+    return JSONResponse(content={"jobs": job_manager.list(status)})
+
+@app.get("/api/jobs/{job_id}")
+async def api_get_job(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return JSONResponse(content=job_manager.describe(job))
+
+@app.post("/api/jobs/{job_id}/cancel")
+async def api_cancel_job(job_id: str):
+    job = job_manager.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return JSONResponse(content=job_manager.describe(job))
+
+def _subscribe_to_session(session_id, from_offset):
+    job = job_manager.get(session_id)
+    if job is None:
+        return None
+    if job.status in FINISHED_STATES:
+        # Jobs cancelled while queued never published anything; make sure the stream ends.
+        transcript_hub.close(session_id, job.status)
+    return transcript_hub.subscribe(session_id, from_offset)
+
+@app.get("/api/sessions/{session_id}/stream")
+async def api_session_stream(session_id: str, from_offset: int = None, last_event_id: str = Header(None)):
+    """
+    Server-sent events with the session's interim and final results. Pass `from_offset`
+    to replay retained events first. A reconnect's Last-Event-ID takes precedence, so
+    EventSource clients resume after the last event they saw instead of replaying it all.
+    """
+    if last_event_id and last_event_id.isdigit():
+        from_offset = int(last_event_id) + 1
+    subscription = _subscribe_to_session(session_id, from_offset)
+    if subscription is None:
+        raise HTTPException(status_code=404, detail=f"Unknown session: {session_id}")
+
+    async def events():
+        try:
+            while True:
+                event = await subscription.get(timeout=STREAM_HEARTBEAT_SECONDS)
+                if event is None:
+                    if subscription.closed:
+                        break
+                    yield ": keepalive\n\n"
+                    continue
+                offset, data = event
+                yield f"id: {offset}\ndata: {data}\n\n"
+        finally:
+            transcript_hub.unsubscribe(subscription)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.websocket("/api/sessions/{session_id}/stream")
+async def ws_session_stream(websocket: WebSocket, session_id: str, from_offset: int = None):
+    """The same events as the SSE stream, one JSON text message each."""
+    subscription = _subscribe_to_session(session_id, from_offset)
+    if subscription is None:
+        await websocket.close(code=4404)
+        return
+    await websocket.accept()
+    try:
+        while True:
+            event = await subscription.get(timeout=STREAM_HEARTBEAT_SECONDS)
+            if event is None:
+                if subscription.closed:
+                    break
+                continue
+            await websocket.send_text(event[1])
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        transcript_hub.unsubscribe(subscription)
+
+def _load_word_timeline(session_id):
+    timeline = word_timelines.get(session_id)
+    if timeline is not None:
+        return timeline
+    path = resolve_data_file(f"{session_id}.words.bin")
+    return WordTimeline.load(path) if path else None
+
+@app.get("/api/sessions/{session_id}/words")
+async def api_session_words(session_id: str, at: str = None, start: str = None, end: str = None, window: float = WORDS_WINDOW_SECONDS):
+    """
+    Words spoken around `at` (HH:MM:SS, MM:SS or seconds; `window` seconds either side)
+    or between `start` and `end`, from the session's word timeline.
+    """
+    try:
+        if at is not None:
+            center = parse_timestamp(at)
+            start_seconds, end_seconds = max(0.0, center - window), center + window
+        elif start is not None and end is not None:
+            start_seconds, end_seconds = parse_timestamp(start), parse_timestamp(end)
+        else:
+            raise ValueError("Pass either `at` or both `start` and `end`.")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        timeline = await asyncio.to_thread(_load_word_timeline, session_id)
+    except ValueError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if timeline is None:
+        raise HTTPException(status_code=404, detail=f"No word timings for session: {session_id}")
+    return JSONResponse(content={
+        "session_id": session_id,
+        "start": start_seconds,
+        "end": end_seconds,
+        "text": timeline.text_between(start_seconds, end_seconds),
+        "words": timeline.words_between(start_seconds, end_seconds),
+    })
+
 @app.post("/api/search")
 async def api_search(req: SearchRequest):
     logger.info(f"API call to /api/search with query: {req.query}")
     if not req.openai_api_key:
         raise HTTPException(status_code=400, detail="OpenAI API key is required")
-    if not req.groundx_api_key:
-        raise HTTPException(status_code=400, detail="GroundX API key is required")
-    result = await search_doc_for_rag_context(req.query, req.openai_api_key, req.groundx_api_key)
+    result = await search_doc_for_rag_context(req.query, req.openai_api_key, req.groundx_api_key, req.session_id)
+    return JSONResponse(content={"result": result})
+
+@app.get("/api/search/segments")
+async def api_search_segments(q: str, k: int = DEFAULT_TOP_K, session_id: str = None, mode: str = "bm25"):
+    """Top-k transcript segments ("bm25") or embedded chunks ("semantic"), without calling an LLM."""
+    try:
+        hits = await _local_hits(q, k, session_id, mode)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return JSONResponse(content={"segments": [dict(segment.to_dict(), score=round(score, 4)) for score, segment in hits]})
+
+@app.post("/api/sessions/{session_id}/summary")
+async def api_session_summary(session_id: str, req: SummaryRequest):
+    if not req.openai_api_key:
+        raise HTTPException(status_code=400, detail="OpenAI API key is required")
+    result = await summarize_session_tool(session_id, req.openai_api_key)
+    if result.get("error", "").startswith("No transcript"):
+        raise HTTPException(status_code=404, detail=result["error"])
     return JSONResponse(content={"result": result})
 
 @app.post("/api/ingest")
@@ -0,0 +1,66 @@
+import re
+from transcript_sink import TranscriptSink
+
+SUBTITLE_FORMATS = ("srt", "vtt")
+
+_TIMESTAMP = re.compile(r"^(?:(\d+):)?(?:(\d+):)?(\d+(?:[.,]\d+)?)$")
+
+
+def subtitle_time_formatter(seconds, separator):
+    hours = int(seconds // 3600)
+    minutes = int((seconds % 3600) // 60)
+    secs = int(seconds % 60)
+    millis = int((seconds - int(seconds)) * 1000)
+    return f"{hours:02}:{minutes:02}:{secs:02}{separator}{millis:03}"
+
+def subtitle_formatter(response, output_format, line_number):
+    start = response["start"]
+    end = start + response["duration"]
+    transcript = response.get("channel", {}).get("alternatives", [{}])[0].get("transcript", "")
+    separator = "," if output_format == "srt" else '.'
+    prefix = "- " if output_format == "vtt" else ""
+    subtitle_string = (
+        f"{line_number}\n"
+        f"{subtitle_time_formatter(start, separator)} --> {subtitle_time_formatter(end, separator)}\n"
+        f"{prefix}{transcript}\n\n"
+    )
+    return subtitle_string
+
+def parse_timestamp(value):
+    """Seconds from "HH:MM:SS", "MM:SS" or plain seconds, with optional ".mmm" or ",mmm"."""
+    match = _TIMESTAMP.match(str(value).strip())
+    if match is None:
+        raise ValueError(f"Invalid timestamp: {value!r}")
+    first, second, seconds = match.groups()
+    hours, minutes = (first, second) if second is not None else (None, first)
+    return int(hours or 0) * 3600 + int(minutes or 0) * 60 + float(seconds.replace(",", "."))
+
+
+class SubtitleWriter:
+    """
+    Streams SRT/VTT cues to the subtitle file as final results arrive, through a
+    write-behind TranscriptSink, instead of holding every cue until the session ends.
+    """
+    def __init__(self, path, output_format):
+        if output_format not in SUBTITLE_FORMATS:
+            raise ValueError(f"Unknown subtitle format: {output_format}")
+        self.path = path
+        self.output_format = output_format
+        self.line_number = 0
+        self.sink = TranscriptSink(path, mode="w")
+
+    async def open(self):
+        await self.sink.open()
+        if self.output_format == "vtt":
+            self.sink.write("WEBVTT\n\n")
+        return self
+
+    def write(self, response):
+        """Append the cue for a final result and return it."""
+        self.line_number += 1
+        cue = subtitle_formatter(response, self.output_format, self.line_number)
+        self.sink.write(cue)
+        return cue
+
+    async def close(self):
+        await self.sink.close()
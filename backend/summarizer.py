@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Map-reduce meeting summarizer. The transcript is split into token-budgeted windows;
+summaries and action items are extracted from the windows concurrently, then merged.
+Wall-clock time grows with (windows / concurrency) plus the depth of the reduce tree
+instead of with the transcript length.
+
+    python summarizer.py --hours 1 2 4 8 --latency 0.5
+
+runs the summarizer against LocalMeetingLLM, an offline stand-in for the model, on
+synthetic transcripts of each length and reports calls and wall-clock time.
+"""
+import os
+import re
+import time
+import random
+import asyncio
+import argparse
+from collections import Counter
+from contextlib import nullcontext
+from search_index import tokenize
+
+SUMMARY_WINDOW_TOKENS = int(os.getenv("SUMMARY_WINDOW_TOKENS", "6000"))
+SUMMARY_CONCURRENCY = int(os.getenv("SUMMARY_CONCURRENCY", "4"))
+# Lines repeated at the start of the next window, so an item spanning a boundary is seen whole.
+WINDOW_OVERLAP_LINES = 2
+# Transcripts longer than this (in characters) are split into windows on a worker thread.
+SPLIT_IN_THREAD_CHARS = 64 * 1024
+# Action items whose descriptions share at least this fraction of words are merged.
+DUPLICATE_SIMILARITY = 0.8
+
+MAP_PROMPT = (
+    "You are a meeting summarizer. Given a google meet transcript, extract a concise summary "
+    "of the meeting and identify all actionable items. For each actionable item, provide a description "
+    "of the task, the names of the persons assigned (if any), and any dates or deadlines mentioned. "
+    "Return the result as structured JSON following this schema: "
+    "{\"summary\": <summary text>, \"actionable_items\": "
+    "[{\"description\": <description>, \"assignees\": [<list of names>], \"dates\": [<list of dates>]}]}."
+)
+REDUCE_PROMPT = (
+    "You are a meeting summarizer. You are given summaries of consecutive parts of one meeting, "
+    "in order. Combine them into one concise summary of the whole meeting. Return only the summary text."
+)
+
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token), good enough for budgeting."""
+    return len(text) // 4 + 1
+
+
+def _split_long_line(line, max_tokens):
+    """Pieces of `line`, split on word boundaries, that each fit `max_tokens` tokens."""
+    pieces, current, chars = [], [], 0
+    for word in line.split():
+        # `chars` is the length of " ".join(current), kept as a running count.
+        joined = chars + 1 + len(word) if current else len(word)
+        if current and joined // 4 + 1 > max_tokens:
+            pieces.append(" ".join(current))
+            current, joined = [], len(word)
+        current.append(word)
+        chars = joined
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+
+def split_windows(text, max_tokens=SUMMARY_WINDOW_TOKENS, overlap_lines=WINDOW_OVERLAP_LINES):
+    """
+    Split transcript text into windows of whole lines of at most `max_tokens` tokens.
+    A window starts with up to `overlap_lines` lines of the previous one, as far as they fit.
+    """
+    lines = []
+    for line in text.splitlines():
+        if line.strip():
+            lines.extend(_split_long_line(line, max_tokens) if estimate_tokens(line) > max_tokens else [line])
+    windows, current, used = [], [], 0
+    for line in lines:
+        cost = estimate_tokens(line)
+        if current and used + cost > max_tokens:
+            windows.append("\n".join(current))
+            current = current[-overlap_lines:] if overlap_lines else []
+            used = sum(estimate_tokens(kept) for kept in current)
+            # Drop the oldest carried lines until the new line fits.
+            while current and used + cost > max_tokens:
+                used -= estimate_tokens(current.pop(0))
+        current.append(line)
+        used += cost
+    if current:
+        windows.append("\n".join(current))
+    return windows
+
+
+def _words(text):
+    return set(tokenize(text))
+
+
+def _merge_unique(target, values):
+    seen = {value.strip().casefold() for value in target}
+    for value in values:
+        key = value.strip().casefold()
+        if key and key not in seen:
+            seen.add(key)
+            target.append(value.strip())
+
+
+def merge_action_items(partials):
+    """Concatenate the windows' action items, merging near-duplicate descriptions and their people and dates."""
+    merged = []
+    for items in partials:
+        for item in items:
+            words = _words(item["description"])
+            for existing in merged:
+                union = words | existing["_words"]
+                if union and len(words & existing["_words"]) / len(union) >= DUPLICATE_SIMILARITY:
+                    _merge_unique(existing["assignees"], item.get("assignees", []))
+                    _merge_unique(existing["dates"], item.get("dates", []))
+                    break
+            else:
+                entry = {"description": item["description"], "assignees": [], "dates": [], "_words": words}
+                _merge_unique(entry["assignees"], item.get("assignees", []))
+                _merge_unique(entry["dates"], item.get("dates", []))
+                merged.append(entry)
+    return [{key: value for key, value in item.items() if key != "_words"} for item in merged]
+
+
+class MapReduceSummarizer:
+    """
+    Summarises transcripts of any length with an LLM that exposes
+    `await extract(text, part, parts)` -> {"summary", "actionable_items"} or None, and
+    `await combine(summaries)` -> str. At most `concurrency` calls run at once.
+    """
+    def __init__(self, llm, window_tokens=SUMMARY_WINDOW_TOKENS, concurrency=SUMMARY_CONCURRENCY):
+        self.llm = llm
+        self.window_tokens = window_tokens
+        self.semaphore = asyncio.Semaphore(max(1, concurrency))
+        self.calls = 0
+
+    async def _call(self, method, *args):
+        async with self.semaphore:
+            self.calls += 1
+            return await method(*args)
+
+    async def summarize(self, text):
+        """{"summary", "actionable_items"} for `text`, or None if no window could be parsed."""
+        if len(text) > SPLIT_IN_THREAD_CHARS:
+            windows = await asyncio.to_thread(split_windows, text, self.window_tokens)
+        else:
+            windows = split_windows(text, self.window_tokens)
+        if not windows:
+            return None
+        partials = await asyncio.gather(*(
+            self._call(self.llm.extract, window, index, len(windows)) for index, window in enumerate(windows, 1)
+        ))
+        partials = [partial for partial in partials if partial]
+        if not partials:
+            return None
+        summary = await self._reduce_summaries([partial["summary"] for partial in partials if partial.get("summary")])
+        return {"summary": summary, "actionable_items": merge_action_items(partial.get("actionable_items", []) for partial in partials)}
+
+    async def _reduce_summaries(self, summaries):
+        if len(summaries) <= 1:
+            return summaries[0] if summaries else ""
+        # Combine groups that fit one window, level by level, until one summary is left.
+        while len(summaries) > 1:
+            groups, current, used = [], [], 0
+            for summary in summaries:
+                cost = estimate_tokens(summary)
+                if current and used + cost > self.window_tokens:
+                    groups.append(current)
+                    current, used = [], 0
+                current.append(summary)
+                used += cost
+            groups.append(current)
+            if len(groups) == len(summaries):
+                # Every summary fills a window on its own; pair them so the tree still shrinks.
+                groups = [summaries[i:i + 2] for i in range(0, len(summaries), 2)]
+            summaries = await asyncio.gather(*(
+                self._call(self.llm.combine, group) if len(group) > 1 else asyncio.sleep(0, group[0])
+                for group in groups
+            ))
+        return summaries[0]
+
+
+class OpenAIMeetingLLM:
+    """Structured-output extraction with an AsyncOpenAI client; `limit()` wraps each request."""
+    def __init__(self, client, response_format, model="gpt-4o-2024-08-06", limit=None):
+        self.client = client
+        self.response_format = response_format
+        self.model = model
+        self.limit = limit
+
+    async def extract(self, text, part, parts):
+        label = "Transcript" if parts == 1 else f"Transcript (part {part} of {parts})"
+        async with self.limit() if self.limit else nullcontext():
+            completion = await self.client.beta.chat.completions.parse(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": MAP_PROMPT},
+                    {"role": "user", "content": f"{label}: {text}"},
+                ],
+                response_format=self.response_format,
+            )
+        parsed = completion.choices[0].message.parsed
+        return parsed.model_dump() if parsed else None
+
+    async def combine(self, summaries):
+        parts = "\n\n".join(f"Part {index}: {summary}" for index, summary in enumerate(summaries, 1))
+        async with self.limit() if self.limit else nullcontext():
+            completion = await self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": REDUCE_PROMPT},
+                    {"role": "user", "content": parts},
+                ],
+            )
+        return completion.choices[0].message.content.strip()
+
+
+_TIMESTAMP = re.compile(r"^\[\d+:\d\d:\d\d\]\s*")
+_SENTENCE = re.compile(r"(?<=[.!?])\s+")
+_ACTION_CUE = re.compile(r"\b(?:will|'ll|needs? to|has to|should|action item|follow up)\b", re.IGNORECASE)
+_DATE = re.compile(
+    r"\b(?:(?:next |this )?(?:monday|tuesday|wednesday|thursday|friday|saturday|sunday)|tomorrow|today|next week|"
+    r"end of (?:the )?(?:day|week|month|quarter)|"
+    r"(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.? \d{1,2}(?:st|nd|rd|th)?|"
+    r"\d{1,2}/\d{1,2}(?:/\d{2,4})?)\b",
+    re.IGNORECASE,
+)
+_NAME = re.compile(r"\b[A-Z][a-z]+\b")
+_NOT_NAMES = {
+    "I", "We", "You", "They", "He", "She", "It", "The", "This", "That", "So", "And", "But", "Okay", "Ok", "Yes",
+    "No", "Also", "Then", "Let", "Can", "Could", "Should", "Will", "Please", "Action", "Item", "Hello", "Thanks",
+    "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday", "Today", "Tomorrow", "Next",
+}
+
+
+class LocalMeetingLLM:
+    """
+    Offline stand-in for the model, for tests and benchmarks: rule-based extraction of
+    sentences with an action cue, capitalised names and date phrases, after `latency`
+    seconds per call.
+    """
+    def __init__(self, latency=0.0):
+        self.latency = latency
+
+    async def extract(self, text, part, parts):
+        await asyncio.sleep(self.latency)
+        items = []
+        lines = [_TIMESTAMP.sub("", line) for line in text.splitlines()]
+        for sentence in _SENTENCE.split(" ".join(lines)):
+            if not _ACTION_CUE.search(sentence):
+                continue
+            names = [name for name in _NAME.findall(sentence) if name not in _NOT_NAMES]
+            items.append({
+                "description": sentence.strip(),
+                "assignees": list(dict.fromkeys(names)),
+                "dates": list(dict.fromkeys(match.group(0) for match in _DATE.finditer(sentence))),
+            })
+        return {"summary": self._topics(" ".join(lines)), "actionable_items": items}
+
+    async def combine(self, summaries):
+        await asyncio.sleep(self.latency)
+        return self._topics(" ".join(re.sub(r"^Discussed ", "", summary) for summary in summaries))
+
+    @staticmethod
+    def _topics(text, count=6):
+        topics = [word for word, _ in Counter(tokenize(text)).most_common(count)]
+        return f"Discussed {', '.join(topics)}." if topics else ""
+
+
+def synthesize_transcript(hours, seed=0):
+    """A repetitive meeting transcript with one timestamped line every ~6 seconds."""
+    rng = random.Random(seed)
+    people = ["Alice", "Bob", "Carol", "Dan"]
+    topics = ["pricing", "roadmap", "hiring", "launch", "budget", "churn", "design review"]
+    days = ["Monday", "Friday", "next week", "end of the month"]
+    lines = []
+    for index in range(int(hours * 600)):
+        seconds = index * 6
+        if rng.random() < 0.1:
+            text = f"{rng.choice(people)} will send the {rng.choice(topics)} update by {rng.choice(days)}."
+        else:
+            text = f"We talked about {rng.choice(topics)} and the {rng.choice(topics)} numbers for a while."
+        lines.append(f"[{seconds // 3600:02}:{seconds % 3600 // 60:02}:{seconds % 60:02}] {text}")
+    return "\n".join(lines)
+
+
+async def main(args):
+    for hours in args.hours:
+        text = synthesize_transcript(hours)
+        summarizer = MapReduceSummarizer(LocalMeetingLLM(args.latency), args.window_tokens, args.concurrency)
+        started = time.perf_counter()
+        result = await summarizer.summarize(text)
+        elapsed = time.perf_counter() - started
+        print(f"{hours:>5}h  {estimate_tokens(text):>8} tokens  {len(split_windows(text, args.window_tokens)):>4} windows  "
+              f"{summarizer.calls:>4} calls  {len(result['actionable_items']):>4} items  {elapsed:6.2f}s", flush=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark map-reduce summarization against a local LLM stand-in.")
+    parser.add_argument("--hours", type=float, nargs="+", default=[0.5, 1, 2, 4, 8], help="Synthetic meeting lengths")
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds per stand-in LLM call")
+    parser.add_argument("--window-tokens", type=int, default=SUMMARY_WINDOW_TOKENS, help="Token budget per window")
+    parser.add_argument("--concurrency", type=int, default=SUMMARY_CONCURRENCY, help="Concurrent LLM calls")
+    asyncio.run(main(parser.parse_args()))
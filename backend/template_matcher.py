@@ -0,0 +1,142 @@
+import threading
+import cv2
+import numpy as np
+import pyautogui
+
+DEFAULT_SCALES = (1.0, 0.9, 1.1, 0.8, 1.25)
+# Full-screen searches run on a screenshot shrunk by this factor.
+SEARCH_DOWNSCALE = 0.5
+MATCH_THRESHOLD = 0.8
+ROI_MARGIN = 40
+
+
+class TemplateMatch:
+    def __init__(self, template, left, top, width, height, score, scale=1.0):
+        self.template = template
+        self.left = left
+        self.top = top
+        self.width = width
+        self.height = height
+        self.score = score
+        self.scale = scale
+
+    @property
+    def center(self):
+        return self.left + self.width // 2, self.top + self.height // 2
+
+    @property
+    def box(self):
+        return self.left, self.top, self.width, self.height
+
+
+def grab_screen(region=None):
+    """Grayscale screenshot of the whole screen, or of `region` as (left, top, width, height)."""
+    image = pyautogui.screenshot(region=region)
+    return np.asarray(image.convert("L"))
+
+
+class TemplateMatcher:
+    """
+    Finds fallback button images on screen with OpenCV.
+    Templates are loaded once as grayscale scale pyramids. Each search first looks in
+    the region where that template was last found, then falls back to one downscaled
+    full-screen capture shared by every template in the search.
+    """
+    def __init__(self, scales=DEFAULT_SCALES, downscale=SEARCH_DOWNSCALE, threshold=MATCH_THRESHOLD, roi_margin=ROI_MARGIN):
+        self.scales = scales
+        self.downscale = downscale
+        self.threshold = threshold
+        self.roi_margin = roi_margin
+        self._templates = {}
+        self._scaled = {}
+        self._last_found = {}
+        self._lock = threading.Lock()
+
+    def load(self, path):
+        """Return the cached (full_size, [(scale, downscaled_template), ...]) for `path`."""
+        with self._lock:
+            cached = self._templates.get(path)
+            if cached is not None:
+                return cached
+            template = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+            if template is None:
+                raise FileNotFoundError(f"Template image not found or unreadable: {path}")
+            pyramid = []
+            for scale in self.scales:
+                factor = scale * self.downscale
+                size = (max(1, round(template.shape[1] * factor)), max(1, round(template.shape[0] * factor)))
+                pyramid.append((scale, cv2.resize(template, size, interpolation=cv2.INTER_AREA)))
+            cached = self._templates[path] = (template, pyramid)
+            return cached
+
+    def load_scaled(self, path, scale):
+        """Return the cached full-resolution template for `path` resized by `scale`."""
+        key = (path, scale)
+        with self._lock:
+            cached = self._scaled.get(key)
+        if cached is not None:
+            return cached
+        template, _ = self.load(path)
+        if scale != 1.0:
+            size = (max(1, round(template.shape[1] * scale)), max(1, round(template.shape[0] * scale)))
+            template = cv2.resize(template, size, interpolation=cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR)
+        with self._lock:
+            self._scaled[key] = template
+        return template
+
+    def locate(self, templates):
+        """Return the best TemplateMatch above the threshold for any of `templates`, or None."""
+        if isinstance(templates, str):
+            templates = [templates]
+        for path in templates:
+            match = self._locate_in_last_region(path)
+            if match is not None:
+                return match
+
+        screen = grab_screen()
+        small = cv2.resize(screen, None, fx=self.downscale, fy=self.downscale, interpolation=cv2.INTER_AREA)
+        best = None
+        for path in templates:
+            _, pyramid = self.load(path)
+            for scale, template in pyramid:
+                if template.shape[0] > small.shape[0] or template.shape[1] > small.shape[1]:
+                    continue
+                result = cv2.matchTemplate(small, template, cv2.TM_CCOEFF_NORMED)
+                _, score, _, (x, y) = cv2.minMaxLoc(result)
+                if score >= self.threshold and (best is None or score > best.score):
+                    best = TemplateMatch(
+                        path,
+                        int(x / self.downscale),
+                        int(y / self.downscale),
+                        int(template.shape[1] / self.downscale),
+                        int(template.shape[0] / self.downscale),
+                        score,
+                        scale,
+                    )
+        if best is not None:
+            self._last_found[best.template] = (best.box, best.scale)
+        return best
+
+    def _locate_in_last_region(self, path):
+        last = self._last_found.get(path)
+        if last is None:
+            return None
+        box, scale = last
+        screen_width, screen_height = pyautogui.size()
+        left = max(0, box[0] - self.roi_margin)
+        top = max(0, box[1] - self.roi_margin)
+        right = min(screen_width, box[0] + box[2] + self.roi_margin)
+        bottom = min(screen_height, box[1] + box[3] + self.roi_margin)
+        region = grab_screen((left, top, right - left, bottom - top))
+        # Re-match at the scale of the last hit, since the page zoom rarely changes.
+        template = self.load_scaled(path, scale)
+        if template.shape[0] > region.shape[0] or template.shape[1] > region.shape[1]:
+            return None
+        # The region is small, so match at full resolution for an exact position.
+        result = cv2.matchTemplate(region, template, cv2.TM_CCOEFF_NORMED)
+        _, score, _, (x, y) = cv2.minMaxLoc(result)
+        if score < self.threshold:
+            return None
+        match = TemplateMatch(path, left + x, top + y, template.shape[1], template.shape[0], score, scale)
+        self._last_found[path] = (match.box, scale)
+        return match
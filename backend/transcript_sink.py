@@ -0,0 +1,74 @@
+import os
+import asyncio
+
+FLUSH_BYTES = 4096
+FLUSH_INTERVAL = 1.0
+
+
+class TranscriptSink:
+    """
+    Write-behind transcript file for one session.
+    write() only appends to an in-memory buffer; the buffer is written out by a worker
+    thread once it reaches `flush_bytes` or every `flush_interval` seconds, and always
+    on close(), so slow disks never stall the websocket receive loop.
+    """
+    def __init__(self, path, flush_bytes=FLUSH_BYTES, flush_interval=FLUSH_INTERVAL, mode="a"):
+        self.path = path
+        self.mode = mode
+        self.flush_bytes = flush_bytes
+        self.flush_interval = flush_interval
+        self._buffer = []
+        self._buffered = 0
+        self._file = None
+        self._lock = asyncio.Lock()
+        self._timer = None
+        self._pending = None
+        self.closed = False
+
+    async def open(self):
+        def _open():
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            return open(self.path, self.mode, encoding="utf-8")
+        self._file = await asyncio.to_thread(_open)
+        self._timer = asyncio.create_task(self._flush_periodically())
+        return self
+
+    def write(self, text):
+        if self.closed:
+            return
+        self._buffer.append(text)
+        self._buffered += len(text)
+        if self._buffered >= self.flush_bytes and (self._pending is None or self._pending.done()):
+            self._pending = asyncio.create_task(self.flush())
+
+    async def flush(self):
+        async with self._lock:
+            if not self._buffer or self._file is None:
+                return
+            data = "".join(self._buffer)
+            self._buffer = []
+            self._buffered = 0
+            await asyncio.to_thread(self._write, data)
+
+    def _write(self, data):
+        self._file.write(data)
+        self._file.flush()
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"🔴 ERROR: Failed to flush transcript to {self.path}: {e}", flush=True)
+
+    async def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        if self._timer is not None:
+            self._timer.cancel()
+        await self.flush()
+        if self._file is not None:
+            await asyncio.to_thread(self._file.close)
+            self._file = None
@@ -0,0 +1,124 @@
+import math
+import bisect
+import numpy as np
+
+FRAME_SECONDS = 0.02
+# Audio kept flowing after the last voiced frame, and sent ahead of the first one,
+# so trailing consonants and word onsets are not clipped.
+HANGOVER_SECONDS = 0.6
+PREROLL_SECONDS = 0.3
+# A frame is voiced when it is this far above the running noise floor.
+SPEECH_MARGIN_DB = 9.0
+MIN_SPEECH_DB = -55.0
+# Unvoiced sounds (s, f, th) are quiet but cross zero often.
+ZCR_THRESHOLD = 0.3
+# The noise floor starts low, drops at once to any quieter frame, eases toward the
+# level of unvoiced frames, and creeps up while everything looks voiced so a louder
+# room is eventually learned.
+INITIAL_NOISE_FLOOR_DB = -60.0
+NOISE_FLOOR_ADAPT = 0.05
+NOISE_FLOOR_RISE_DB = 0.01
+
+
+class VoiceActivityGate:
+    """
+    Energy and zero-crossing voice activity detector for 16-bit PCM.
+    process() is fed consecutive audio by absolute byte offset and returns the byte
+    ranges worth sending; silence between them is skipped. Ranges may start before
+    the data passed in (pre-roll), so callers read them back from their own buffer.
+    """
+    def __init__(self, sample_rate, channels=1, frame_seconds=FRAME_SECONDS, hangover_seconds=HANGOVER_SECONDS,
+                 preroll_seconds=PREROLL_SECONDS, margin_db=SPEECH_MARGIN_DB, zcr_threshold=ZCR_THRESHOLD):
+        self.channels = channels
+        self.frame_bytes = int(sample_rate * frame_seconds) * channels * 2
+        self.hangover_frames = math.ceil(hangover_seconds / frame_seconds)
+        self.preroll_bytes = math.ceil(preroll_seconds / frame_seconds) * self.frame_bytes
+        self.margin_db = margin_db
+        self.zcr_threshold = zcr_threshold
+        self.noise_floor = INITIAL_NOISE_FLOOR_DB
+        self.reset(0)
+
+    def reset(self, offset):
+        """Start a new stream at `offset`, keeping the learned noise floor."""
+        self.sent_until = offset
+        self.frames_since_speech = self.hangover_frames + 1
+
+    @property
+    def active(self):
+        return self.frames_since_speech <= self.hangover_frames
+
+    def classify(self, samples):
+        """Voiced flags for a (frames, samples_per_frame) float array."""
+        energy = np.einsum("ij,ij->i", samples, samples) / samples.shape[1]
+        db = 10 * np.log10(energy / 32768.0 ** 2 + 1e-10)
+        signs = np.signbit(samples)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (samples.shape[1] - 1)
+        threshold = max(self.noise_floor + self.margin_db, MIN_SPEECH_DB)
+        voiced = (db > threshold) | ((db > threshold - self.margin_db / 2) & (zcr > self.zcr_threshold))
+        quiet = db[~voiced]
+        if quiet.size:
+            self.noise_floor += NOISE_FLOOR_ADAPT * (float(quiet.mean()) - self.noise_floor)
+        else:
+            self.noise_floor += NOISE_FLOOR_RISE_DB * len(db)
+        self.noise_floor = min(self.noise_floor, float(db.min()))
+        return voiced
+
+    def process(self, data, offset):
+        """
+        Classify the whole frames of `data`, which starts at absolute byte `offset`.
+        Returns ([(start, end), ...], consumed): the ranges to send and how many bytes
+        were examined. A trailing partial frame is left for the next call.
+        """
+        frames = len(data) // self.frame_bytes
+        if frames == 0:
+            return [], 0
+        consumed = frames * self.frame_bytes
+        samples = np.frombuffer(data[:consumed], dtype="<i2").astype(np.float32)
+        samples = samples.reshape(frames, -1, self.channels).mean(axis=2)
+        voiced = self.classify(samples)
+
+        # Frames within the hangover of the most recent voiced frame stay open.
+        index = np.arange(frames)
+        last_voiced = np.maximum.accumulate(np.where(voiced, index, -self.frames_since_speech))
+        active = index - last_voiced <= self.hangover_frames
+        self.frames_since_speech = int(frames - last_voiced[-1])
+
+        edges = np.diff(np.concatenate(([0], active.astype(np.int8), [0])))
+        ranges = []
+        for first, stop in zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)):
+            start = max(offset + int(first) * self.frame_bytes - self.preroll_bytes, self.sent_until)
+            end = offset + int(stop) * self.frame_bytes
+            if ranges and start <= ranges[-1][1]:
+                ranges[-1] = (ranges[-1][0], end)
+            else:
+                ranges.append((start, end))
+            self.sent_until = end
+        return ranges, consumed
+
+
+class SentAudioMap:
+    """
+    Maps byte positions in the audio sent on one connection back to positions in the
+    session's audio, across the gaps the gate skipped.
+    """
+    def __init__(self, session_start=0):
+        self._sent = [0]
+        self._session = [session_start]
+        self.sent_total = 0
+
+    @property
+    def is_identity(self):
+        return len(self._sent) == 1 and self._session[0] == 0
+
+    def record(self, session_offset, size):
+        """Note that `size` bytes from `session_offset` were sent next. Returns the bytes skipped before them."""
+        expected = self.to_session(self.sent_total)
+        if session_offset != expected:
+            self._sent.append(self.sent_total)
+            self._session.append(session_offset)
+        self.sent_total += size
+        return session_offset - expected
+
+    def to_session(self, sent_offset):
+        i = max(0, bisect.bisect_right(self._sent, sent_offset) - 1)
+        return self._session[i] + sent_offset - self._sent[i]
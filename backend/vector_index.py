@@ -0,0 +1,198 @@
+import os
+import json
+import time
+import zlib
+import numpy as np
+from metrics import REGISTRY
+from search_index import Segment, tokenize
+
+# Approximate words per embedded chunk; consecutive finals of a session are merged up to this.
+CHUNK_WORDS = 120
+# A pause longer than this (seconds) between finals always starts a new chunk.
+CHUNK_GAP_SECONDS = 30.0
+HASHING_DIM = 512
+
+VECTOR_SEARCH_SECONDS = REGISTRY.histogram(
+    "meetscript_vector_search_seconds",
+    "Time to embed queries and rank transcript chunks in the local vector index.",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+CHUNKS_EMBEDDED = REGISTRY.counter("meetscript_vector_chunks_embedded_total", "Transcript chunks added to the vector index.")
+
+
+class HashingEmbedder:
+    """
+    Deterministic, offline embedder: signed feature hashing of word unigrams and
+    bigrams, L2-normalised. No model download or API key, so tests and air-gapped
+    deployments get stable vectors.
+    """
+    def __init__(self, dim=HASHING_DIM):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _features(self, text):
+        tokens = tokenize(text)
+        return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+    def embed(self, texts):
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            hashes = np.array([zlib.crc32(feature.encode("utf-8")) for feature in self._features(text)], dtype=np.int64)
+            if not len(hashes):
+                continue
+            signs = np.where((hashes // self.dim) & 1, -1.0, 1.0).astype(np.float32)
+            np.add.at(vectors[row], hashes % self.dim, signs)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+
+class OpenAIEmbedder:
+    """Embeddings from the OpenAI API; blocking, so call embed() from a worker thread."""
+    def __init__(self, api_key, model="text-embedding-3-small", dim=1536):
+        from openai import OpenAI
+        self.client = OpenAI(api_key=api_key)
+        self.model = model
+        self.dim = dim
+        self.name = f"openai-{model}"
+
+    def embed(self, texts):
+        response = self.client.embeddings.create(model=self.model, input=list(texts))
+        vectors = np.array([item.embedding for item in response.data], dtype=np.float32)
+        return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+
+def make_embedder(name=None, openai_api_key=None):
+    """The embedder named by `name` (or $EMBEDDER): "hashing" (default) or "openai"."""
+    name = name or os.getenv("EMBEDDER", "hashing")
+    if name == "hashing":
+        return HashingEmbedder()
+    if name == "openai":
+        return OpenAIEmbedder(openai_api_key or os.getenv("OPENAI_API_KEY"))
+    raise ValueError(f"Unknown embedder: {name}")
+
+
+def chunk_segments(segments, max_words=CHUNK_WORDS, max_gap=CHUNK_GAP_SECONDS):
+    """Merge one session's time-ordered segments into chunks of about `max_words` words."""
+    chunks = []
+    current, words, last_end = [], 0, None
+    for segment in segments:
+        gap = segment.start is not None and last_end is not None and segment.start - last_end > max_gap
+        if current and (words >= max_words or gap):
+            chunks.append(current)
+            current, words = [], 0
+        current.append(segment)
+        words += len(segment.text.split())
+        last_end = segment.end
+    if current:
+        chunks.append(current)
+    return [
+        {"session_id": chunk[0].session_id, "start": chunk[0].start, "end": chunk[-1].end,
+         "text": " ".join(segment.text for segment in chunk)}
+        for chunk in chunks
+    ]
+
+
+class VectorIndex:
+    """
+    Transcript chunk embeddings in an append-only float32 file, read through np.memmap,
+    with a JSON-lines sidecar holding each row's session, times and text. Opening an
+    existing index maps the file instead of re-embedding anything, and a top-k cosine
+    search is one matrix product over the mapped rows.
+    """
+    def __init__(self, directory, embedder=None, name="vectors"):
+        self.embedder = embedder or HashingEmbedder()
+        self.matrix_path = os.path.join(directory, f"{name}.f32")
+        self.rows_path = os.path.join(directory, f"{name}.jsonl")
+        self.info_path = os.path.join(directory, f"{name}.json")
+        self.matrix = np.zeros((0, self.embedder.dim), dtype=np.float32)
+        self.rows = []
+        self.sessions = set()
+        self._session_codes = {}
+        self._row_codes = np.zeros(0, dtype=np.int32)
+
+    def __len__(self):
+        return self.matrix.shape[0]
+
+    def open(self):
+        """Map an existing index. Blocking; an index built by another embedder is discarded."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.matrix_path)), exist_ok=True)
+        info = {"embedder": self.embedder.name, "dim": self.embedder.dim}
+        try:
+            with open(self.info_path, encoding="utf-8") as f:
+                compatible = json.load(f) == info
+        except (FileNotFoundError, ValueError):
+            compatible = False
+        if not compatible:
+            for path in (self.matrix_path, self.rows_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            with open(self.info_path, "w", encoding="utf-8") as f:
+                json.dump(info, f)
+            return self
+        rows = []
+        with open(self.rows_path, "a+", encoding="utf-8") as f:
+            f.seek(0)
+            rows = [json.loads(line) for line in f if line.strip()]
+        row_bytes = 4 * self.embedder.dim
+        size = os.path.getsize(self.matrix_path) if os.path.exists(self.matrix_path) else 0
+        # A crash between the two appends can leave one side longer; keep the common prefix.
+        count = min(len(rows), size // row_bytes)
+        self._load(rows[:count], count)
+        return self
+
+    def _load(self, rows, count):
+        # Rows are published before the larger matrix, so a concurrent search never
+        # sees a matrix row without its metadata.
+        codes = [self._session_codes.setdefault(row["session_id"], len(self._session_codes)) for row in rows]
+        self.rows = rows
+        self._row_codes = np.array(codes, dtype=np.int32)
+        self.sessions = set(self._session_codes)
+        if count:
+            self.matrix = np.memmap(self.matrix_path, dtype=np.float32, mode="r", shape=(count, self.embedder.dim))
+
+    def add_chunks(self, chunks):
+        """Embed and append chunks ({"session_id", "start", "end", "text"}). Blocking."""
+        if not chunks:
+            return 0
+        vectors = np.ascontiguousarray(self.embedder.embed([chunk["text"] for chunk in chunks]), dtype=np.float32)
+        with open(self.matrix_path, "ab") as f:
+            f.write(vectors.tobytes())
+        with open(self.rows_path, "a", encoding="utf-8") as f:
+            f.writelines(json.dumps(chunk) + "\n" for chunk in chunks)
+        self._load(self.rows + list(chunks), len(self) + len(chunks))
+        CHUNKS_EMBEDDED.inc(len(chunks))
+        return len(chunks)
+
+    def add_segments(self, segments):
+        """Chunk and embed one session's time-ordered Segments. Blocking."""
+        return self.add_chunks(chunk_segments(segments))
+
+    def search_batch(self, queries, k=5, session_id=None):
+        """Top `k` chunks for each query, as one [(score, Segment), ...] list per query."""
+        started = time.perf_counter()
+        matrix = self.matrix
+        count = matrix.shape[0]
+        if not count or not queries:
+            return [[] for _ in queries]
+        scores = self.embedder.embed(list(queries)) @ matrix.T
+        if session_id is not None:
+            code = self._session_codes.get(session_id)
+            scores[:, self._row_codes[:count] != code] = -np.inf
+        k = min(k, count)
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        results = []
+        for query_scores, indices in zip(scores, top):
+            ranked = sorted(indices, key=lambda index: -query_scores[index])
+            results.append([
+                (float(query_scores[index]), self._segment(index))
+                for index in ranked if query_scores[index] > 0
+            ])
+        VECTOR_SEARCH_SECONDS.observe(time.perf_counter() - started)
+        return results
+
+    def search(self, query, k=5, session_id=None):
+        return self.search_batch([query], k, session_id)[0]
+
+    def _segment(self, index):
+        row = self.rows[index]
+        return Segment(int(index), row["session_id"], row["start"], row["end"], row["text"])
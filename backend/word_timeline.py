@@ -0,0 +1,88 @@
+import struct
+import bisect
+from array import array
+
+_MAGIC = b"MSWT"
+_HEADER = struct.Struct("<4sII")
+
+
+class WordTimeline:
+    """
+    Word timings for one session in parallel typed columns instead of a dict per word:
+    start and end seconds (float64), confidence (float32) and each token's offset into
+    one shared UTF-8 buffer. Words arrive in time order, so time lookups are binary
+    searches over the start column.
+    """
+    def __init__(self):
+        self.starts = array("d")
+        self.ends = array("d")
+        self.confidences = array("f")
+        self.token_offsets = array("I")
+        self._text = bytearray()
+
+    def __len__(self):
+        return len(self.starts)
+
+    def append(self, token, start, end, confidence=1.0):
+        if self.starts and start < self.starts[-1]:
+            # Out-of-order words would break the binary search; results only move forward.
+            return
+        self.starts.append(start)
+        self.ends.append(end)
+        self.confidences.append(confidence)
+        self.token_offsets.append(len(self._text))
+        self._text += token.encode("utf-8")
+
+    def extend_from_result(self, response):
+        """Append the words of a final Results message."""
+        alternative = response.get("channel", {}).get("alternatives", [{}])[0]
+        for word in alternative.get("words", []):
+            self.append(word.get("punctuated_word") or word["word"], word["start"], word["end"], word.get("confidence", 1.0))
+
+    def token(self, index):
+        start = self.token_offsets[index]
+        end = self.token_offsets[index + 1] if index + 1 < len(self.token_offsets) else len(self._text)
+        return self._text[start:end].decode("utf-8")
+
+    def index_at(self, seconds):
+        """Index of the word being spoken at `seconds` (or the last one before it), or None."""
+        index = bisect.bisect_right(self.starts, seconds) - 1
+        return index if index >= 0 else None
+
+    def range_indices(self, start, end):
+        """Indices [lo, hi) of the words overlapping [start, end)."""
+        lo = max(0, bisect.bisect_right(self.starts, start) - 1)
+        if lo < len(self) and self.ends[lo] <= start:
+            lo += 1
+        hi = bisect.bisect_left(self.starts, end)
+        return lo, max(lo, hi)
+
+    def words_between(self, start, end):
+        lo, hi = self.range_indices(start, end)
+        return [
+            {"word": self.token(i), "start": self.starts[i], "end": self.ends[i], "confidence": round(self.confidences[i], 4)}
+            for i in range(lo, hi)
+        ]
+
+    def text_between(self, start, end):
+        lo, hi = self.range_indices(start, end)
+        return " ".join(self.token(i) for i in range(lo, hi))
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, len(self), len(self._text)))
+            for column in (self.starts, self.ends, self.confidences, self.token_offsets):
+                column.tofile(f)
+            f.write(self._text)
+
+    @classmethod
+    def load(cls, path):
+        timeline = cls()
+        with open(path, "rb") as f:
+            magic, count, text_length = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != _MAGIC:
+                raise ValueError(f"Not a word timeline file: {path}")
+            for column in (timeline.starts, timeline.ends, timeline.confidences, timeline.token_offsets):
+                column.fromfile(f, count)
+            timeline._text = bytearray(f.read(text_length))
+        return timeline
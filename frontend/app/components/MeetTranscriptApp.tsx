@@ -27,6 +27,14 @@ interface StatusUpdate {
   timestamp: Date;
 }
 
+interface TranscriptEvent {
+  offset: number;
+  type: 'interim' | 'final' | 'end';
+  start?: number;
+  transcript?: string;
+  status?: string;
+}
+
 interface ChatMessage {
   id: string;
   type: 'user' | 'assistant';
@@ -41,6 +49,9 @@ export default function MeetTranscriptApp() {
   const [chatMessages, setChatMessages] = useState<ChatMessage[]>([]);
   const [currentMessage, setCurrentMessage] = useState('');
   const [data, setData] = useState(null);
+  const [transcriptFile, setTranscriptFile] = useState('transcript.txt');
+  const [liveLines, setLiveLines] = useState<string[]>([]);
+  const [liveInterim, setLiveInterim] = useState('');
   const [meetingConfig, setMeetingConfig] = useState<MeetingConfig>({
     meetingUrl: '',
     deepgramApiKey: '',
@@ -93,22 +104,93 @@ export default function MeetTranscriptApp() {
         })
       });
       const data = await res.json();
-      if (data.success) {
-        addStatusUpdate('success', 'Transcription completed successfully');
-      } else {
+      if (!data.success) {
         addStatusUpdate('error', `Transcription failed: ${data.error}`);
+        setIsProcessing(false);
+        return;
       }
+      addStatusUpdate('progress', `Transcription job ${data.job_id} ${data.status}`);
+      await pollTranscriptionJob(data.job_id);
     } catch (error) {
       addStatusUpdate('error', `Failed to start transcription: ${error}`);
     }
     setIsProcessing(false);
   };
 
+  // Follow the job's live transcript; the server replays from the start and closes the stream when the job ends
+  const subscribeToTranscript = (jobId: string) => {
+    setLiveLines([]);
+    setLiveInterim('');
+    const source = new EventSource(`http://localhost:8000/api/sessions/${jobId}/stream?from_offset=0`);
+    // Reconnects resume from Last-Event-ID; anything at or below the last offset is a repeat
+    let lastOffset = -1;
+    source.onmessage = (message) => {
+      const event: TranscriptEvent = JSON.parse(message.data);
+      if (event.offset <= lastOffset) {
+        return;
+      }
+      lastOffset = event.offset;
+      if (event.type === 'final') {
+        if (event.transcript) {
+          setLiveLines(prev => [...prev, event.transcript as string]);
+        }
+        setLiveInterim('');
+      } else if (event.type === 'interim') {
+        setLiveInterim(event.transcript || '');
+      } else if (event.type === 'end') {
+        source.close();
+      }
+    };
+    return source;
+  };
+
+  // Poll the background job until it reaches a terminal state
+  const pollTranscriptionJob = async (jobId: string) => {
+    const liveSource = subscribeToTranscript(jobId);
+    try {
+      await waitForTranscriptionJob(jobId);
+    } finally {
+      liveSource.close();
+    }
+  };
+
+  const waitForTranscriptionJob = async (jobId: string) => {
+    let lastStatus = '';
+    while (true) {
+      await new Promise(resolve => setTimeout(resolve, 5000));
+      const res = await fetch(`http://localhost:8000/api/jobs/${jobId}`);
+      if (!res.ok) {
+        addStatusUpdate('error', `Lost track of transcription job ${jobId}`);
+        return;
+      }
+      const job = await res.json();
+      if (job.status !== lastStatus) {
+        lastStatus = job.status;
+        if (job.status === 'completed') {
+          if (job.result?.transcript_file) {
+            setTranscriptFile(job.result.transcript_file);
+          }
+          addStatusUpdate('success', 'Transcription completed successfully');
+          return;
+        }
+        if (job.status === 'failed') {
+          addStatusUpdate('error', `Transcription failed: ${job.error}`);
+          return;
+        }
+        if (job.status === 'cancelled') {
+          addStatusUpdate('info', 'Transcription cancelled');
+          return;
+        }
+        addStatusUpdate('progress', `Transcription job ${job.status}`);
+      }
+    }
+  };
+
   // Handler for "Upload" button using HTTP fetch to ingest endpoint
   const handleUploadTranscript = async () => {
     addStatusUpdate("info", "Sending ingest transcript request...");
     try {
-      const transcriptPath='transcript.txt';
+      const transcriptPath = transcriptFile;
       const res = await fetch('http://localhost:8000/api/ingest', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
@@ -314,6 +396,18 @@ export default function MeetTranscriptApp() {
             </button>
           </div>
         </div>
+     {/* Live Transcript */}
+     {(liveLines.length > 0 || liveInterim) && (
+       <div className="px-6 pt-4 max-h-64 overflow-y-auto">
+         <h3 className="text-sm font-semibold text-gray-700 mb-2">Live Transcript</h3>
+         <div className="space-y-1 text-sm text-gray-800">
+           {liveLines.map((line, index) => (
+             <p key={index}>{line}</p>
+           ))}
+           {liveInterim && <p className="text-gray-400 italic">{liveInterim}</p>}
+         </div>
+       </div>
+     )}
      {/* Status Updates */}
      <div className="p-6 flex-1 overflow-y-auto">
         <div className="space-y-2">